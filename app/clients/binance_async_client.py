@@ -0,0 +1,99 @@
+# app/clients/binance_async_client.py
+
+import asyncio
+import logging
+from binance import AsyncClient, BinanceSocketManager
+from binance.exceptions import BinanceAPIException
+from app.config import EX_API_KEY, EX_API_SECRET, EXCHANGE_BASE_URL
+from app.clients.binance_client import apply_exchange_base_url, exchange_stream_url
+from app.clients.rate_governor import GovernedAsyncClient
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 이벤트 루프 안에서 공유하는 싱글톤 AsyncClient
+_binance_async_client: AsyncClient | None = None
+_init_lock: asyncio.Lock | None = None
+
+
+async def _ensure_hedge_mode(client: AsyncClient) -> None:
+    """
+    binance_client._ensure_hedge_mode 의 비동기 버전.
+    이미 Hedge Mode면 아무 작업도 하지 않습니다.
+    """
+    try:
+        mode = await client.futures_get_position_mode()
+
+        if mode.get("dualSidePosition") is True:
+            logger.info("Binance account already in Hedge Mode.")
+            return
+
+        logger.info("Switching Binance account to Hedge Mode...")
+        await client.futures_change_position_mode(dualSidePosition=True)
+
+        confirm = await client.futures_get_position_mode()
+        if confirm.get("dualSidePosition") is not True:
+            raise RuntimeError("Failed to enable Hedge Mode.")
+
+        logger.info("Hedge Mode enabled successfully.")
+
+    except BinanceAPIException as e:
+        logger.warning("Binance API exception while setting Hedge Mode: %s", e)
+    except Exception as e:
+        logger.error("Unexpected error while enabling Hedge Mode: %s", e)
+        raise
+
+
+async def get_binance_async_client() -> AsyncClient:
+    """
+    웹훅 경로에서 사용하는 비동기 Binance Client를 반환합니다.
+    이벤트 루프를 막지 않으므로 서로 다른 심볼/프로파일의 알림이 동시에 진행됩니다.
+    최초 생성 시 Hedge Mode를 자동으로 활성화합니다.
+    """
+    global _binance_async_client, _init_lock
+
+    if _binance_async_client is not None:
+        return _binance_async_client
+
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+
+    async with _init_lock:
+        if _binance_async_client is None:
+            if not EX_API_KEY or not EX_API_SECRET:
+                logger.error("Binance API 키/시크릿이 .env에 설정되지 않았습니다.")
+                raise RuntimeError("Missing Binance API credentials.")
+
+            # 요청 가중치/주문 수 한도를 관리하는 래핑 클라이언트
+            if EXCHANGE_BASE_URL:
+                # create()의 ping이 실거래소로 나가지 않도록 직접 생성 후 엔드포인트 교체
+                client = GovernedAsyncClient(EX_API_KEY, EX_API_SECRET)
+                apply_exchange_base_url(client)
+                logger.info(f"Initialized Binance AsyncClient against {EXCHANGE_BASE_URL}.")
+            else:
+                client = await GovernedAsyncClient.create(EX_API_KEY, EX_API_SECRET)
+                logger.info("Initialized live Binance AsyncClient.")
+
+            await _ensure_hedge_mode(client)
+            _binance_async_client = client
+
+    return _binance_async_client
+
+
+def get_socket_manager(client: AsyncClient) -> BinanceSocketManager:
+    """BinanceSocketManager 생성 (EXCHANGE_BASE_URL 설정 시 선물 스트림도 그쪽으로)"""
+    bsm = BinanceSocketManager(client)
+    stream_url = exchange_stream_url()
+    if stream_url:
+        bsm.FSTREAM_URL = stream_url
+    return bsm
+
+
+async def close_binance_async_client() -> None:
+    """앱 종료 시 aiohttp 세션을 정리합니다."""
+    global _binance_async_client
+
+    if _binance_async_client is not None:
+        await _binance_async_client.close_connection()
+        _binance_async_client = None
+        logger.info("Closed Binance AsyncClient.")
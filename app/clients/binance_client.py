@@ -3,7 +3,7 @@
 import logging
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
-from app.config import EX_API_KEY, EX_API_SECRET
+from app.config import EX_API_KEY, EX_API_SECRET, EXCHANGE_BASE_URL
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -12,6 +12,25 @@ logger.setLevel(logging.INFO)
 _binance_client: Client | None = None
 
 
+def apply_exchange_base_url(client) -> None:
+    """
+    EXCHANGE_BASE_URL 이 설정된 경우 REST 엔드포인트를 그쪽(로컬 시뮬레이터 등)으로 돌립니다.
+    Client / AsyncClient 공용.
+    """
+    if not EXCHANGE_BASE_URL:
+        return
+    client.API_URL = f"{EXCHANGE_BASE_URL}/api"
+    client.FUTURES_URL = f"{EXCHANGE_BASE_URL}/fapi"
+    client.FUTURES_DATA_URL = f"{EXCHANGE_BASE_URL}/futures/data"
+
+
+def exchange_stream_url() -> str | None:
+    """EXCHANGE_BASE_URL 에 대응하는 선물 websocket 베이스 URL (미설정 시 None)"""
+    if not EXCHANGE_BASE_URL:
+        return None
+    return EXCHANGE_BASE_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1) + "/"
+
+
 def _ensure_hedge_mode(client: Client) -> None:
     """
     Binance Futures 계정을 Hedge Mode(dualSidePosition=True)로 설정합니다.
@@ -55,9 +74,15 @@ def get_binance_client() -> Client:
             logger.error("Binance API 키/시크릿이 .env에 설정되지 않았습니다.")
             raise RuntimeError("Missing Binance API credentials.")
 
-        # 실제 거래용 Client 생성
-        _binance_client = Client(EX_API_KEY, EX_API_SECRET)
-        logger.info("Initialized live Binance Client.")
+        if EXCHANGE_BASE_URL:
+            # 생성자 ping이 실거래소로 나가지 않도록 생략 후 엔드포인트 교체
+            _binance_client = Client(EX_API_KEY, EX_API_SECRET, ping=False)
+            apply_exchange_base_url(_binance_client)
+            logger.info(f"Initialized Binance Client against {EXCHANGE_BASE_URL}.")
+        else:
+            # 실제 거래용 Client 생성
+            _binance_client = Client(EX_API_KEY, EX_API_SECRET)
+            logger.info("Initialized live Binance Client.")
 
         # ⭐ 여기서 Hedge Mode 보장
         _ensure_hedge_mode(_binance_client)
@@ -0,0 +1,219 @@
+# app/clients/rate_governor.py
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from binance import AsyncClient
+
+from binance.exceptions import BinanceAPIException
+
+from app.config import RATE_WEIGHT_LIMIT_1M, RATE_ORDER_LIMIT_10S, RATE_ORDER_LIMIT_1M
+from app.metrics import observe_exchange, observe_rate_wait
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 우선순위: 주문 > 웹훅 경로 일반 호출 > 동기화/리포트 등 백그라운드
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# 우선순위별로 쓸 수 있는 한도 비율 (나머지는 상위 우선순위용으로 남겨둠)
+_SHARES = {PRIORITY_HIGH: 1.0, PRIORITY_NORMAL: 0.9, PRIORITY_LOW: 0.6}
+
+# 엔드포인트별 요청 가중치 (명시 안 된 경로는 1)
+_WEIGHTS = {
+    "positionRisk": 5,
+    "positionSide/dual": 30,
+    "symbolConfig": 5,
+    "account": 5,
+    "batchOrders": 5,
+}
+_ORDER_PATHS = {"order", "batchOrders"}
+
+_priority: ContextVar[int] = ContextVar("binance_request_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def low_priority():
+    """이 블록(및 여기서 만든 태스크)에서 나가는 요청을 낮은 우선순위로 표시"""
+    token = _priority.set(PRIORITY_LOW)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class WindowBucket:
+    """
+    Binance 방식의 고정 윈도우(분/10초 단위) 버킷.
+    보낼 때 로컬로 차감하고, 응답 헤더가 오면 거래소 값으로 맞춥니다.
+    """
+    __slots__ = ("name", "capacity", "window", "used", "window_start")
+
+    def __init__(self, name: str, capacity: int, window: float):
+        self.name = name
+        self.capacity = capacity
+        self.window = window
+        self.used = 0
+        self.window_start = 0.0
+
+    def _roll(self, now: float) -> None:
+        start = now - (now % self.window)
+        if start != self.window_start:
+            self.window_start = start
+            self.used = 0
+
+    def has_room(self, n: int, share: float, now: float) -> bool:
+        self._roll(now)
+        return self.used + n <= self.capacity * share
+
+    def consume(self, n: int, now: float) -> None:
+        self._roll(now)
+        self.used += n
+
+    def sync(self, used: int, now: float) -> None:
+        self._roll(now)
+        self.used = used
+
+    def reset_in(self, now: float) -> float:
+        self._roll(now)
+        return self.window_start + self.window - now
+
+    def remaining(self, now: float) -> int:
+        self._roll(now)
+        return max(self.capacity - self.used, 0)
+
+
+class RateGovernor:
+    def __init__(self, weight_limit: int, order_limit_10s: int, order_limit_1m: int):
+        self.weight_1m = WindowBucket("weight_1m", weight_limit, 60.0)
+        self.orders_10s = WindowBucket("orders_10s", order_limit_10s, 10.0)
+        self.orders_1m = WindowBucket("orders_1m", order_limit_1m, 60.0)
+        self.blocked_until = 0.0
+        self.throttled = {PRIORITY_HIGH: 0, PRIORITY_NORMAL: 0, PRIORITY_LOW: 0}
+        self.bans = 0
+
+    async def acquire(self, weight: int, is_order: bool, priority: int) -> None:
+        """한도 안에 들어올 때까지 기다린 뒤 예산을 차감합니다."""
+        share = _SHARES[priority]
+        waited = False
+        while True:
+            now = time.time()
+            if self.blocked_until > now:
+                wait = self.blocked_until - now
+            else:
+                buckets = [self.weight_1m]
+                if is_order:
+                    buckets += [self.orders_10s, self.orders_1m]
+                full = [b for b in buckets if not b.has_room(weight if b is self.weight_1m else 1, share, now)]
+                if not full:
+                    self.weight_1m.consume(weight, now)
+                    if is_order:
+                        self.orders_10s.consume(1, now)
+                        self.orders_1m.consume(1, now)
+                    return
+                wait = max(b.reset_in(now) for b in full)
+
+            if not waited:
+                self.throttled[priority] += 1
+                waited = True
+            logger.info(f"[RateGovernor] Delaying priority={priority} request {wait:.2f}s")
+            await asyncio.sleep(wait + 0.01)
+
+    def on_response(self, status: int, headers) -> None:
+        """응답 헤더(X-MBX-USED-WEIGHT-1M, X-MBX-ORDER-COUNT-*)로 버킷 보정, 429/418 시 백오프"""
+        now = time.time()
+
+        used = headers.get("X-MBX-USED-WEIGHT-1M")
+        if used is not None:
+            self.weight_1m.sync(int(used), now)
+        count_10s = headers.get("X-MBX-ORDER-COUNT-10S")
+        if count_10s is not None:
+            self.orders_10s.sync(int(count_10s), now)
+        count_1m = headers.get("X-MBX-ORDER-COUNT-1M")
+        if count_1m is not None:
+            self.orders_1m.sync(int(count_1m), now)
+
+        if status in (418, 429):
+            # -1003 / -1015 / IP ban: Retry-After 동안 전부 멈춤 (계속 보내면 밴이 길어짐)
+            retry_after = headers.get("Retry-After")
+            delay = float(retry_after) if retry_after else self.weight_1m.reset_in(now)
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self.bans += 1
+            logger.warning(f"[RateGovernor] HTTP {status}, backing off {delay:.1f}s")
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        return {
+            "weight_1m_remaining": self.weight_1m.remaining(now),
+            "orders_10s_remaining": self.orders_10s.remaining(now),
+            "orders_1m_remaining": self.orders_1m.remaining(now),
+            "blocked_for": round(max(self.blocked_until - now, 0.0), 3),
+            "throttled": {
+                "high": self.throttled[PRIORITY_HIGH],
+                "normal": self.throttled[PRIORITY_NORMAL],
+                "low": self.throttled[PRIORITY_LOW],
+            },
+            "bans": self.bans,
+        }
+
+
+governor = RateGovernor(RATE_WEIGHT_LIMIT_1M, RATE_ORDER_LIMIT_10S, RATE_ORDER_LIMIT_1M)
+
+
+def _endpoint(uri: str) -> str:
+    # ".../fapi/v1/positionSide/dual?..." -> "positionSide/dual"
+    path = uri.split("?", 1)[0]
+    for marker in ("/fapi/v1/", "/fapi/v2/", "/fapi/v3/"):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return path
+
+
+def _classify(method: str, path: str) -> tuple[int, bool, bool]:
+    """-> (가중치, 주문 수에 포함되는지(신규 주문), 주문 경로(신규/취소)인지)"""
+    method = method.lower()
+    weight = _WEIGHTS.get(path, 1)
+    is_order_path = path in _ORDER_PATHS and method in ("post", "delete")
+    return weight, is_order_path and method == "post", is_order_path
+
+
+class GovernedAsyncClient(AsyncClient):
+    """선물(fapi) REST 요청을 RateGovernor를 거쳐 보내는 AsyncClient"""
+
+    async def _request(self, method, uri: str, signed: bool, force_params: bool = False, **kwargs):
+        # 현물 ping 등 fapi 외 요청은 한도가 별도라 제외
+        if "/fapi/" not in uri:
+            return await super()._request(method, uri, signed, force_params, **kwargs)
+
+        endpoint = _endpoint(uri)
+        weight, is_order, is_order_path = _classify(method, endpoint)
+        priority = PRIORITY_HIGH if is_order_path else _priority.get()
+
+        start = time.perf_counter()
+        await governor.acquire(weight, is_order, priority)
+        sent = time.perf_counter()
+        # 한도에 걸려 실제로 대기한 요청만 기록
+        if sent - start > 0.001:
+            observe_rate_wait(endpoint, sent - start)
+
+        result = "ok"
+        try:
+            return await super()._request(method, uri, signed, force_params, **kwargs)
+        except BinanceAPIException as e:
+            result = str(e.code)
+            raise
+        except Exception:
+            result = "error"
+            raise
+        finally:
+            observe_exchange(endpoint, method.upper(), result, time.perf_counter() - sent)
+
+    async def _handle_response(self, response):
+        if "/fapi/" in str(response.url):
+            governor.on_response(response.status, response.headers)
+        return await super()._handle_response(response)
@@ -21,6 +21,10 @@ TP_RATIO       = float(os.getenv("TP_RATIO", "1.005"))
 TP_PART_RATIO  = float(os.getenv("TP_PART_RATIO", "0.5"))
 # 손절 비율 (-0.5% → 0.995)
 SL_RATIO       = float(os.getenv("SL_RATIO", "0.995"))
+# true 면 진입 시 시장가 + 부분 익절(TAKE_PROFIT_MARKET) + 손절(STOP_MARKET)을 batchOrders 한 번으로 (거래소 보관)
+PROTECTIVE_ORDERS = os.getenv("PROTECTIVE_ORDERS", "false").lower() == "true"
+# true 면 one-way(/webhook ~ /webhook4) 반대 포지션 보유 중 BUY/SELL 을 |현재 수량| + 신규 수량 시장가 1건으로 뒤집음
+SWITCH_FLIP_ORDER = os.getenv("SWITCH_FLIP_ORDER", "false").lower() == "true"
 # 포지션 체크 주기 (초)
 POLL_INTERVAL  = float(os.getenv("POLL_INTERVAL", "1.0"))
 # 최대 대기 시간 (초)
@@ -30,4 +34,89 @@ MAX_WAIT       = int(os.getenv("MAX_WAIT", "15"))
 # ── 거래 수수료(기본 0.04%) ──────────────────────────
 # 선물 taker fee 기준 0.04% = 0.0004
 # 레버리지 5배 → 한쪽 0.2% (= 0.0004 * 5)
-FEE_RATE       = float(os.getenv("FEE_RATE", "0.0004"))
\ No newline at end of file
+FEE_RATE       = float(os.getenv("FEE_RATE", "0.0004"))
+
+# ── 심볼 규칙(exchange info) 캐시 ─────────────────────
+# 백그라운드 갱신 주기 (초)
+SYMBOL_RULES_TTL      = float(os.getenv("SYMBOL_RULES_TTL", "3600"))
+# 재시작 시 웜 스타트용 스냅샷 파일 경로
+SYMBOL_RULES_SNAPSHOT = os.getenv("SYMBOL_RULES_SNAPSHOT", "data/symbol_rules.json")
+# 갱신 후에도 없던 심볼은 이 시간(초) 동안 재갱신 없이 바로 거절 (오타/잘못된 심볼 알림 반복 대비)
+SYMBOL_RULES_MISS_TTL = float(os.getenv("SYMBOL_RULES_MISS_TTL", "60"))
+
+# ── 마크가격 스트림 캐시 ──────────────────────────────
+# 이 시간(초)보다 오래된 스트림 가격이면 REST로 재조회
+MARK_PRICE_MAX_AGE    = float(os.getenv("MARK_PRICE_MAX_AGE", "3.0"))
+# 열린 포지션 전체의 현재가/미실현 손익 재계산 주기 (초). 스트림이 1초 주기라 그보다 짧게 할 이유 없음
+MONITOR_INTERVAL      = float(os.getenv("MONITOR_INTERVAL", "1.0"))
+
+# ── 프로세스 내 청산 트리거 (트레일링 / 시간 / 단계별 부분 익절) ──
+# 가격 트리거는 마크가격 스트림 수신마다 평가. 시간 트리거 확인 주기 (초)
+TRIGGER_CLOCK_INTERVAL = float(os.getenv("TRIGGER_CLOCK_INTERVAL", "1.0"))
+
+# ── 체결 확인 (user-data stream ORDER_TRADE_UPDATE) ──
+# 이벤트를 기다리는 최대 시간 (초). 초과 시 REST 폴링으로 대체
+FILL_EVENT_TIMEOUT    = float(os.getenv("FILL_EVENT_TIMEOUT", "2.0"))
+
+# ── 포지션 북 (ACCOUNT_UPDATE 기반) ───────────────────
+# REST 스냅샷과 비교하는 드리프트 체크 주기 (초)
+POSITION_DRIFT_CHECK_INTERVAL = float(os.getenv("POSITION_DRIFT_CHECK_INTERVAL", "60"))
+
+# ── 요청 가중치 / 주문 수 제한 (Binance USD-M 기본값) ──
+RATE_WEIGHT_LIMIT_1M  = int(os.getenv("RATE_WEIGHT_LIMIT_1M", "2400"))
+RATE_ORDER_LIMIT_10S  = int(os.getenv("RATE_ORDER_LIMIT_10S", "300"))
+RATE_ORDER_LIMIT_1M   = int(os.getenv("RATE_ORDER_LIMIT_1M", "1200"))
+
+# ── 거래소 엔드포인트 ─────────────────────────────────
+# 비워두면 실거래 Binance. 로컬 시뮬레이터(sim/) 등으로 돌릴 때 설정
+# 예) EXCHANGE_BASE_URL=http://127.0.0.1:9000
+EXCHANGE_BASE_URL     = os.getenv("EXCHANGE_BASE_URL", "").rstrip("/")
+
+# ── 알림 실행 스케줄러 ───────────────────────────────
+# 같은 (계정, 심볼) 알림은 순서대로 하나씩, 다른 심볼끼리는 이 개수까지 동시에 실행
+EXECUTION_MAX_CONCURRENCY = int(os.getenv("EXECUTION_MAX_CONCURRENCY", "16"))
+# 종료 시 실행 중인 알림(주문 → 체결 대기 → 정산)이 끝나기를 기다리는 최대 시간 (초)
+EXECUTION_SHUTDOWN_TIMEOUT = float(os.getenv("EXECUTION_SHUTDOWN_TIMEOUT", "30"))
+
+# ── 중복 알림 제거 (TradingView 재전송 / 중복 알림 설정) ──
+# 같은 (profile, symbol, action) 알림을 이 시간(초) 안에 다시 받으면 첫 결과를 그대로 반환. 0이면 끔
+ALERT_DEDUP_WINDOW      = float(os.getenv("ALERT_DEDUP_WINDOW", "2.0"))
+# payload 에 alert_id 가 있으면 그 id 기준으로 이 시간(초) 동안 중복 처리
+ALERT_DEDUP_ID_TTL      = float(os.getenv("ALERT_DEDUP_ID_TTL", "600"))
+# 캐시 최대 항목 수 (초과 시 오래된 것부터 제거)
+ALERT_DEDUP_MAX_ENTRIES = int(os.getenv("ALERT_DEDUP_MAX_ENTRIES", "10000"))
+
+# ── 빠른 응답(fast-ack) 모드 ─────────────────────────
+# true 면 웹훅은 검증 + 큐 등록 후 바로 202(job_id) 응답, 결과는 /orders/{job_id} 로 조회
+WEBHOOK_FAST_ACK        = os.getenv("WEBHOOK_FAST_ACK", "false").lower() == "true"
+# 결과 조회용으로 보관하는 최근 job 수
+JOB_HISTORY_MAX         = int(os.getenv("JOB_HISTORY_MAX", "5000"))
+
+# ── 상태(monitor_states) 영속화 (SQLite WAL 저널 + 스냅샷) ──
+# 비워두면 영속화 끔 (재시작 시 capital 등 초기화)
+STATE_DB_PATH            = os.getenv("STATE_DB_PATH", "data/state.db")
+# 변경된 상태를 모아 저널에 쓰는 주기 (초). 주문 경로에서는 dirty 표시만 함
+STATE_FLUSH_INTERVAL     = float(os.getenv("STATE_FLUSH_INTERVAL", "0.5"))
+# 저널 행이 이 수를 넘으면 스냅샷으로 압축 (기동 시 재생할 저널 길이 상한)
+STATE_SNAPSHOT_ROWS      = int(os.getenv("STATE_SNAPSHOT_ROWS", "5000"))
+
+# ── 거래 원장 (append-only 컬럼 파일, np.memmap) ─────
+# 비워두면 기록 안 함
+TRADE_LEDGER_DIR            = os.getenv("TRADE_LEDGER_DIR", "data/ledger")
+# 청크(디렉터리) 하나당 행 수
+TRADE_LEDGER_CHUNK_ROWS     = int(os.getenv("TRADE_LEDGER_CHUNK_ROWS", "65536"))
+# 대기 행을 파일에 쓰는 주기 (초)
+TRADE_LEDGER_FLUSH_INTERVAL = float(os.getenv("TRADE_LEDGER_FLUSH_INTERVAL", "0.5"))
+
+# ── 대시보드 push (SSE /dashboard/stream) ───────────
+# 변경분(diff)을 모아 보내는 최소 간격 (초). 구독자 수와 무관하게 한 번 계산·인코딩
+DASHBOARD_PUSH_INTERVAL = float(os.getenv("DASHBOARD_PUSH_INTERVAL", "1.0"))
+# 변경이 없을 때 연결 유지용 주석 이벤트 주기 (초)
+DASHBOARD_KEEPALIVE     = float(os.getenv("DASHBOARD_KEEPALIVE", "15"))
+
+# ── 백그라운드 작업 (스트림 / 갱신 / flush 루프) ─────
+# 예외로 끝난 작업 재시작 대기: BASE × 2^(연속 실패-1), 최대 MAX (초)
+BACKGROUND_RESTART_BASE = float(os.getenv("BACKGROUND_RESTART_BASE", "1.0"))
+BACKGROUND_RESTART_MAX  = float(os.getenv("BACKGROUND_RESTART_MAX", "60.0"))
+# 종료 시 작업 취소 후 기다리는 최대 시간 (초)
+BACKGROUND_STOP_TIMEOUT = float(os.getenv("BACKGROUND_STOP_TIMEOUT", "10.0"))
@@ -1,41 +1,186 @@
 # app/main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.routers.webhook import router as webhook_router
-#from app.routers.dashboard import router as dashboard_router
-from app.routers.report import router as report_router, report
-import threading
+from app.routers.dashboard import router as dashboard_router
+from app.routers.report import router as report_router
+from app.routers.orders import router as orders_router
+from app.routers.triggers import router as triggers_router
 import logging
-#from app.services.monitor import start_monitor
+from app.services.runtime import runtime
+from app.services.monitor import position_monitor, run_monitor
+from app.services.symbol_rules import load_snapshot, run_symbol_rules_refresher
+from app.clients.binance_async_client import get_binance_async_client, close_binance_async_client
+from app.clients.rate_governor import governor
+from app.services.account_config import load_account_config, apply_account_config_update
+from app.services.user_stream import register_handler, run_user_stream
+from app.services.mark_price import add_price_listener, run_mark_price_stream
+from app.services.trigger_engine import engine as trigger_engine, run_trigger_clock
+from app.services.order_events import handle_order_trade_update
+from app.services.switching import on_protective_fill, exit_on_trigger
+from app.services.switching_hedge import on_protective_fill as on_protective_fill_hedge, exit_on_trigger as exit_on_trigger_hedge
+from app.services.position_book import apply_account_update, run_drift_checker, drift_stats
+from app.services.user_stream import is_connected
+from app.services.execution import scheduler
+from app.services.alert_dedup import dedup_cache
+from app.services.trade_ledger import open_trade_ledger, run_trade_ledger, stop_trade_ledger
+from app.services.dashboard_feed import feed as dashboard_feed, run_dashboard_feed
+from app.services.state_journal import load_state_journal, run_state_journal, stop_state_journal, journal_stats
+from app import metrics
 
-# APScheduler imports
-from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime
-from zoneinfo import ZoneInfo
+logger = logging.getLogger("main")
 
-app = FastAPI()
 
-@app.on_event("startup")
-def on_startup():
+async def startup() -> None:
     """
     앱 기동 시:
-    1) 모니터 스레드 안전 실행
-    2) 매일 KST 09:00에 일일 리포트 실행 스케줄러 등록
+    1) 상태(monitor_states) 스냅샷 + 저널 복원, 거래 원장(체결/청산 기록) 열기
+    2) 심볼 규칙(exchange info) 캐시 웜 스타트
+    3) 레버리지/포지션 모드 캐시 적재
+    4) 백그라운드 작업 등록 후 시작 (app/services/runtime.py: 실패 시 backoff 재시작, /health 에 상태)
+       - 상태 저널 / 거래 원장 flush, 대시보드 push(SSE)
+       - 심볼 규칙 TTL 갱신, 마크가격 스트림(!markPrice@arr@1s), 포지션 미실현 손익 모니터
+       - 프로세스 내 청산 트리거 (가격: 마크가격 수신마다, 시간: trigger_clock)
+       - user-data stream 구독 + 포지션 북 드리프트 체크 (계정 설정을 읽었을 때만)
     """
 
-    # # 1) 일일 리포트 스케줄러 (Asia/Seoul 09:00)
-    # sched = BackgroundScheduler(timezone="Asia/Seoul")
-    # # 매일 오전 09:00에 report() 호출
-    # sched.add_job(lambda: report(), 'cron', hour=9, minute=0)
-    # sched.start()
+    load_state_journal()
+    open_trade_ledger()
+    load_snapshot()
+
+    runtime.add("state_journal", run_state_journal)
+    runtime.add("trade_ledger", run_trade_ledger)
+    runtime.add("dashboard_feed", run_dashboard_feed)
+    runtime.add("symbol_rules", run_symbol_rules_refresher)
+    runtime.add("mark_price_stream", run_mark_price_stream)
+    runtime.add("monitor", run_monitor)
+
+    # 프로세스 내 청산 트리거: 마크가격 수신마다 평가, 발동 시 one-way / hedge 청산 경로로
+    trigger_engine.register_exit(False, exit_on_trigger)
+    trigger_engine.register_exit(True, exit_on_trigger_hedge)
+    add_price_listener(trigger_engine.on_prices)
+    runtime.add("trigger_clock", run_trigger_clock)
+
+    # user-data stream 이벤트 → 캐시/포지션 북 갱신, 체결 대기 깨우기, 보호 주문(익절/손절) 체결 정산
+    register_handler("ACCOUNT_CONFIG_UPDATE", apply_account_config_update)
+    register_handler("ORDER_TRADE_UPDATE", handle_order_trade_update)
+    register_handler("ORDER_TRADE_UPDATE", on_protective_fill)
+    register_handler("ORDER_TRADE_UPDATE", on_protective_fill_hedge)
+    register_handler("ACCOUNT_UPDATE", apply_account_update)
+    try:
+        await load_account_config(await get_binance_async_client())
+        runtime.add("user_stream", run_user_stream)
+        runtime.add("drift_checker", run_drift_checker)
+    except Exception:
+        # 키 미설정 등: 캐시는 첫 주문 때 채워짐
+        logger.exception("Failed to initialize account config / user stream")
+
+    runtime.start()
+
+
+async def shutdown() -> None:
+    """
+    앱 종료 시:
+    1) 대시보드 SSE 스트림 종료
+    2) 새 알림은 거절하고 실행 중인 알림은 정산까지 끝나기를 기다림 (EXECUTION_SHUTDOWN_TIMEOUT 까지,
+       아직 시작 안 한 알림은 취소). 체결 대기에 user-data stream 이 필요하므로 백그라운드 작업보다 먼저
+    3) 백그라운드 작업 취소 (등록 역순)
+    4) 비동기 Binance 세션 정리, 정산이 반영된 거래 원장 / 상태 저널 마지막 flush
+    """
+    dashboard_feed.close_all()
+    await scheduler.shutdown()
+    await runtime.stop()
+    await close_binance_async_client()
+    await stop_trade_ledger()
+    await stop_state_journal()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 # 라우터 등록
 app.include_router(webhook_router)
-#app.include_router(dashboard_router)
+app.include_router(dashboard_router)
 app.include_router(report_router)
+app.include_router(orders_router)
+app.include_router(triggers_router)
 
 
 @app.get("/health")
 def health():
-    return {"status": "alive"}
\ No newline at end of file
+    return {
+        "status": "alive" if runtime.healthy() else "degraded",
+        "position_book": drift_stats,
+        "rate_budget": governor.snapshot(),
+        "execution": scheduler.snapshot(),
+        "alert_dedup": dedup_cache.snapshot(),
+        "state_journal": journal_stats,
+        "dashboard": dashboard_feed.stats,
+        "monitor": position_monitor.stats,
+        "triggers": trigger_engine.stats,
+        "background": runtime.snapshot(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus scrape 용: 단계별/엔드포인트별 지연 히스토그램 + 포지션 북 / 요청 한도 상태"""
+    budget = governor.snapshot()
+    execution = scheduler.snapshot()
+    extra = []
+    extra += metrics.gauge("user_stream_connected", "1 if the futures user-data stream is connected",
+                           int(is_connected()))
+    extra += metrics.gauge("position_book_drift_checks_total", "Position book drift checks run",
+                           drift_stats["checks"], kind="counter")
+    extra += metrics.gauge("position_book_drift_mismatched_checks_total",
+                           "Drift checks that found at least one mismatched position",
+                           drift_stats["mismatched_checks"], kind="counter")
+    extra += metrics.gauge("position_book_drift_mismatched_positions_total",
+                           "Positions found out of sync with the exchange",
+                           drift_stats["mismatched_positions"], kind="counter")
+    extra += metrics.gauge("position_book_drift_last_check_timestamp_seconds",
+                           "Unix time of the last drift check", drift_stats["last_check"])
+    extra += metrics.gauge("rate_budget_remaining", "Remaining exchange request budget in the current window", [
+        ({"bucket": "weight_1m"}, budget["weight_1m_remaining"]),
+        ({"bucket": "orders_10s"}, budget["orders_10s_remaining"]),
+        ({"bucket": "orders_1m"}, budget["orders_1m_remaining"]),
+    ])
+    extra += metrics.gauge("rate_blocked_seconds", "Seconds left in a 429/418 back-off", budget["blocked_for"])
+    extra += metrics.gauge("rate_throttled_total", "Requests delayed by the rate governor", [
+        ({"priority": p}, n) for p, n in budget["throttled"].items()
+    ], kind="counter")
+    extra += metrics.gauge("execution_running", "Alerts currently executing", execution["running"])
+    extra += metrics.gauge("execution_queued", "Alerts waiting in per-symbol queues", execution["queued"])
+    extra += metrics.gauge("execution_queue_depth", "Per-symbol queue depth including the running alert", [
+        ({"symbol": metrics.escape_label(sym)}, depth) for sym, depth in execution["depth"].items()
+    ])
+    extra += metrics.gauge("alert_duplicates_total", "Duplicate alerts answered from the dedup cache", [
+        ({"profile": profile}, n) for profile, n in dedup_cache.hits.items()
+    ], kind="counter")
+    extra += metrics.gauge("dashboard_subscribers", "Open dashboard SSE streams",
+                           dashboard_feed.stats["subscribers"])
+    extra += metrics.gauge("triggers_live", "Armed in-process exit triggers", trigger_engine.stats["live"])
+    extra += metrics.gauge("triggers_fired_total", "In-process exit triggers fired",
+                           trigger_engine.stats["fired"], kind="counter")
+    extra += metrics.gauge("triggers_last_eval_seconds", "Trigger evaluation time for the last price tick",
+                           trigger_engine.stats["last_eval_us"] / 1e6)
+    background = runtime.snapshot()
+    extra += metrics.gauge("background_worker_up", "1 if the background worker is running", [
+        ({"worker": name}, int(w["status"] == "running")) for name, w in background.items()
+    ])
+    extra += metrics.gauge("background_worker_restarts_total", "Background worker restarts after a failure", [
+        ({"worker": name}, w["restarts"]) for name, w in background.items()
+    ], kind="counter")
+    extra += metrics.gauge("rate_bans_total", "HTTP 429/418 responses received", budget["bans"], kind="counter")
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,189 @@
+# app/metrics.py
+
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# 히스토그램 버킷 상한 (초). 로컬 캐시 조회(µs) ~ 체결 대기(초)까지 커버
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 현재 처리 중인 알림의 (profile, symbol, action). 알림 밖(백그라운드)이면 None
+_alert: ContextVar[tuple[str, str, str] | None] = ContextVar("alert_labels", default=None)
+
+# 웹훅 본문에서 그대로 오는 값이라 라벨 폭증을 막기 위해 알려진 action만 그대로 사용
+_KNOWN_ACTIONS = {"BUY", "SELL", "BUY_STOP", "SELL_STOP"}
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def symbol_label(symbol: str) -> str:
+    """
+    웹훅 본문의 심볼도 검증 전 값이라, 심볼 규칙 캐시에 있는 심볼만 그대로 쓰고 나머지는 "OTHER".
+    (symbol_rules 가 이 모듈의 timed 를 쓰므로 순환 import 를 피해 호출 시점에 가져옴)
+    """
+    from app.services.symbol_rules import lookup_symbol_rules
+
+    return escape_label(symbol) if lookup_symbol_rules(symbol) is not None else "OTHER"
+
+
+def _fmt_labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(names, values)) + "}"
+
+
+class Histogram:
+    """
+    Prometheus 히스토그램 (라벨 조합별 버킷 카운트).
+    기록은 이벤트 루프 위에서만 일어나므로 락 없이 dict/list 갱신만 합니다.
+    """
+    __slots__ = ("name", "help", "label_names", "_series")
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        # labels -> [bucket별 카운트..., +Inf 카운트, 합계]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, labels: tuple[str, ...], seconds: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(BUCKETS) + 1) + [0.0]
+        series[bisect_left(BUCKETS, seconds)] += 1
+        series[-1] += seconds
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in self._series.items():
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, n in zip(BUCKETS, series):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            cumulative += series[len(BUCKETS)]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {cumulative}')
+            tail = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{tail} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{tail} {cumulative}")
+        return lines
+
+
+alert_stage_seconds = Histogram(
+    "alert_stage_seconds",
+    "Time spent in each stage of an alert (stage=total is the whole alert)",
+    ("profile", "symbol", "action", "stage"),
+)
+exchange_request_seconds = Histogram(
+    "exchange_request_seconds",
+    "Binance futures REST round trip, excluding rate-governor wait",
+    ("profile", "symbol", "action", "endpoint", "method", "result"),
+)
+exchange_rate_wait_seconds = Histogram(
+    "exchange_rate_wait_seconds",
+    "Time futures REST requests were held back by the rate governor (only requests that waited)",
+    ("profile", "endpoint"),
+)
+execution_queue_wait_seconds = Histogram(
+    "execution_queue_wait_seconds",
+    "Time an alert waited in its per-symbol execution queue before starting",
+    ("symbol",),
+)
+
+_HISTOGRAMS = (
+    alert_stage_seconds,
+    exchange_request_seconds,
+    exchange_rate_wait_seconds,
+    execution_queue_wait_seconds,
+)
+
+
+def current_alert() -> tuple[str, str, str]:
+    """(profile, symbol, action). 알림 밖이면 빈 문자열"""
+    return _alert.get() or ("", "", "")
+
+
+def track_alert(func):
+    """
+    알림 진입점(switch_position 등)용 데코레이터.
+    인자의 profile/symbol/action 을 라벨로 잡고 전체 소요 시간을 stage="total" 로 기록합니다.
+    이미 알림 컨텍스트 안이면(중첩 호출) 라벨은 그대로 둡니다.
+    """
+    sig = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if _alert.get() is not None:
+            return await func(*args, **kwargs)
+
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        a = bound.arguments
+        action = str(a.get("action", "")).upper()
+        labels = (
+            str(a.get("profile", "")),
+            symbol_label(str(a.get("symbol", ""))),
+            action if action in _KNOWN_ACTIONS else "OTHER",
+        )
+        token = _alert.set(labels)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            alert_stage_seconds.observe(labels + ("total",), time.perf_counter() - start)
+            _alert.reset(token)
+
+    return wrapper
+
+
+def timed(stage: str):
+    """알림 처리 중 호출된 코루틴의 소요 시간을 stage 라벨로 기록 (알림 밖 호출은 기록 안 함)"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            labels = _alert.get()
+            if labels is None:
+                return await func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                alert_stage_seconds.observe(labels + (stage,), time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def observe_exchange(endpoint: str, method: str, result: str, seconds: float) -> None:
+    exchange_request_seconds.observe(current_alert() + (endpoint, method, result), seconds)
+
+
+def observe_rate_wait(endpoint: str, seconds: float) -> None:
+    exchange_rate_wait_seconds.observe((current_alert()[0], endpoint), seconds)
+
+
+def gauge(name: str, help: str, samples: float | list[tuple[dict[str, str], float]],
+          kind: str = "gauge") -> list[str]:
+    """단일 값 또는 [(라벨, 값), ...] 을 gauge/counter 텍스트로 변환"""
+    if not isinstance(samples, list):
+        samples = [({}, samples)]
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_fmt_labels(tuple(labels), tuple(labels.values()))} {value}"
+              for labels, value in samples]
+    return lines
+
+
+def render(extra: list[str] | None = None) -> str:
+    """Prometheus text exposition (0.0.4)"""
+    lines: list[str] = []
+    for h in _HISTOGRAMS:
+        lines += h.render()
+    if extra:
+        lines += extra
+    return "\n".join(lines) + "\n"
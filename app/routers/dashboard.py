@@ -1,97 +1,147 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import HTMLResponse
-from typing import Optional
-from app.state import monitor_states, get_state
+from fastapi import APIRouter
+from fastapi.responses import HTMLResponse, StreamingResponse
+from app.services.dashboard_feed import feed
 
 router = APIRouter()
 
-@router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(symbol: Optional[str] = None):
-    # 보여줄 심볼을 쿼리 파라미터로 받거나, 저장된 첫 번째 심볼을 기본으로 사용
-    if symbol:
-        sym = symbol.upper().replace('/', '')
-    else:
-        try:
-            sym = next(iter(monitor_states))
-        except StopIteration:
-            raise HTTPException(status_code=404, detail="No symbol data available")
-
-    state = get_state(sym)
-    data        = state
-    entry_price = data.get("entry_price", 0.0)
-    entry_time  = data.get("entry_time", "-")
-    qty         = data.get("position_qty", 0.0)
-    pnl         = data.get("pnl", 0.0)
-
-    first_done  = data.get("first_tp_done", False)
-    tp1_price   = data.get("first_tp_price", 0.0)
-    tp1_qty     = data.get("first_tp_qty", 0.0)
-    tp1_time    = data.get("first_tp_time", "-")
-    tp1_pnl     = data.get("first_tp_pnl", 0.0)
-
-    second_done = data.get("second_tp_done", False)
-    tp2_price   = data.get("second_tp_price", 0.0)
-    tp2_qty     = data.get("second_tp_qty", 0.0)
-    tp2_time    = data.get("second_tp_time", "-")
-    tp2_pnl     = data.get("second_tp_pnl", 0.0)
-
-    sl_done     = data.get("sl_done", False)
-    sl_price    = data.get("sl_price", 0.0)
-    sl_qty      = data.get("sl_qty", 0.0)
-    sl_time     = data.get("sl_time", "-")
-    sl_pnl      = data.get("sl_pnl", 0.0)
-
-    html = f"""<!DOCTYPE html>
+# 정적 페이지 (한 번만 내려받음). 값은 /dashboard/stream(SSE) 의 snapshot + diff 로 갱신
+#   ?symbol=BTCUSDT / ?profile=webhook1 로 표시 대상 필터 (브라우저에서 처리)
+_PAGE = """<!DOCTYPE html>
 <html lang="ko">
 <head>
   <meta charset="UTF-8" />
   <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>자동매매 대시보드 - {sym}</title>
-  <meta http-equiv="refresh" content="3" />
+  <title>자동매매 대시보드</title>
   <style>
-    body {{ background:#f0f2f5; font-family: Arial; padding:20px; }}
-    h1 {{ text-align:center; margin-bottom:20px; }}
-    .card {{ background:#fff; border-radius:8px; padding:16px; margin:10px 0; box-shadow:0 2px 4px rgba(0,0,0,0.1); }}
-    h2 {{ margin:0 0 10px; }}
-    p {{ margin:4px 0; }}
-    .done {{ color:green; }}
-    .pending {{ color:orange; }}
+    body { background:#f0f2f5; font-family: Arial; padding:20px; }
+    h1 { text-align:center; margin-bottom:8px; }
+    #status { text-align:center; color:#666; margin-bottom:16px; }
+    .card { background:#fff; border-radius:8px; padding:16px; margin:10px 0; box-shadow:0 2px 4px rgba(0,0,0,0.1); overflow-x:auto; }
+    h2 { margin:0 0 10px; }
+    table { border-collapse:collapse; width:100%; font-size:14px; }
+    th, td { padding:4px 8px; border-bottom:1px solid #eee; text-align:right; white-space:nowrap; }
+    th:first-child, td:first-child { text-align:left; }
+    .long { color:green; } .short { color:#c00; }
+    .done { color:green; } .pending { color:orange; }
+    .flash { background:#fffbe0; }
   </style>
 </head>
 <body>
-  <h1>자동매매 상태 대시보드: {sym}</h1>
+  <h1>자동매매 상태 대시보드</h1>
+  <div id="status">연결 중...</div>
+  <div id="profiles"></div>
+<script>
+const params = new URLSearchParams(location.search);
+const onlySymbol = (params.get("symbol") || "").toUpperCase().replace("/", "");
+const onlyProfile = params.get("profile") || "";
+const states = {};
+const rows = {};
+
+const COLUMNS = [
+  ["심볼", s => s.symbol],
+  ["방향", s => s.position_side || "-", s => s.position_side === "long" ? "long" : s.position_side === "short" ? "short" : ""],
+  ["수량", s => num(s.position_qty, 4)],
+  ["진입가", s => num(s.entry_price, 4)],
+  ["진입 시간", s => time(s.entry_time)],
+  ["현재가", s => num(s.current_price, 4)],
+  ["PnL(%)", s => num(s.pnl, 2)],
+  ["자본", s => num(s.capital, 2)],
+  ["레버리지", s => s.leverage],
+  ["거래(L/S)", s => `${s.trade_count} (${s.long_count}/${s.short_count})`],
+  ["Hedge L", s => hedge(s, "long")],
+  ["Hedge S", s => hedge(s, "short")],
+  ["1차 익절", s => flag(s.first_tp_done), s => cls(s.first_tp_done)],
+  ["2차 익절", s => flag(s.second_tp_done), s => cls(s.second_tp_done)],
+  ["손절", s => flag(s.sl_done), s => cls(s.sl_done)],
+];
 
-  <div class="card">
-    <h2>진입 정보 <span class="{ 'done' if qty>0 else 'pending' }">({ '진행 중' if qty>0 else '미진행'})</span></h2>
-    <p><strong>시간:</strong> {entry_time}</p>
-    <p><strong>진입가:</strong> {entry_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {qty:.4f}</p>
-    <p><strong>현재 PnL:</strong> {pnl:.2f}%</p>
-  </div>
+function num(v, digits) { return typeof v === "number" ? v.toFixed(digits) : "-"; }
+function time(ts) { return ts ? new Date(ts * 1000).toLocaleString("ko-KR", {timeZone: "Asia/Seoul"}) : "-"; }
+function hedge(s, side) {
+  const h = (s.hedge || {})[side];
+  return h && h.qty ? `${num(Math.abs(h.qty), 4)} @ ${num(h.entry_price, 4)}` : "-";
+}
+function flag(v) { return v === undefined ? "-" : v ? "완료" : "미완료"; }
+function cls(v) { return v === undefined ? "" : v ? "done" : "pending"; }
 
-  <div class="card">
-    <h2>1차 익절 <span class="{ 'done' if first_done else 'pending' }">({ '완료' if first_done else '미완료'})</span></h2>
-    <p><strong>시간:</strong> {tp1_time}</p>
-    <p><strong>체결가:</strong> {tp1_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {tp1_qty:.4f}</p>
-    <p><strong>수익률:</strong> {tp1_pnl:.2f}%</p>
-  </div>
+function visible(s) {
+  return (!onlySymbol || s.symbol === onlySymbol) && (!onlyProfile || s.profile === onlyProfile);
+}
 
-  <div class="card">
-    <h2>2차 익절 <span class="{ 'done' if second_done else 'pending' }">({ '완료' if second_done else '미완료'})</span></h2>
-    <p><strong>시간:</strong> {tp2_time}</p>
-    <p><strong>체결가:</strong> {tp2_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {tp2_qty:.4f}</p>
-    <p><strong>수익률:</strong> {tp2_pnl:.2f}%</p>
-  </div>
+function table(profile) {
+  let body = document.getElementById("p-" + profile);
+  if (body) return body;
+  const card = document.createElement("div");
+  card.className = "card";
+  card.innerHTML = `<h2></h2><table><thead><tr>${COLUMNS.map(c => `<th>${c[0]}</th>`).join("")}</tr></thead><tbody></tbody></table>`;
+  card.querySelector("h2").textContent = profile;
+  body = card.querySelector("tbody");
+  body.id = "p-" + profile;
+  const container = document.getElementById("profiles");
+  const after = [...container.children].find(c => c.querySelector("h2").textContent > profile);
+  container.insertBefore(card, after || null);
+  return body;
+}
 
-  <div class="card">
-    <h2>손절 <span class="{ 'done' if sl_done else 'pending' }">({ '완료' if sl_done else '미완료'})</span></h2>
-    <p><strong>시간:</strong> {sl_time}</p>
-    <p><strong>체결가:</strong> {sl_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {sl_qty:.4f}</p>
-    <p><strong>손익률:</strong> {sl_pnl:.2f}%</p>
-  </div>
+function render(key, flash) {
+  const s = states[key];
+  if (!visible(s)) return;
+  let tr = rows[key];
+  if (!tr) {
+    tr = rows[key] = document.createElement("tr");
+    tr.innerHTML = COLUMNS.map(() => "<td></td>").join("");
+    const body = table(s.profile);
+    const after = [...body.children].find(r => r.cells[0].textContent > s.symbol);
+    body.insertBefore(tr, after || null);
+  }
+  COLUMNS.forEach(([, text, css], i) => {
+    tr.cells[i].textContent = text(s);
+    tr.cells[i].className = css ? css(s) : "";
+  });
+  if (flash) {
+    tr.classList.add("flash");
+    setTimeout(() => tr.classList.remove("flash"), 600);
+  }
+}
+
+function connect() {
+  const source = new EventSource("/dashboard/stream");
+  const status = document.getElementById("status");
+  source.addEventListener("snapshot", e => {
+    for (const key of Object.keys(states)) delete states[key];
+    Object.assign(states, JSON.parse(e.data));
+    for (const key of Object.keys(states)) render(key, false);
+    status.textContent = `실시간 (${Object.keys(states).length} states)`;
+  });
+  source.addEventListener("diff", e => {
+    const diff = JSON.parse(e.data);
+    for (const [key, fields] of Object.entries(diff)) {
+      const s = states[key] = states[key] || {};
+      for (const [f, v] of Object.entries(fields)) {
+        if (v === null) delete s[f]; else s[f] = v;
+      }
+      render(key, true);
+    }
+    status.textContent = `실시간 (${Object.keys(states).length} states) · 마지막 변경 ${new Date().toLocaleTimeString("ko-KR")}`;
+  });
+  source.onerror = () => { status.textContent = "연결 끊김, 재연결 중..."; };
+}
+connect();
+</script>
 </body>
 </html>"""
-    return HTMLResponse(html)
\ No newline at end of file
+
+
+@router.get("/dashboard", response_class=HTMLResponse)
+async def dashboard():
+    return HTMLResponse(_PAGE)
+
+
+@router.get("/dashboard/stream")
+async def dashboard_stream():
+    """상태 변경 push (SSE): 접속 시 snapshot 1회, 이후 변경된 필드만 diff 이벤트로"""
+    return StreamingResponse(
+        feed.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
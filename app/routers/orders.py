@@ -0,0 +1,20 @@
+# app/routers/orders.py
+
+import logging
+from fastapi import APIRouter, HTTPException
+from app.services.jobs import get_job
+
+router = APIRouter()
+logger = logging.getLogger("orders")
+
+
+@router.get("/orders/{job_id}")
+async def get_order_job(job_id: str):
+    """
+    WEBHOOK_FAST_ACK 모드에서 202 로 받은 job_id 의 진행 상태/결과 조회.
+    status: queued → running → done(result) / failed(error, status_code)
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job_id: {job_id}")
+    return job.to_dict()
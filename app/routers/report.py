@@ -6,6 +6,7 @@ from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from app.state import monitor_states, get_state, list_symbols
+from app.services.analytics import analytics
 
 router = APIRouter()
 logger = logging.getLogger("report")
@@ -179,4 +180,15 @@ async def reset_report4(
     symbol: str = Query(..., description="리셋할 심볼 (예: ETH/USDT 또는 ETHUSDT)"),
 ):
     result = _reset_internal("webhook4", symbol)
-    return JSONResponse(result)
\ No newline at end of file
+    return JSONResponse(result)
+
+# ── 성과 분석 (거래 원장 기반) ─────────────────────────
+@router.get("/analytics", response_class=JSONResponse)
+async def analytics_report(
+    points: int = Query(200, ge=2, le=5000, description="equity_curve 샘플 개수"),
+):
+    """
+    거래 원장의 청산 기록으로 계산한 성과 지표 (전체 / profile 별 / symbol 별).
+    net_pnl·max_drawdown 은 USDT, sharpe/sortino 는 청산 1건 수익률(net_pnl_pct) 기준을 거래 빈도로 연환산.
+    """
+    return JSONResponse(await analytics.snapshot(points))
@@ -0,0 +1,119 @@
+# app/routers/triggers.py
+
+import logging
+import time
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from app.clients.binance_async_client import get_binance_async_client
+from app.state import get_state
+from app.services.mark_price import get_mark_price
+from app.services.trigger_engine import engine, Trigger, KIND_TAKE_PROFIT, KIND_TRAILING, KIND_TIME
+from app.routers.webhook import SWITCH_PROFILES, HEDGE_PROFILES
+
+router = APIRouter()
+logger = logging.getLogger("triggers")
+
+
+class Stage(BaseModel):
+    price: float = Field(gt=0)
+    fraction: float = Field(gt=0, le=1)   # 진입 수량 대비 비중
+
+
+class TriggerPayload(BaseModel):
+    symbol: str
+    profile: str
+    kind: Literal["stop", "take_profit", "trailing", "time"]
+    position_side: Literal["LONG", "SHORT"] | None = None   # hedge 프로필(/webhook5,6) 은 필수
+    price: float | None = Field(default=None, gt=0)          # stop / take_profit
+    callback_rate: float | None = Field(default=None, gt=0, lt=1)  # trailing (0.01 = 1%)
+    seconds: float | None = Field(default=None, gt=0)        # time
+    fraction: float = Field(default=1.0, gt=0, le=1)         # 발동 시 보유 수량 중 청산 비중
+    stages: list[Stage] | None = None                        # take_profit 단계별 부분 익절
+
+
+def _position(sym: str, payload: TriggerPayload) -> tuple[bool, bool]:
+    """(is_long, use_initial_capital). 열린 포지션이 없으면 400"""
+    state = get_state(sym, payload.profile)
+    if payload.profile in SWITCH_PROFILES:
+        if payload.position_side is not None:
+            raise HTTPException(status_code=400, detail="position_side is only for hedge profiles")
+        if state.position_qty == 0:
+            raise HTTPException(status_code=400, detail=f"No open position for {payload.profile}:{sym}")
+        return state.position_qty > 0, SWITCH_PROFILES[payload.profile][1]
+
+    if payload.profile in HEDGE_PROFILES:
+        if payload.position_side is None:
+            raise HTTPException(status_code=400, detail="position_side (LONG/SHORT) is required for hedge profiles")
+        side_state = state.hedge_long if payload.position_side == "LONG" else state.hedge_short
+        if side_state.qty == 0:
+            raise HTTPException(status_code=400, detail=f"No open {payload.position_side} for {payload.profile}:{sym}")
+        return payload.position_side == "LONG", HEDGE_PROFILES[payload.profile]
+
+    raise HTTPException(status_code=400, detail=f"Unknown profile: {payload.profile}")
+
+
+def _stage_fractions(stages: list[Stage], is_long: bool) -> list[tuple[float, float]]:
+    """
+    진입 수량 대비 비중 → 발동 시점 남은 수량 대비 비중 (가까운 단계부터 발동하므로 그 순서로 환산).
+    예) 30% / 30% / 40% → 0.3, 0.3/0.7, 1.0
+    """
+    total = sum(s.fraction for s in stages)
+    if total > 1.0 + 1e-9:
+        raise HTTPException(status_code=400, detail=f"Stage fractions sum to {total:.4f} > 1")
+    ordered = sorted(stages, key=lambda s: s.price, reverse=not is_long)
+    out = []
+    remaining = 1.0
+    for stage in ordered:
+        out.append((stage.price, min(stage.fraction / remaining, 1.0)))
+        remaining -= stage.fraction
+    return out
+
+
+@router.post("/triggers")
+async def create_trigger(payload: TriggerPayload):
+    """
+    프로세스 내 청산 트리거 등록 (app/services/trigger_engine.py).
+    - stop / take_profit: price 도달 시 fraction 청산. take_profit 은 stages 로 단계별 부분 익절
+    - trailing: 등록 후 최고가(롱)/최저가(숏)에서 callback_rate 만큼 되돌리면 청산
+    - time: seconds 뒤 청산
+    포지션이 전량 청산되면 그 포지션의 트리거는 자동 삭제.
+    """
+    sym = payload.symbol.upper().replace("/", "")
+    is_long, use_initial_capital = _position(sym, payload)
+    base = dict(symbol=sym, profile=payload.profile, is_long=is_long, kind=payload.kind,
+                position_side=payload.position_side, use_initial_capital=use_initial_capital)
+
+    if payload.kind == KIND_TRAILING:
+        if payload.callback_rate is None:
+            raise HTTPException(status_code=400, detail="callback_rate is required for trailing")
+        price = await get_mark_price(await get_binance_async_client(), sym)
+        specs = [Trigger(**base, fraction=payload.fraction, callback=payload.callback_rate, extreme=price)]
+    elif payload.kind == KIND_TIME:
+        if payload.seconds is None:
+            raise HTTPException(status_code=400, detail="seconds is required for time")
+        specs = [Trigger(**base, fraction=payload.fraction, deadline=time.time() + payload.seconds)]
+    elif payload.stages:
+        if payload.kind != KIND_TAKE_PROFIT:
+            raise HTTPException(status_code=400, detail="stages are only for take_profit")
+        specs = [Trigger(**base, fraction=f, level=p) for p, f in _stage_fractions(payload.stages, is_long)]
+    else:
+        if payload.price is None:
+            raise HTTPException(status_code=400, detail=f"price is required for {payload.kind}")
+        specs = [Trigger(**base, fraction=payload.fraction, level=payload.price)]
+
+    return {"triggers": [engine.add(t).to_dict() for t in specs]}
+
+
+@router.get("/triggers")
+async def list_triggers(symbol: str | None = Query(None), profile: str | None = Query(None)):
+    sym = symbol.upper().replace("/", "") if symbol else None
+    return {"triggers": [t.to_dict() for t in engine.find(sym, profile)], "stats": engine.stats}
+
+
+@router.delete("/triggers/{trigger_id}")
+async def delete_trigger(trigger_id: int):
+    if not engine.cancel(trigger_id):
+        raise HTTPException(status_code=404, detail=f"Unknown trigger: {trigger_id}")
+    return {"deleted": trigger_id}
@@ -1,13 +1,16 @@
 import logging
-from datetime import datetime
-from zoneinfo import ZoneInfo
+import time
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field
 
 from app.config import DRY_RUN
 from app.services.switching import switch_position
 from app.state import get_state
 from app.services.switching_hedge import switch_position_hedge
+from app.services.fanout import switch_position_fanout
+from app.services.execution import serialize_by_symbol
+from app.services.alert_dedup import dedupe_alert
 
 logger = logging.getLogger("webhook")
 router = APIRouter()
@@ -15,6 +18,7 @@ router = APIRouter()
 class AlertPayload(BaseModel):
     symbol: str   # e.g. "ETH/USDT"
     action: str   # BUY, SELL, BUY_STOP, SELL_STOP
+    alert_id: str | None = None  # 선택: 알림 고유 id (있으면 중복 판별 기준)
     
 
 PROFILE_WEBHOOK1 = "webhook1"
@@ -23,9 +27,64 @@ PROFILE_WEBHOOK3 = "webhook3"
 PROFILE_WEBHOOK4 = "webhook4"
 PROFILE_WEBHOOK5 = "webhook5"
 PROFILE_WEBHOOK6 = "webhook6"
+PROFILE_FANOUT = "fanout"  # 계측/중복 판별용 라벨 (상태는 대상 프로필별로 저장)
+
+
+# /webhook ~ /webhook4 (one-way switch_position) 프로필별 (레버리지, use_initial_capital)
+# 레버리지 None → TRADE_LEVERAGE, use_initial_capital=True → 복리 안 씀
+SWITCH_PROFILES: dict[str, tuple[int | None, bool]] = {
+    PROFILE_WEBHOOK1: (None, False),  # 복리 쓰는 레버리지 설정
+    PROFILE_WEBHOOK2: (5, True),      # 복리 안쓰는 높은 레버리지
+    PROFILE_WEBHOOK3: (2, True),      # 복리 안쓰는 낮은 레버리지
+    PROFILE_WEBHOOK4: (2, False),     # 복리 쓰는 커스텀 레버리지
+}
+
+# /webhook5, /webhook6 (hedge switch_position_hedge) 프로필별 use_initial_capital (레버리지는 알림 payload)
+HEDGE_PROFILES: dict[str, bool] = {
+    PROFILE_WEBHOOK5: False,  # 복리
+    PROFILE_WEBHOOK6: True,   # 복리X (initial_capital 고정)
+}
+
+
+def _route_status(res: dict) -> str:
+    """진입은 됐지만 보호 주문(익절/손절)이 끝내 거부돼 무방비면 partial"""
+    if any("error" in p for p in res.get("protection") or ()):
+        return "partial"
+    return "ok"
+
+
+def _record_switch(sym: str, action: str, profile: str, res: dict) -> None:
+    """switch_position 결과를 profile 상태(진입가/수량/시각)에 반영"""
+    state = get_state(sym, profile)
+    now = time.time()
+
+    if action == "BUY" and "buy" in res:
+        info = res["buy"]
+        state.entry_price  = float(info.get("entry", 0))
+        state.position_qty = float(info.get("filled", 0))
+        state.entry_time   = now
+
+    elif action == "SELL" and "sell" in res:
+        info = res["sell"]
+        state.entry_price  = float(info.get("entry", 0))
+        state.position_qty = -float(info.get("filled", 0))
+        state.entry_time   = now
+
+    elif action in ("BUY_STOP", "SELL_STOP"):
+        # ✅ exit_price / pnl 로그 찍기
+        exit_price = res.get("exit_price", 0.0)
+        pnl        = res.get("pnl", 0.0)
+
+        state.entry_price  = 0.0
+        state.position_qty = 0.0
+        state.entry_time   = now
+
+        logger.info(f"[{action}] {profile}:{sym} EXIT @ {exit_price}, PnL {pnl:.2f}%")
 
 # 복리 쓰는 레버리지 설정
 @router.post("/webhook")
+@dedupe_alert(PROFILE_WEBHOOK1)
+@serialize_by_symbol
 async def webhook(payload: AlertPayload):
     sym    = payload.symbol.upper().replace("/", "")
     action = payload.action.upper()
@@ -36,71 +95,39 @@ async def webhook(payload: AlertPayload):
         return {"status": "dry_run"}
 
     try:
-        res = switch_position(sym, action, profile=profile)
+        res = await switch_position(sym, action, profile=profile)
 
         if "skipped" in res:
             logger.info(f"Skipped {action} {sym}: {res['skipped']}")
             return {"status": "skipped", "reason": res["skipped"]}
 
-        state = get_state(sym, profile)
-        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-
-        if action == "BUY":
-            info = res.get("buy", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  qty,
-                "entry_time":    now
-            })
-
-        elif action == "SELL":
-            info = res.get("sell", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  -qty,
-                "entry_time":    now
-            })
-
-        elif action in ("BUY_STOP", "SELL_STOP"):
-            # ✅ exit_price / pnl 로그 찍기
-            exit_price = res.get("exit_price", 0.0)
-            pnl        = res.get("pnl", 0.0)
-
-            state.update({
-                "entry_price":   0.0,
-                "position_qty":  0.0,
-                "entry_time":    now
-            })
-
-            logger.info(f"[{action}] {profile}:{sym} EXIT @ {exit_price}, PnL {pnl:.2f}%")
+        _record_switch(sym, action, profile, res)
 
     except Exception as e:
         logger.exception(f"Error processing {action} for {sym} ({profile})")
         raise HTTPException(status_code=500, detail=str(e))
 
-    return {"status": "ok", "result": res}
+    return {"status": _route_status(res), "result": res}
 
 
 # ✅ webhook2는 동일 (단, 필요 시 같은 방식으로 STOP 로그 추가 가능) -> 복리 안쓰는 높은 레버리지
 @router.post("/webhook2")
+@dedupe_alert(PROFILE_WEBHOOK2)
+@serialize_by_symbol
 async def webhook2(payload: AlertPayload):
     sym    = payload.symbol.upper().replace("/", "")
     action = payload.action.upper()
     profile = PROFILE_WEBHOOK2
 
-    # 👉 원하는 커스텀 레버리지 설정
-    custom_leverage = 5
+    # 👉 레버리지는 SWITCH_PROFILES 에서 설정
+    custom_leverage = SWITCH_PROFILES[profile][0]
 
     if DRY_RUN:
         logger.info(f"[DRY_RUN] {action} {sym} ({profile})")
         return {"status": "dry_run"}
 
     try:
-        res = switch_position(
+        res = await switch_position(
             sym,
             action,
             profile=profile,
@@ -112,63 +139,32 @@ async def webhook2(payload: AlertPayload):
             logger.info(f"Skipped {action} {sym} ({profile}): {res['skipped']}")
             return {"status": "skipped", "reason": res["skipped"]}
 
-        state = get_state(sym, profile)
-        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-
-        if action == "BUY":
-            info = res.get("buy", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  qty,
-                "entry_time":    now
-            })
-
-        elif action == "SELL":
-            info = res.get("sell", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  -qty,
-                "entry_time":    now
-            })
-
-        elif action in ("BUY_STOP", "SELL_STOP"):
-            exit_price = res.get("exit_price", 0.0)
-            pnl        = res.get("pnl", 0.0)
-
-            state.update({
-                "entry_price":   0.0,
-                "position_qty":  0.0,
-                "entry_time":    now
-            })
-
-            logger.info(f"[{action}] {profile}:{sym} EXIT @ {exit_price}, PnL {pnl:.2f}%")
+        _record_switch(sym, action, profile, res)
 
     except Exception as e:
         logger.exception(f"Error switching in webhook2 for {action} {sym} ({profile})")
         raise HTTPException(status_code=500, detail=str(e))
 
-    return {"status": "ok", "result": res}
+    return {"status": _route_status(res), "result": res}
 
 # ✅ webhook3도 동일 (단, 필요 시 같은 방식으로 STOP 로그 추가 가능) -> 복리 안쓰는 낮은 레버리지
 @router.post("/webhook3")
+@dedupe_alert(PROFILE_WEBHOOK3)
+@serialize_by_symbol
 async def webhook3(payload: AlertPayload):
     sym    = payload.symbol.upper().replace("/", "")
     action = payload.action.upper()
     profile = PROFILE_WEBHOOK3
 
-    # 👉 원하는 커스텀 레버리지 설정
-    custom_leverage = 2
+    # 👉 레버리지는 SWITCH_PROFILES 에서 설정
+    custom_leverage = SWITCH_PROFILES[profile][0]
 
     if DRY_RUN:
         logger.info(f"[DRY_RUN] {action} {sym} ({profile})")
         return {"status": "dry_run"}
 
     try:
-        res = switch_position(
+        res = await switch_position(
             sym,
             action,
             profile=profile,
@@ -180,56 +176,25 @@ async def webhook3(payload: AlertPayload):
             logger.info(f"Skipped {action} {sym} ({profile}): {res['skipped']}")
             return {"status": "skipped", "reason": res["skipped"]}
 
-        state = get_state(sym, profile)
-        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-
-        if action == "BUY":
-            info = res.get("buy", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  qty,
-                "entry_time":    now
-            })
-
-        elif action == "SELL":
-            info = res.get("sell", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  -qty,
-                "entry_time":    now
-            })
-
-        elif action in ("BUY_STOP", "SELL_STOP"):
-            exit_price = res.get("exit_price", 0.0)
-            pnl        = res.get("pnl", 0.0)
-
-            state.update({
-                "entry_price":   0.0,
-                "position_qty":  0.0,
-                "entry_time":    now
-            })
-
-            logger.info(f"[{action}] {profile}:{sym} EXIT @ {exit_price}, PnL {pnl:.2f}%")
+        _record_switch(sym, action, profile, res)
 
     except Exception as e:
         logger.exception(f"Error switching in webhook3 for {action} {sym} ({profile})")
         raise HTTPException(status_code=500, detail=str(e))
 
-    return {"status": "ok", "result": res}
+    return {"status": _route_status(res), "result": res}
 
 # ✅ webhook4 -> 복리 쓰는 커스텀 레버리지 전략
 @router.post("/webhook4")
+@dedupe_alert(PROFILE_WEBHOOK4)
+@serialize_by_symbol
 async def webhook4(payload: AlertPayload):
     sym     = payload.symbol.upper().replace("/", "")
     action  = payload.action.upper()
     profile = PROFILE_WEBHOOK4
 
-    # 👉 여기서 원하는 커스텀 레버리지 설정 (예: 2배)
-    custom_leverage = 2
+    # 👉 레버리지는 SWITCH_PROFILES 에서 설정
+    custom_leverage = SWITCH_PROFILES[profile][0]
 
     if DRY_RUN:
         logger.info(f"[DRY_RUN] {action} {sym} ({profile})")
@@ -237,7 +202,7 @@ async def webhook4(payload: AlertPayload):
 
     try:
         # use_initial_capital=False (기본값) → 복리 운용
-        res = switch_position(
+        res = await switch_position(
             sym,
             action,
             profile=profile,
@@ -249,53 +214,23 @@ async def webhook4(payload: AlertPayload):
             logger.info(f"Skipped {action} {sym} ({profile}): {res['skipped']}")
             return {"status": "skipped", "reason": res["skipped"]}
 
-        state = get_state(sym, profile)
-        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-
-        if action == "BUY":
-            info  = res.get("buy", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  qty,
-                "entry_time":    now,
-            })
-
-        elif action == "SELL":
-            info  = res.get("sell", {})
-            entry = float(info.get("entry", 0))
-            qty   = float(info.get("filled", 0))
-            state.update({
-                "entry_price":   entry,
-                "position_qty":  -qty,
-                "entry_time":    now,
-            })
-
-        elif action in ("BUY_STOP", "SELL_STOP"):
-            exit_price = res.get("exit_price", 0.0)
-            pnl        = res.get("pnl", 0.0)
-
-            state.update({
-                "entry_price":   0.0,
-                "position_qty":  0.0,
-                "entry_time":    now,
-            })
-
-            logger.info(f"[{action}] {profile}:{sym} EXIT @ {exit_price}, PnL {pnl:.2f}%")
+        _record_switch(sym, action, profile, res)
 
     except Exception as e:
         logger.exception(f"Error switching in webhook4 for {action} {sym} ({profile})")
         raise HTTPException(status_code=500, detail=str(e))
 
-    return {"status": "ok", "result": res}
+    return {"status": _route_status(res), "result": res}
 
 class AlertPayloadV5(BaseModel):
     symbol: str
     action: str
     leverage: int
+    alert_id: str | None = None
 
 @router.post("/webhook5")
+@dedupe_alert(PROFILE_WEBHOOK5)
+@serialize_by_symbol
 async def webhook5(payload: AlertPayloadV5):
     sym = payload.symbol.upper().replace("/", "")
     action = payload.action.upper()
@@ -306,21 +241,23 @@ async def webhook5(payload: AlertPayloadV5):
         return {"status": "dry_run"}
 
     try:
-        res = switch_position_hedge(
+        res = await switch_position_hedge(
             symbol=sym,
             action=action,
             leverage=payload.leverage,
             profile=profile,
-            use_initial_capital=False,  # ✅ 복리
+            use_initial_capital=HEDGE_PROFILES[profile],  # ✅ 복리
         )
         if "skipped" in res:
             return {"status": "skipped", "reason": res["skipped"], "result": res}
-        return {"status": "ok", "result": res}
+        return {"status": _route_status(res), "result": res}
     except Exception as e:
         logger.exception(f"Error processing {action} for {sym} ({profile})")
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.post("/webhook6")
+@dedupe_alert(PROFILE_WEBHOOK6)
+@serialize_by_symbol
 async def webhook6(payload: AlertPayloadV5):
     sym = payload.symbol.upper().replace("/", "")
     action = payload.action.upper()
@@ -331,16 +268,59 @@ async def webhook6(payload: AlertPayloadV5):
         return {"status": "dry_run"}
 
     try:
-        res = switch_position_hedge(
+        res = await switch_position_hedge(
             symbol=sym,
             action=action,
             leverage=payload.leverage,
             profile=profile,
-            use_initial_capital=True,  # ✅ 복리X (initial_capital 고정)
+            use_initial_capital=HEDGE_PROFILES[profile],  # ✅ 복리X (initial_capital 고정)
         )
         if "skipped" in res:
             return {"status": "skipped", "reason": res["skipped"], "result": res}
-        return {"status": "ok", "result": res}
+        return {"status": _route_status(res), "result": res}
     except Exception as e:
         logger.exception(f"Error processing {action} for {sym} ({profile})")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+class FanoutPayload(BaseModel):
+    symbol: str
+    action: str
+    # one-way 프로필만 (/webhook5,6 는 hedge 로직이라 제외)
+    profiles: list[Literal["webhook1", "webhook2", "webhook3", "webhook4"]] = Field(min_length=1)
+    alert_id: str | None = None
+
+
+# ✅ 알림 1건 → 여러 프로필 동시 실행 (시세/포지션 조회 1회)
+@router.post("/webhook/fanout")
+@dedupe_alert(PROFILE_FANOUT)
+@serialize_by_symbol
+async def webhook_fanout(payload: FanoutPayload):
+    sym     = payload.symbol.upper().replace("/", "")
+    action  = payload.action.upper()
+    targets = {p: SWITCH_PROFILES[p] for p in dict.fromkeys(payload.profiles)}
+
+    if DRY_RUN:
+        logger.info(f"[DRY_RUN] {action} {sym} → {list(targets)} ({PROFILE_FANOUT})")
+        return {"status": "dry_run"}
+
+    try:
+        res = await switch_position_fanout(sym, action, targets, profile=PROFILE_FANOUT, holders=SWITCH_PROFILES)
+    except Exception as e:
+        logger.exception(f"Error processing fanout {action} for {sym} → {list(targets)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    failed = False
+    for profile, r in res["profiles"].items():
+        if "error" in r:
+            failed = True
+            logger.warning(f"[Fanout] {action} {profile}:{sym} failed: {r['error']}")
+        elif "skipped" in r:
+            logger.info(f"Skipped {action} {sym} ({profile}): {r['skipped']}")
+        else:
+            _record_switch(sym, action, profile, r)
+
+        if _route_status(r) == "partial":
+            failed = True
+            logger.warning(f"[Fanout] {action} {profile}:{sym} entered without full protection")
+
+    return {"status": "partial" if failed else "ok", **res}
@@ -0,0 +1,103 @@
+# app/services/account_config.py
+
+import logging
+
+from app.metrics import timed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 거래소 쪽 설정 캐시
+# - symbol -> 현재 설정된 leverage
+# - 계정 position mode (True=Hedge, False=One-way, None=모름)
+_symbol_leverage: dict[str, int] = {}
+_dual_side_position: bool | None = None
+
+
+def get_cached_leverage(symbol: str) -> int | None:
+    return _symbol_leverage.get(symbol)
+
+
+def is_hedge_mode() -> bool | None:
+    return _dual_side_position
+
+
+def invalidate(symbol: str | None = None) -> None:
+    """캐시 무효화 (symbol=None 이면 전체)"""
+    global _dual_side_position
+
+    if symbol is None:
+        _symbol_leverage.clear()
+        _dual_side_position = None
+    else:
+        _symbol_leverage.pop(symbol, None)
+
+
+async def load_account_config(client) -> None:
+    """
+    기동 시 1회: 전체 심볼 leverage + position mode를 읽어 캐시를 채웁니다.
+    """
+    global _dual_side_position
+
+    mode = await client.futures_get_position_mode()
+    _dual_side_position = bool(mode.get("dualSidePosition"))
+
+    configs = await client.futures_symbol_config()
+    for c in configs:
+        _symbol_leverage[c["symbol"]] = int(c["leverage"])
+
+    logger.info(
+        f"[AccountConfig] Loaded leverage for {len(_symbol_leverage)} symbols, "
+        f"hedge_mode={_dual_side_position}"
+    )
+
+
+@timed("leverage")
+async def ensure_leverage(client, symbol: str, leverage: int) -> bool:
+    """
+    캐시된 leverage와 다를 때만 futures_change_leverage 호출.
+    실제로 변경 요청을 보냈으면 True.
+    예외는 호출한 쪽 정책(스킵/경고)에 맡기기 위해 그대로 올립니다.
+    """
+    if _symbol_leverage.get(symbol) == leverage:
+        return False
+
+    res = await client.futures_change_leverage(symbol=symbol, leverage=leverage)
+    _symbol_leverage[symbol] = int(res.get("leverage", leverage))
+    return True
+
+
+async def ensure_hedge_mode(client) -> bool:
+    """
+    캐시상 Hedge Mode가 아닐 때만 거래소에 조회/변경 요청.
+    실제로 변경 요청을 보냈으면 True.
+    """
+    global _dual_side_position
+
+    if _dual_side_position is True:
+        return False
+
+    mode = await client.futures_get_position_mode()
+    if mode.get("dualSidePosition"):
+        _dual_side_position = True
+        return False
+
+    await client.futures_change_position_mode(dualSidePosition=True)
+    _dual_side_position = True
+    return True
+
+
+def apply_account_config_update(msg: dict) -> None:
+    """
+    user-data stream ACCOUNT_CONFIG_UPDATE 이벤트 반영
+      {"e": "ACCOUNT_CONFIG_UPDATE", "ac": {"s": "BTCUSDT", "l": 25}}
+    """
+    ac = msg.get("ac")
+    if not ac or not ac.get("s"):
+        return
+
+    if "l" in ac:
+        _symbol_leverage[ac["s"]] = int(ac["l"])
+        logger.info(f"[AccountConfig] {ac['s']} leverage -> {ac['l']}")
+    else:
+        invalidate(ac["s"])
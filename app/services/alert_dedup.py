@@ -0,0 +1,150 @@
+# app/services/alert_dedup.py
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from collections import OrderedDict
+
+from app.config import ALERT_DEDUP_WINDOW, ALERT_DEDUP_ID_TTL, ALERT_DEDUP_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+# 처리 중인 알림의 (key, 결과 Future).
+# WEBHOOK_FAST_ACK 백그라운드 작업도 제출 시점 컨텍스트를 물려받아 실패 시 자기 항목을 뺄 수 있음
+_current: contextvars.ContextVar[tuple[tuple, asyncio.Future] | None] = contextvars.ContextVar(
+    "alert_dedup_current", default=None
+)
+
+
+def _consume_exception(fut: asyncio.Future) -> None:
+    # 중복 요청이 없어 아무도 await 하지 않은 실패 결과의 경고 방지
+    if not fut.cancelled():
+        fut.exception()
+
+
+class AlertDedupCache:
+    """
+    알림 멱등성 캐시.
+    key -> (만료 시각, 첫 요청 결과 Future). 처리 중에 들어온 중복도 같은 Future 를 기다립니다.
+    실패한 알림은 캐시에서 빼서 재전송이 다시 실행되도록 합니다.
+    TTL(window / id_ttl)별로 따로 보관 → 저장소마다 넣은 순서 = 만료 순서라 앞에서부터 만료분만 지우면 됨
+    (한 저장소에 섞으면 앞쪽의 긴 TTL 항목이 뒤의 짧은 TTL 만료 항목 정리를 막음).
+    """
+
+    def __init__(self, window: float, id_ttl: float, max_entries: int):
+        self.window = window
+        self.id_ttl = id_ttl
+        self.max_entries = max_entries
+        # ttl -> key -> (만료 시각, Future)
+        self._stores: dict[float, OrderedDict[tuple, tuple[float, asyncio.Future]]] = {}
+        self.hits: dict[str, int] = {}
+
+    def _key(self, profile: str, payload) -> tuple[tuple, float]:
+        alert_id = getattr(payload, "alert_id", None)
+        if alert_id:
+            return ("id", profile, str(alert_id)), self.id_ttl
+        symbol = payload.symbol.upper().replace("/", "")
+        key = ("alert", profile, symbol, payload.action.upper())
+        # fan-out 은 대상 프로필 묶음이 다르면 다른 알림
+        targets = getattr(payload, "profiles", None)
+        if targets:
+            key += (tuple(sorted(set(targets))),)
+        return key, self.window
+
+    def __len__(self) -> int:
+        return sum(len(store) for store in self._stores.values())
+
+    def _purge(self, now: float) -> None:
+        for store in self._stores.values():
+            while store:
+                expires_at, _ = next(iter(store.values()))
+                if expires_at > now:
+                    break
+                store.popitem(last=False)
+
+        # 그래도 max_entries 초과면 가장 먼저 만료될 항목부터
+        excess = len(self) - self.max_entries
+        while excess > 0:
+            store = min((s for s in self._stores.values() if s), key=lambda s: next(iter(s.values()))[0])
+            store.popitem(last=False)
+            excess -= 1
+
+    async def run(self, profile: str, payload, fn, /, *args, **kwargs):
+        key, ttl = self._key(profile, payload)
+        if ttl <= 0:
+            return await fn(*args, **kwargs)
+
+        now = time.monotonic()
+        self._purge(now)
+
+        store = self._stores.setdefault(ttl, OrderedDict())
+        hit = store.get(key)
+        if hit is not None and hit[0] > now:
+            self.hits[profile] = self.hits.get(profile, 0) + 1
+            logger.info(f"[Dedup] Duplicate alert {key[1:]} → returning first result")
+            return await asyncio.shield(hit[1])
+
+        fut = asyncio.get_running_loop().create_future()
+        fut.add_done_callback(_consume_exception)
+        store[key] = (now + ttl, fut)
+        store.move_to_end(key)
+
+        token = _current.set((key, fut))
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            self._evict(key, fut)
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+            raise
+        finally:
+            _current.reset(token)
+
+        fut.set_result(result)
+        return result
+
+    def _evict(self, key: tuple, fut: asyncio.Future) -> bool:
+        # 만료 후 같은 key 로 새로 들어온 항목은 건드리지 않음
+        for store in self._stores.values():
+            if store.get(key, (0.0, None))[1] is fut:
+                del store[key]
+                return True
+        return False
+
+    def evict_current(self) -> None:
+        """
+        현재 컨텍스트 알림의 캐시 항목을 뺍니다.
+        WEBHOOK_FAST_ACK 에서는 202 응답이 성공으로 캐시되므로, 백그라운드 작업이 실패하면
+        jobs.run_job 이 호출해 재전송이 다시 실행되도록 합니다.
+        """
+        current = _current.get()
+        if current is not None and self._evict(*current):
+            logger.info(f"[Dedup] Background job failed → evicted {current[0][1:]}")
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self), "duplicates": dict(self.hits)}
+
+
+dedup_cache = AlertDedupCache(ALERT_DEDUP_WINDOW, ALERT_DEDUP_ID_TTL, ALERT_DEDUP_MAX_ENTRIES)
+
+
+def dedupe_alert(profile: str):
+    """
+    웹훅 라우트용 데코레이터.
+    alert_id 또는 (profile, symbol, action) 기준으로 중복 알림이면 거래소를 건드리지 않고 첫 결과를 반환합니다.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            payload = kwargs["payload"] if "payload" in kwargs else args[0]
+            return await dedup_cache.run(profile, payload, handler, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
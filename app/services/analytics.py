@@ -0,0 +1,271 @@
+# app/services/analytics.py
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services.trade_ledger import TradeLedger, ledger, KIND_ENTRY, KIND_EXIT
+
+# 새 행이 이보다 많으면 집계를 스레드에서 (기동 직후 전체 이력 적재 등)
+_INLINE_ROWS = 5000
+_YEAR = 365.0 * 24 * 3600
+
+
+def _factorize(values: np.ndarray) -> tuple[list[bytes], np.ndarray]:
+    """
+    고정 길이 bytes 컬럼 → (고유값 목록, 행별 코드).
+    문자열 정렬(np.unique(S16)) 대신 8바이트 단위 정수 열로 보고 열마다 정수 unique 후 혼합 진법으로 합침.
+    (열마다 고유값 ≤ 전체 고유값 k 라 코드는 k^열수 미만 → 이름 20바이트 기준 k < 2백만이면 int64 안)
+    """
+    words = values.astype(f"S{-(-values.dtype.itemsize // 8) * 8}").view(np.uint64).reshape(len(values), -1)
+    codes = np.zeros(len(values), dtype=np.int64)
+    for i in range(words.shape[1]):
+        uniq, inv = np.unique(words[:, i], return_inverse=True)
+        codes = codes * len(uniq) + inv
+    _, first, inv = np.unique(codes, return_index=True, return_inverse=True)
+    return values[first].tolist(), inv
+
+
+@dataclass(slots=True)
+class _Acc:
+    """그룹(전체/프로필/심볼)별 누적 집계. 새 청산 행이 들어올 때마다 더하기만 함"""
+    trades: int = 0
+    wins: int = 0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0
+    net_pnl: float = 0.0
+    fees: float = 0.0
+    sum_r: float = 0.0
+    sum_r2: float = 0.0
+    sum_down2: float = 0.0
+    hold_sum: float = 0.0
+    hold_n: int = 0
+    equity: float = 0.0
+    peak: float = 0.0
+    max_drawdown: float = 0.0
+    first_ts: float = 0.0
+    last_ts: float = 0.0
+
+    def to_dict(self) -> dict:
+        n = self.trades
+        if n == 0:
+            return {"trades": 0}
+
+        mean = self.sum_r / n
+        var = max(self.sum_r2 / n - mean * mean, 0.0) * (n / (n - 1) if n > 1 else 0.0)
+        std = math.sqrt(var)
+        down = math.sqrt(self.sum_down2 / n)
+        span = self.last_ts - self.first_ts
+        # 관측된 거래 빈도로 연환산 (기간이 0이면 거래당 값만)
+        annual = math.sqrt(n * _YEAR / span) if span > 0 else None
+
+        def ratio(den: float) -> float | None:
+            return round(mean / den, 4) if den > 0 else None
+
+        def annualized(den: float) -> float | None:
+            per_trade = ratio(den)
+            return round(per_trade * annual, 4) if per_trade is not None and annual else None
+
+        return {
+            "trades": n,
+            "win_rate": round(self.wins / n, 4),
+            "net_pnl": round(self.net_pnl, 4),
+            "fees": round(self.fees, 4),
+            "gross_profit": round(self.gross_profit, 4),
+            "gross_loss": round(self.gross_loss, 4),
+            "profit_factor": round(self.gross_profit / self.gross_loss, 4) if self.gross_loss > 0 else None,
+            "avg_return_pct": round(mean * 100, 4),
+            "sharpe_per_trade": ratio(std),
+            "sortino_per_trade": ratio(down),
+            "sharpe": annualized(std),
+            "sortino": annualized(down),
+            "max_drawdown": round(self.max_drawdown, 4),
+            "avg_holding_seconds": round(self.hold_sum / self.hold_n, 1) if self.hold_n else None,
+            "first_trade": self.first_ts,
+            "last_trade": self.last_ts,
+        }
+
+
+class TradeAnalytics:
+    """
+    거래 원장(청산 행) 기반 성과 집계.
+    원장에서 이미 본 행 수를 기억해 새로 확정된 행만 NumPy 로 묶어 누적합니다.
+      - 수익/비율: np.bincount(그룹 코드, weights=...)
+      - 낙폭: 그룹별로 정렬한 연속 구간에서 cumsum / maximum.accumulate
+      - 보유 시간: (profile, symbol, side) 별 진입~청산 구간의 첫 진입 시각, 배치 경계는 _open 으로 이어붙임
+    """
+
+    def __init__(self, source: TradeLedger):
+        self.ledger = source
+        self._seen = 0
+        self._overall = _Acc()
+        self._by_profile: dict[str, _Acc] = {}
+        self._by_symbol: dict[str, _Acc] = {}
+        # (profile, symbol, side) -> 아직 청산 안 된 포지션의 첫 진입 시각
+        self._open: dict[tuple[bytes, bytes, int], float] = {}
+        self._curve_ts = np.empty(0)
+        self._curve_eq = np.empty(0)
+        self._lock: asyncio.Lock | None = None
+
+    def _holding_times(self, rows: dict[str, np.ndarray]) -> np.ndarray:
+        ts, kind, side = rows["ts"], rows["kind"], rows["side"]
+        profile, symbol = rows["profile"], rows["symbol"]
+        n = len(ts)
+
+        _, pinv = _factorize(profile)
+        _, sinv = _factorize(symbol)
+        gkey = (pinv.astype(np.int64) * (int(sinv.max()) + 1) + sinv) * 2 + (side > 0)
+
+        order = np.argsort(gkey, kind="stable")
+        g, k, t = gkey[order], kind[order], ts[order]
+
+        new_group = np.ones(n, dtype=bool)
+        new_group[1:] = g[1:] != g[:-1]
+        # 새 구간: 그룹 시작 또는 직전 행이 청산
+        starts = new_group.copy()
+        starts[1:] |= k[:-1] == KIND_EXIT
+        episode = np.cumsum(starts) - 1
+
+        first = np.full(int(episode[-1]) + 1, np.inf)
+        is_entry = k == KIND_ENTRY
+        np.minimum.at(first, episode[is_entry], t[is_entry])
+
+        group_starts = np.flatnonzero(new_group)
+        group_ends = np.append(group_starts[1:], n) - 1
+        for i in group_starts:
+            j = order[i]
+            carried = self._open.get((profile[j], symbol[j], int(side[j])))
+            if carried is not None:
+                first[episode[i]] = min(first[episode[i]], carried)
+        for i in group_ends:
+            j = order[i]
+            key = (profile[j], symbol[j], int(side[j]))
+            if k[i] == KIND_EXIT:
+                self._open.pop(key, None)
+            elif np.isfinite(first[episode[i]]):
+                self._open[key] = float(first[episode[i]])
+
+        hold_sorted = np.where(k == KIND_EXIT, t - first[episode], np.nan)
+        hold_sorted[~np.isfinite(hold_sorted)] = np.nan
+        hold = np.empty(n)
+        hold[order] = hold_sorted
+        return hold
+
+    @staticmethod
+    def _accumulate(accs: dict[str, _Acc], names: list[str], inv: np.ndarray, ts: np.ndarray,
+                    pnl: np.ndarray, r: np.ndarray, fee: np.ndarray, hold: np.ndarray) -> None:
+        k = len(names)
+        count = np.bincount(inv, minlength=k)
+        wins = np.bincount(inv, weights=pnl > 0, minlength=k)
+        gross_profit = np.bincount(inv, weights=np.where(pnl > 0, pnl, 0.0), minlength=k)
+        gross_loss = np.bincount(inv, weights=np.where(pnl < 0, -pnl, 0.0), minlength=k)
+        net = np.bincount(inv, weights=pnl, minlength=k)
+        fees = np.bincount(inv, weights=fee, minlength=k)
+        sum_r = np.bincount(inv, weights=r, minlength=k)
+        sum_r2 = np.bincount(inv, weights=r * r, minlength=k)
+        sum_down2 = np.bincount(inv, weights=np.where(r < 0, r * r, 0.0), minlength=k)
+        held = ~np.isnan(hold)
+        hold_sum = np.bincount(inv[held], weights=hold[held], minlength=k)
+        hold_n = np.bincount(inv[held], minlength=k)
+
+        order = np.argsort(inv, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(count)))
+        pnl_sorted, ts_sorted = pnl[order], ts[order]
+
+        for gi, name in enumerate(names):
+            lo, hi = bounds[gi], bounds[gi + 1]
+            if lo == hi:
+                continue
+            acc = accs.get(name)
+            if acc is None:
+                acc = accs[name] = _Acc()
+            if acc.trades == 0:
+                acc.first_ts = float(ts_sorted[lo])
+
+            eq = acc.equity + np.cumsum(pnl_sorted[lo:hi])
+            peak = np.maximum(np.maximum.accumulate(eq), acc.peak)
+            acc.max_drawdown = max(acc.max_drawdown, float((peak - eq).max()))
+            acc.equity, acc.peak = float(eq[-1]), float(peak[-1])
+
+            acc.trades += int(count[gi])
+            acc.wins += int(wins[gi])
+            acc.gross_profit += float(gross_profit[gi])
+            acc.gross_loss += float(gross_loss[gi])
+            acc.net_pnl += float(net[gi])
+            acc.fees += float(fees[gi])
+            acc.sum_r += float(sum_r[gi])
+            acc.sum_r2 += float(sum_r2[gi])
+            acc.sum_down2 += float(sum_down2[gi])
+            acc.hold_sum += float(hold_sum[gi])
+            acc.hold_n += int(hold_n[gi])
+            acc.last_ts = float(ts_sorted[hi - 1])
+
+    def refresh(self) -> int:
+        """원장에 새로 확정된 행을 집계에 반영. 반영한 행 수 반환"""
+        if len(self.ledger) <= self._seen:
+            return 0
+
+        rows = self.ledger.rows_since(self._seen)
+        added = len(rows["ts"])
+        if added == 0:
+            return 0
+        self._seen += added
+
+        hold = self._holding_times(rows)
+        exits = rows["kind"] == KIND_EXIT
+        if not exits.any():
+            return added
+
+        ts = rows["ts"][exits]
+        pnl = rows["net_pnl"][exits]
+        r = rows["net_pnl_pct"][exits] / 100.0
+        fee = rows["fee"][exits]
+        hold = hold[exits]
+
+        overall = {"": self._overall}
+        self._accumulate(overall, [""], np.zeros(len(ts), dtype=np.intp), ts, pnl, r, fee, hold)
+        self._overall = overall[""]
+
+        for column, accs in (("profile", self._by_profile), ("symbol", self._by_symbol)):
+            names, inv = _factorize(rows[column][exits])
+            self._accumulate(accs, [n.decode() for n in names], inv, ts, pnl, r, fee, hold)
+
+        base = self._curve_eq[-1] if len(self._curve_eq) else 0.0
+        self._curve_ts = np.concatenate((self._curve_ts, ts))
+        self._curve_eq = np.concatenate((self._curve_eq, base + np.cumsum(pnl)))
+        return added
+
+    def report(self, points: int = 200) -> dict:
+        n = len(self._curve_eq)
+        if n:
+            idx = np.unique(np.linspace(0, n - 1, min(points, n)).astype(np.intp))
+            curve = np.column_stack((self._curve_ts[idx], np.round(self._curve_eq[idx], 4))).tolist()
+        else:
+            curve = []
+        return {
+            "ledger_rows": self._seen,
+            "overall": {**self._overall.to_dict(), "equity_curve": curve},
+            "by_profile": {name: acc.to_dict() for name, acc in sorted(self._by_profile.items())},
+            "by_symbol": {name: acc.to_dict() for name, acc in sorted(self._by_symbol.items())},
+        }
+
+    async def snapshot(self, points: int = 200) -> dict:
+        """새 행 반영 후 집계 결과. 반영할 행이 많으면 이벤트 루프를 막지 않도록 스레드에서"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        start = time.perf_counter()
+        async with self._lock:
+            if len(self.ledger) - self._seen > _INLINE_ROWS:
+                await asyncio.to_thread(self.refresh)
+            else:
+                self.refresh()
+            result = self.report(points)
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+
+analytics = TradeAnalytics(ledger)
@@ -0,0 +1,155 @@
+# app/services/dashboard_feed.py
+
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator
+
+from app.config import DASHBOARD_PUSH_INTERVAL, DASHBOARD_KEEPALIVE
+from app.state import monitor_states, drain_changed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 구독자별 대기 메시지 상한. 넘으면 밀린 diff 를 버리고 전체 스냅샷으로 다시 맞춤
+_QUEUE_MAX = 32
+_RESYNC = object()
+_CLOSE = object()
+_MISSING = object()
+_KEEPALIVE_EVENT = b": keepalive\n\n"
+
+
+def _event(name: str, data) -> bytes:
+    """SSE 이벤트 1개 (구독자 수와 무관하게 한 번만 인코딩)"""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"event: {name}\ndata: {body}\n\n".encode()
+
+
+class DashboardFeed:
+    """
+    monitor_states 변경분을 SSE 구독자에게 push.
+    - 주문 경로: ProfileState 가 바뀐 key 를 _changed 에 넣는 것뿐
+    - push 태스크: 주기마다 바뀐 key 만 직전 전송본과 필드 단위로 비교 → diff 한 개를 모든 구독자 큐에
+    - 구독자가 없으면 아무것도 계산하지 않음
+    """
+
+    def __init__(self):
+        # key -> 마지막으로 보낸 to_dict() (새 구독자 스냅샷 겸 diff 기준)
+        self._last: dict[str, dict] = {}
+        self._primed = False
+        self._subscribers: set[asyncio.Queue] = set()
+        self.stats: dict[str, float] = {
+            "subscribers": 0,
+            "pushes": 0,
+            "states_pushed": 0,
+            "resyncs": 0,
+            "last_push": 0.0,
+        }
+
+    def _collect(self) -> dict[str, dict]:
+        keys = drain_changed()
+        if not self._primed:
+            # 첫 구독: 기동 시 저널에서 복원된 상태(변경 표시 없음)까지 포함
+            keys = set(keys) | monitor_states.keys()
+            self._primed = True
+
+        diff: dict[str, dict] = {}
+        for key in keys:
+            state = monitor_states.get(key)
+            if state is None:
+                continue
+            current = state.to_dict()
+            previous = self._last.get(key)
+            if previous is None:
+                changed = current
+            else:
+                changed = {f: v for f, v in current.items() if previous.get(f, _MISSING) != v}
+                changed.update((f, None) for f in previous.keys() - current.keys())
+            if changed:
+                diff[key] = changed
+                self._last[key] = current
+        return diff
+
+    def _offer(self, queue: asyncio.Queue, message) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_RESYNC)
+            self.stats["resyncs"] += 1
+
+    def _broadcast(self, diff: dict[str, dict]) -> None:
+        message = _event("diff", diff)
+        for queue in list(self._subscribers):
+            self._offer(queue, message)
+        self.stats["pushes"] += 1
+        self.stats["states_pushed"] += len(diff)
+        self.stats["last_push"] = time.time()
+
+    def publish(self) -> int:
+        """바뀐 상태를 diff 로 push. 보낸 상태 수 반환"""
+        if not self._subscribers:
+            return 0
+        diff = self._collect()
+        if diff:
+            self._broadcast(diff)
+        return len(diff)
+
+    def snapshot_event(self) -> bytes:
+        return _event("snapshot", self._last)
+
+    def subscribe(self) -> asyncio.Queue:
+        # 밀린 변경분을 기존 구독자에게 먼저 보내 _last 를 현재로 맞춘 뒤 스냅샷 → 이후 diff 와 어긋나지 않음
+        diff = self._collect()
+        if diff and self._subscribers:
+            self._broadcast(diff)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_MAX)
+        queue.put_nowait(self.snapshot_event())
+        self._subscribers.add(queue)
+        self.stats["subscribers"] = len(self._subscribers)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        self.stats["subscribers"] = len(self._subscribers)
+
+    def close_all(self) -> None:
+        """종료 시 열린 스트림을 끝내도록 (응답이 끝나야 서버가 내려감)"""
+        for queue in list(self._subscribers):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_CLOSE)
+
+    async def events(self) -> AsyncIterator[bytes]:
+        """SSE 응답 본문: snapshot 1회 후 diff, 변경이 없으면 keepalive 주석"""
+        queue = self.subscribe()
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), DASHBOARD_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    message = _KEEPALIVE_EVENT
+                if message is _CLOSE:
+                    return
+                if message is _RESYNC:
+                    message = self.snapshot_event()
+                yield message
+        finally:
+            self.unsubscribe(queue)
+
+
+feed = DashboardFeed()
+
+
+async def run_dashboard_feed() -> None:
+    """변경분 주기적 push (백그라운드 작업, app/services/runtime.py 가 실행)"""
+    logger.info(f"[DashboardFeed] Pushing every {DASHBOARD_PUSH_INTERVAL}s")
+    while True:
+        await asyncio.sleep(DASHBOARD_PUSH_INTERVAL)
+        try:
+            feed.publish()
+        except Exception:
+            logger.exception("[DashboardFeed] Push failed")
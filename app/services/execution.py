@@ -0,0 +1,176 @@
+# app/services/execution.py
+
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from collections import deque
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.config import EXECUTION_MAX_CONCURRENCY, EXECUTION_SHUTDOWN_TIMEOUT, WEBHOOK_FAST_ACK
+from app.metrics import symbol_label, execution_queue_wait_seconds
+from app.services import jobs
+from app.services.symbol_rules import check_symbol
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 이 앱은 EXCHANGE_API_KEY 계정 하나로만 주문하므로 계정 키는 고정
+ACCOUNT = "main"
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future", "enqueued_at", "context", "label")
+
+    def __init__(self, fn, args, kwargs, future: asyncio.Future):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+        # 제출한 쪽의 ContextVar(우선순위, 계측 라벨 등)를 그대로 들고 실행
+        self.context = contextvars.copy_context()
+        self.label = ""
+
+
+class ExecutionScheduler:
+    """
+    (계정, 심볼) 단위 직렬 큐.
+    - 같은 키의 작업은 제출 순서대로 하나씩 실행 (포지션 조회 → 주문 → capital 갱신이 겹치지 않음)
+    - 다른 키끼리는 max_concurrency 까지 동시에 실행
+    큐가 비면 키별 워커 태스크도 정리됩니다.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._queues: dict[tuple[str, str], deque[_Job]] = {}
+        self._workers: dict[tuple[str, str], asyncio.Task] = {}
+        self._running = 0
+        # 종료 중이면 새 작업을 받지 않고, 아직 시작 안 한 작업도 실행하지 않음
+        self._closing = False
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, key: tuple[str, str], fn, /, *args, **kwargs) -> asyncio.Future:
+        """fn(*args, **kwargs) 코루틴을 key 큐에 넣고 결과 Future 를 바로 돌려줍니다 (기다리지 않음)."""
+        if self._closing:
+            raise HTTPException(status_code=503, detail="Shutting down")
+        loop = asyncio.get_running_loop()
+        job = _Job(fn, args, kwargs, loop.create_future())
+        job.label = symbol_label(key[1])
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+        queue.append(job)
+
+        if key not in self._workers:
+            self._workers[key] = loop.create_task(self._drain(key))
+
+        return job.future
+
+    async def run(self, key: tuple[str, str], fn, /, *args, **kwargs):
+        """submit 후 결과(또는 예외)를 기다립니다."""
+        # 호출자가 먼저 끊겨도(요청 취소) future 만 취소되고 작업은 워커가 끝까지 실행
+        return await self.submit(key, fn, *args, **kwargs)
+
+    async def _drain(self, key: tuple[str, str]) -> None:
+        queue = self._queues[key]
+        loop = asyncio.get_running_loop()
+        try:
+            while queue:
+                job = queue[0]
+                async with self._slots:
+                    if self._closing:
+                        break
+                    execution_queue_wait_seconds.observe((job.label,), time.perf_counter() - job.enqueued_at)
+                    self._running += 1
+                    try:
+                        task = loop.create_task(job.fn(*job.args, **job.kwargs), context=job.context)
+                        result = await task
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        self.failed += 1
+                        if not job.future.done():
+                            job.future.set_exception(e)
+                    else:
+                        self.completed += 1
+                        if not job.future.done():
+                            job.future.set_result(result)
+                    finally:
+                        self._running -= 1
+                queue.popleft()
+        finally:
+            # 종료(취소) 시 남은 작업은 취소로 알림
+            for job in queue:
+                if not job.future.done():
+                    job.future.cancel()
+            self._queues.pop(key, None)
+            self._workers.pop(key, None)
+
+    def depth(self, symbol: str, account: str = ACCOUNT) -> int:
+        """실행 중인 작업을 포함한 큐 길이"""
+        queue = self._queues.get((account, symbol))
+        return len(queue) if queue else 0
+
+    def snapshot(self) -> dict:
+        depths = {symbol: len(q) for (_, symbol), q in self._queues.items()}
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "queued": sum(depths.values()) - self._running,
+            "active_symbols": len(depths),
+            "depth": depths,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    async def shutdown(self, timeout: float = EXECUTION_SHUTDOWN_TIMEOUT) -> None:
+        """
+        새 작업은 거절하고, 실행 중인 작업은 timeout 까지 끝나기를 기다립니다
+        (주문을 이미 보낸 알림이 정산 전에 끊기지 않도록). 아직 시작 안 한 작업은 취소.
+        timeout 이 지나도 남은 워커만 취소합니다.
+        """
+        self._closing = True
+        workers = list(self._workers.values())
+        if not workers:
+            return
+        running = self._running
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        if pending:
+            logger.warning(f"[Execution] {len(pending)} queue(s) still running after {timeout}s → cancelling")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        logger.info(f"[Execution] Shutdown: waited for {running} running alert(s)")
+
+
+scheduler = ExecutionScheduler(EXECUTION_MAX_CONCURRENCY)
+
+
+def serialize_by_symbol(handler):
+    """
+    웹훅 라우트용 데코레이터.
+    payload.symbol 기준 큐에 라우트 본문 전체(주문 + state 갱신)를 넣어 실행합니다.
+    WEBHOOK_FAST_ACK 이면 큐에 넣자마자 202 + job_id 로 응답하고 결과는 /orders/{job_id} 에 남깁니다.
+    모르는/거래 중이 아닌 심볼은 큐에 넣기 전에 400 으로 거절합니다 (캐시가 신선할 때).
+    """
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        payload = kwargs["payload"] if "payload" in kwargs else args[0]
+        symbol = payload.symbol.upper().replace("/", "")
+        check_symbol(symbol)
+        if not WEBHOOK_FAST_ACK:
+            return await scheduler.run((ACCOUNT, symbol), handler, *args, **kwargs)
+
+        job = jobs.create_job(handler.__name__, symbol, payload.action.upper())
+        scheduler.submit((ACCOUNT, symbol), jobs.run_job, job, handler, *args, **kwargs)
+        logger.info(f"[Execution] {handler.__name__} {job.action} {symbol} accepted → job {job.job_id}")
+        return JSONResponse(status_code=202, content={"status": "accepted", "job_id": job.job_id})
+
+    return wrapper
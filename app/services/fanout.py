@@ -0,0 +1,259 @@
+# app/services/fanout.py
+
+import asyncio
+import logging
+import math
+import time
+
+from fastapi import HTTPException
+from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET
+from app.clients.binance_async_client import get_binance_async_client
+from app.config import DRY_RUN, TRADE_LEVERAGE, BUY_PCT, PROTECTIVE_ORDERS
+from app.state import get_state
+from app.services.symbol_rules import get_symbol_rules
+from app.services.mark_price import get_mark_price
+from app.services.account_config import ensure_leverage
+from app.services.position_book import expect_update, get_positions, release_update
+from app.services.order_pipeline import create_order, fill_price
+from app.services.trade_ledger import record_entry
+from app.services.protective_orders import place_entry_with_protection
+from app.services.switching import (
+    _wait_for,
+    _cancel_open_reduceonly_orders,
+    _get_exit_price,
+    _update_capital_after_exit,
+)
+from app.metrics import timed, track_alert
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+async def _close_net(client, symbol: str, current_amt: float, holders: dict) -> dict[str, dict]:
+    """
+    계정 순포지션(모든 프로필 합)을 reduceOnly 주문 1건으로 청산하고,
+    해당 방향 포지션을 들고 있던 프로필마다 capital/PnL 을 따로 정산합니다.
+    holders 는 알림 대상이 아니어도 순포지션을 나눠 들 수 있는 프로필 전체
+    (대상만 정산하면 나머지 프로필 state 에 거래소에 없는 포지션이 남음).
+    """
+    long_exit = current_amt > 0
+    with expect_update(symbol):
+        order = await create_order(
+            client,
+            symbol=symbol,
+            side=SIDE_SELL if long_exit else SIDE_BUY,
+            type=ORDER_TYPE_MARKET,
+            quantity=abs(current_amt),
+            reduceOnly=True
+        )
+    await _wait_for(symbol, 0.0, order)
+    await _cancel_open_reduceonly_orders(symbol)
+
+    exit_price = await _get_exit_price(client, symbol, order)
+    closed: dict[str, dict] = {}
+    for profile, (_, use_initial_capital) in holders.items():
+        qty = get_state(symbol, profile).position_qty
+        if (long_exit and qty <= 0) or (not long_exit and qty >= 0):
+            continue
+        pnl = _update_capital_after_exit(
+            symbol,
+            long_exit=long_exit,
+            exit_price=exit_price,
+            profile=profile,
+            use_initial_capital=use_initial_capital
+        )
+        closed[profile] = {"exit_price": exit_price, "pnl": pnl}
+    return closed
+
+
+async def _enter(client, symbol: str, side: str, profile: str, leverage: int,
+                 use_initial_capital: bool, mark_price: float, rules) -> dict:
+    """execute_buy / execute_sell 과 같은 사이징·상태 갱신. 시세/규칙/레버리지는 호출부에서 1회 준비"""
+    state = get_state(symbol, profile)
+    base_capital = state.initial_capital if use_initial_capital else state.capital
+
+    raw_qty = base_capital * BUY_PCT * leverage / mark_price
+    qty = math.floor(raw_qty / rules.step_size) * rules.step_size
+    if qty < rules.min_qty:
+        raise HTTPException(status_code=400, detail=f"Qty {qty} < minQty {rules.min_qty}")
+
+    is_long = side == SIDE_BUY
+    protection = None
+    if PROTECTIVE_ORDERS:
+        # /webhook 진입과 같이 익절/손절 주문까지 한 번에
+        order, protection = await place_entry_with_protection(
+            client, symbol, is_long, qty, rules, mark_price, profile, use_initial_capital
+        )
+    else:
+        order = await create_order(
+            client,
+            symbol=symbol,
+            side=side,
+            type=ORDER_TYPE_MARKET,
+            quantity=f"{qty:.{rules.qty_precision}f}"
+        )
+
+    entry = await fill_price(client, symbol, order, mark_price)
+
+    logger.info(
+        f"[Fanout] {'BUY' if is_long else 'SELL'} {profile}:{symbol} {qty}@{entry} "
+        f"(lev={leverage}, base={'initial_capital' if use_initial_capital else 'capital'})"
+    )
+
+    state.entry_price   = entry
+    state.position_qty  = qty if is_long else -qty
+    state.current_price = entry
+    state.position_side = "long" if is_long else "short"
+    state.leverage      = leverage
+    if is_long:
+        state.long_count += 1
+    else:
+        state.short_count += 1
+    state.trade_count  += 1
+    record_entry(profile, symbol, is_long, qty, entry, leverage)
+
+    key = "buy" if is_long else "sell"
+    result = {key: {"filled": qty, "entry": entry}}
+    if protection is not None:
+        result["protection"] = protection
+    return result
+
+
+@timed("fanout_entries")
+async def _enter_all(client, symbol: str, side: str, profiles: dict,
+                     mark_price: float, rules, results: dict[str, dict]) -> None:
+    async def one(profile: str, leverage: int, use_initial_capital: bool) -> None:
+        start = time.perf_counter()
+        try:
+            res = await _enter(client, symbol, side, profile, leverage,
+                               use_initial_capital, mark_price, rules)
+        except HTTPException as e:
+            res = {"error": str(e.detail)}
+        except Exception as e:
+            logger.exception(f"[Fanout] {profile}:{symbol} entry failed")
+            res = {"error": str(e)}
+        res["elapsed_ms"] = _ms(start)
+        results[profile].update(res)
+
+    await asyncio.gather(*(
+        one(profile, leverage or TRADE_LEVERAGE, use_initial_capital)
+        for profile, (leverage, use_initial_capital) in profiles.items()
+    ))
+
+
+def _result(results: dict[str, dict], also_closed: dict[str, dict], timings: dict[str, float]) -> dict:
+    out = {"profiles": results, "timings": timings}
+    if also_closed:
+        out["also_closed"] = also_closed
+    return out
+
+
+@track_alert
+async def switch_position_fanout(
+    symbol: str,
+    action: str,
+    profiles: dict[str, tuple[int | None, bool]],
+    profile: str = "fanout",
+    holders: dict[str, tuple[int | None, bool]] | None = None,
+) -> dict:
+    """
+    알림 1건을 여러 one-way 프로필(/webhook ~ /webhook4)에 동시에 적용합니다.
+      profiles: {profile: (leverage, use_initial_capital)}, leverage=None 이면 TRADE_LEVERAGE
+      profile : 계측/로그용 라벨
+      holders : 순포지션 청산 시 같이 정산할 one-way 프로필 전체 (None 이면 profiles)
+
+    포지션·마크가격·심볼 규칙은 한 번만 조회하고,
+    - 반대/청산 포지션은 계정 순포지션 기준 reduceOnly 주문 1건으로 닫은 뒤 프로필별로 정산
+    - 진입 주문은 프로필별 자본/레버리지로 사이징해 동시에 전송
+    반환: {"profiles": {profile: switch_position 과 같은 모양 + elapsed_ms},
+           "also_closed": {대상 밖 프로필: {"exit_price", "pnl"}} (있을 때만), "timings": {...}}
+    """
+    client = await get_binance_async_client()
+    action = action.upper()
+    started = time.perf_counter()
+    timings: dict[str, float] = {}
+    results: dict[str, dict] = {p: {} for p in profiles}
+
+    if DRY_RUN:
+        logger.info(f"[DRY_RUN] switch_position_fanout {action} {symbol} → {list(profiles)}")
+        return {"profiles": {p: {"skipped": "dry_run"} for p in profiles}, "timings": timings}
+
+    if action not in ("BUY", "SELL", "BUY_STOP", "SELL_STOP"):
+        logger.error(f"Unknown action for fanout: {action}")
+        return {"profiles": {p: {"skipped": "unknown_action"} for p in profiles}, "timings": timings}
+
+    # 1) 공통 시장 데이터 1회 조회 (청산만 하는 STOP 은 시세/규칙 불필요)
+    start = time.perf_counter()
+    if action in ("BUY", "SELL"):
+        positions, mark_price, rules = await asyncio.gather(
+            get_positions(client, symbol),
+            get_mark_price(client, symbol),
+            get_symbol_rules(symbol),
+        )
+    else:
+        positions, mark_price, rules = await get_positions(client, symbol), 0.0, None
+    timings["market_data_ms"] = _ms(start)
+
+    current_amt = next(
+        (float(p["positionAmt"]) for p in positions if p["symbol"] == symbol),
+        0.0
+    )
+    is_entry = action in ("BUY", "SELL")
+    # 진입이면 진입 방향, STOP 이면 청산할 포지션 방향
+    want_long = action in ("BUY", "BUY_STOP")
+
+    # 2) 이미 같은 방향이면 전 프로필 스킵 / 청산할 포지션이 없으면 스킵
+    if is_entry and ((want_long and current_amt > 0) or (not want_long and current_amt < 0)):
+        reason = "already_long" if want_long else "already_short"
+        timings["total_ms"] = _ms(started)
+        return {"profiles": {p: {"skipped": reason} for p in profiles}, "timings": timings}
+
+    if not is_entry and ((want_long and current_amt <= 0) or (not want_long and current_amt >= 0)):
+        timings["total_ms"] = _ms(started)
+        return {"profiles": {p: {"skipped": "no_position"} for p in profiles}, "timings": timings}
+
+    # 3) 반대 포지션(또는 STOP 대상) 순포지션 청산 1회
+    start = time.perf_counter()
+    await _cancel_open_reduceonly_orders(symbol)
+    also_closed: dict[str, dict] = {}
+    if current_amt != 0:
+        closed = await _close_net(client, symbol, current_amt, {**(holders or {}), **profiles})
+        for p, info in closed.items():
+            if p in results:
+                results[p]["closed"] = info
+            else:
+                also_closed[p] = info
+                logger.info(f"[Fanout] {p}:{symbol} closed with the net position (not targeted)")
+        timings["close_ms"] = _ms(start)
+
+    if not is_entry:
+        done = action.lower()
+        for p in profiles:
+            closed_info = results[p].pop("closed", None)
+            results[p] = (
+                {"done": done, **closed_info} if closed_info is not None
+                else {"skipped": "no_position"}
+            )
+        timings["total_ms"] = _ms(started)
+        return _result(results, also_closed, timings)
+
+    # 4) 레버리지는 심볼 단위 설정이라 1회만 (가장 큰 값 → 모든 프로필 증거금 충족)
+    start = time.perf_counter()
+    await ensure_leverage(client, symbol, max(lev or TRADE_LEVERAGE for lev, _ in profiles.values()))
+    timings["leverage_ms"] = _ms(start)
+
+    # 5) 프로필별 진입 주문 동시 전송
+    start = time.perf_counter()
+    with expect_update(symbol):
+        await _enter_all(client, symbol, SIDE_BUY if want_long else SIDE_SELL,
+                         profiles, mark_price, rules, results)
+    if all("error" in r for r in results.values()):
+        # 프로필별 실패는 예외로 올라오지 않음 → 전부 실패면 기다릴 ACCOUNT_UPDATE 없음
+        release_update(symbol)
+    timings["entries_ms"] = _ms(start)
+    timings["total_ms"] = _ms(started)
+    return _result(results, also_closed, timings)
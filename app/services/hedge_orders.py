@@ -2,19 +2,24 @@
 
 import logging
 import math
+import time
 from fastapi import HTTPException
 from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET
-from app.clients.binance_client import get_binance_client
-from app.config import BUY_PCT
+from app.clients.binance_async_client import get_binance_async_client
+from app.config import BUY_PCT, PROTECTIVE_ORDERS
 from app.state import get_state
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from app.services.order_pipeline import fetch_pretrade, create_order, known_avg_price
+from app.services.position_book import expect_update
+from app.services.trade_ledger import record_entry
+from app.services.protective_orders import place_entry_with_protection
+from app.metrics import timed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def execute_hedge_entry(
+@timed("execute_hedge_entry")
+async def execute_hedge_entry(
     symbol: str,
     position_side: str,       # "LONG" | "SHORT"
     leverage: int,
@@ -30,33 +35,27 @@ def execute_hedge_entry(
     - use_initial_capital=True  -> state['initial_capital'] 기준
     - use_initial_capital=False -> state['capital'] 기준(복리)
     """
-    client = get_binance_client()
+    client = await get_binance_async_client()
     state = get_state(symbol, profile)
 
     if position_side not in ("LONG", "SHORT"):
         raise HTTPException(status_code=400, detail="position_side must be LONG or SHORT")
 
-    base_capital = (
-        float(state.get("initial_capital", 0.0))
-        if use_initial_capital
-        else float(state.get("capital", 0.0))
-    )
+    base_capital = float(state.initial_capital if use_initial_capital else state.capital)
     if base_capital <= 0:
         raise HTTPException(status_code=400, detail="base_capital must be > 0")
 
-    mark_price = float(client.futures_mark_price(symbol=symbol)["markPrice"])
+    # 마크가격 + 심볼 규칙 동시에 (레버리지는 switching_hedge 에서 이미 맞춤)
+    mark_price, rules = await fetch_pretrade(client, symbol)
 
     # ✅ 기존 buy/sell.py 스타일: allocation 기반 사이징
     allocation = base_capital * BUY_PCT * leverage
     raw_qty = allocation / mark_price
 
     # LOT_SIZE 규칙에 맞춰 수량 보정
-    info = client.futures_exchange_info()
-    sym_info = next(s for s in info["symbols"] if s["symbol"] == symbol)
-    lot_f = next(f for f in sym_info["filters"] if f["filterType"] == "LOT_SIZE")
-    step = float(lot_f["stepSize"])
-    min_qty = float(lot_f["minQty"])
-    qty_prec = int(round(-math.log10(step), 0)) if step > 0 else 0
+    step = rules.step_size
+    min_qty = rules.min_qty
+    qty_prec = rules.qty_precision
 
     qty = math.floor(raw_qty / step) * step
     if qty < min_qty:
@@ -67,13 +66,23 @@ def execute_hedge_entry(
     # Hedge 진입 side 결정
     side = SIDE_BUY if position_side == "LONG" else SIDE_SELL
 
-    order = client.futures_create_order(
-        symbol=symbol,
-        side=side,
-        type=ORDER_TYPE_MARKET,
-        quantity=qty_str,
-        positionSide=position_side,  # ⭐ 핵심
-    )
+    with expect_update(symbol):
+        protection = None
+        if PROTECTIVE_ORDERS:
+            # 진입 + 익절/손절 (positionSide 지정, reduceOnly 없음)
+            order, protection = await place_entry_with_protection(
+                client, symbol, position_side == "LONG", qty, rules, mark_price, profile, use_initial_capital,
+                position_side=position_side,
+            )
+        else:
+            order = await create_order(
+                client,
+                symbol=symbol,
+                side=side,
+                type=ORDER_TYPE_MARKET,
+                quantity=qty_str,
+                positionSide=position_side,  # ⭐ 핵심
+            )
 
     logger.info(
         f"[HEDGE_ENTRY] {profile}:{symbol} {position_side} "
@@ -83,14 +92,21 @@ def execute_hedge_entry(
 
     # (선택) webhook5/6 상태 기록: 마지막 진입 주문 정보
     if position_side == "LONG":
-        state["hedge_long_add_count"] = state.get("hedge_long_add_count", 0) + 1
-        state["hedge"]["long"]["last_order_qty"] = float(qty_str)
-        state["hedge"]["long"]["last_order_time"] = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+        state.hedge_long_add_count += 1
+        side_state = state.hedge_long
     else:
-        state["hedge_short_add_count"] = state.get("hedge_short_add_count", 0) + 1
-        state["hedge"]["short"]["last_order_qty"] = float(qty_str)
-        state["hedge"]["short"]["last_order_time"] = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+        state.hedge_short_add_count += 1
+        side_state = state.hedge_short
+    side_state.last_order_qty = float(qty_str)
+    side_state.last_order_time = time.time()
+
+    state.trade_count += 1
 
-    state["trade_count"] = state.get("trade_count", 0) + 1
+    # RESULT 응답(또는 이미 온 체결 이벤트)의 평균 체결가, 없으면 사이징에 쓴 마크가격
+    entry = known_avg_price(order) or mark_price
+    record_entry(profile, symbol, position_side == "LONG", float(qty_str), entry, leverage)
 
-    return {"entry": {"positionSide": position_side, "qty": float(qty_str), "mark": mark_price}, "order": order}
\ No newline at end of file
+    result = {"entry": {"positionSide": position_side, "qty": float(qty_str), "mark": mark_price}, "order": order}
+    if protection is not None:
+        result["protection"] = protection
+    return result
\ No newline at end of file
@@ -0,0 +1,80 @@
+# app/services/jobs.py
+
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+from fastapi import HTTPException
+
+from app.config import JOB_HISTORY_MAX
+from app.services.alert_dedup import dedup_cache
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# queued → running → done / failed
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass(slots=True)
+class Job:
+    job_id: str
+    route: str
+    symbol: str
+    action: str
+    status: str = JOB_QUEUED
+    created_at: float = 0.0
+    started_at: float | None = None
+    finished_at: float | None = None
+    # 라우트가 동기 모드에서 돌려주던 응답 그대로 ({"status": "ok", "result": {...}} 등)
+    result: dict | None = None
+    error: str | None = None
+    status_code: int | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# job_id -> Job (오래된 것부터 JOB_HISTORY_MAX 초과분 제거)
+_jobs: OrderedDict[str, Job] = OrderedDict()
+
+
+def create_job(route: str, symbol: str, action: str) -> Job:
+    job = Job(uuid.uuid4().hex, route, symbol, action, created_at=time.time())
+    _jobs[job.job_id] = job
+    while len(_jobs) > JOB_HISTORY_MAX:
+        _jobs.popitem(last=False)
+    return job
+
+
+def get_job(job_id: str) -> Job | None:
+    return _jobs.get(job_id)
+
+
+async def run_job(job: Job, handler, /, *args, **kwargs) -> None:
+    """백그라운드 실행: 라우트 본문을 돌리고 결과/에러를 job 에 기록 (예외는 밖으로 내보내지 않음)"""
+    job.status = JOB_RUNNING
+    job.started_at = time.time()
+    try:
+        job.result = await handler(*args, **kwargs)
+        job.status = JOB_DONE
+        job.status_code = 200
+    except HTTPException as e:
+        job.status = JOB_FAILED
+        job.status_code = e.status_code
+        job.error = str(e.detail)
+    except Exception as e:
+        logger.exception(f"[Jobs] {job.route} {job.action} {job.symbol} failed")
+        job.status = JOB_FAILED
+        job.status_code = 500
+        job.error = str(e)
+    finally:
+        job.finished_at = time.time()
+        if job.status == JOB_FAILED:
+            # 202 가 성공으로 캐시돼 있으니 재전송이 다시 실행되도록
+            dedup_cache.evict_current()
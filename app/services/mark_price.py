@@ -0,0 +1,95 @@
+# app/services/mark_price.py
+
+import logging
+import time
+from typing import Callable
+
+from app.clients.binance_async_client import get_binance_async_client, get_socket_manager
+from app.config import MARK_PRICE_MAX_AGE
+from app.metrics import timed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# symbol -> (markPrice, 수신 시각 time.time())
+_prices: dict[str, tuple[float, float]] = {}
+# 스트림 수신마다 호출할 함수 (트리거 엔진 등). 이벤트 루프 위에서 동기로 호출되므로 짧게 끝나야 함
+_listeners: list[Callable[[list[dict]], None]] = []
+
+
+def add_price_listener(listener: Callable[[list[dict]], None]) -> None:
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def update_prices(items: list[dict]) -> None:
+    """markPriceUpdate 이벤트 목록을 가격 테이블에 반영합니다."""
+    now = time.time()
+    for item in items:
+        _prices[item["s"]] = (float(item["p"]), now)
+    for listener in _listeners:
+        try:
+            listener(items)
+        except Exception:
+            logger.exception("[MarkPrice] Price listener failed")
+
+
+def get_cached_mark_price(symbol: str, max_age: float = MARK_PRICE_MAX_AGE) -> float | None:
+    """max_age 이내에 받은 가격이 있으면 반환, 없으면 None"""
+    entry = _prices.get(symbol)
+    if entry is None:
+        return None
+    price, ts = entry
+    if time.time() - ts > max_age:
+        return None
+    return price
+
+
+def cached_prices(symbols: list[str], max_age: float = MARK_PRICE_MAX_AGE) -> list[float | None]:
+    """여러 심볼을 한 번에 (시각 한 번만 읽음). 없거나 오래된 가격은 None"""
+    cutoff = time.time() - max_age
+    out = []
+    for symbol in symbols:
+        entry = _prices.get(symbol)
+        out.append(entry[0] if entry is not None and entry[1] >= cutoff else None)
+    return out
+
+
+@timed("mark_price")
+async def get_mark_price(client, symbol: str) -> float:
+    """
+    주문 사이징용 마크가격.
+    스트림 테이블이 충분히 최신이면 왕복 없이 반환, 아니면 REST로 조회 후 테이블 갱신.
+    """
+    price = get_cached_mark_price(symbol)
+    if price is not None:
+        return price
+
+    res = await client.futures_mark_price(symbol=symbol)
+    price = float(res["markPrice"])
+    _prices[symbol] = (price, time.time())
+    return price
+
+
+async def run_mark_price_stream() -> None:
+    """
+    !markPrice@arr@1s 소비 (백그라운드 작업, app/services/runtime.py 가 실행).
+    연결이 끊겨 예외가 나면 runtime 이 backoff 후 다시 호출합니다.
+    """
+    client = await get_binance_async_client()
+    bsm = get_socket_manager(client)
+
+    # !markPrice@arr@1s : 전체 심볼 1초 주기
+    async with bsm.all_mark_price_socket(fast=True) as stream:
+        logger.info("[MarkPrice] Connected to !markPrice@arr@1s")
+        while True:
+            msg = await stream.recv()
+            if isinstance(msg, dict) and msg.get("e") == "error":
+                # 라이브러리 자체 재연결을 다 쓰면 더 이상 메시지가 오지 않음 → runtime 이 새 소켓으로 다시 시작
+                if msg.get("type") == "BinanceWebsocketUnableToConnect":
+                    raise ConnectionError(f"mark price stream gave up reconnecting: {msg}")
+                logger.warning(f"[MarkPrice] Stream error: {msg}")
+                continue
+            # combined stream: {"stream": ..., "data": [...]}
+            data = msg.get("data", msg) if isinstance(msg, dict) else msg
+            update_prices(data if isinstance(data, list) else [data])
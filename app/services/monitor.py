@@ -1,98 +1,185 @@
 # app/services/monitor.py
 
-import threading
-import time
+import asyncio
 import logging
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from binance import ThreadedWebsocketManager
-from app.clients.binance_client import get_binance_client
-from app.state import monitor_states, get_state
-from app.config import POLL_INTERVAL
+import time
+
+import numpy as np
+
+from app.config import MONITOR_INTERVAL
+from app.services.mark_price import cached_prices
+from app.state import ProfileState, monitor_states, drain_moved, set_live
 
 logger = logging.getLogger("monitor")
 logger.setLevel(logging.INFO)
 
+# 한 ProfileState 안의 포지션 구분
+LEG_NET = 0     # webhook1~4 (one-way): position_qty / entry_price / position_side
+LEG_LONG = 1    # webhook5/6 hedge_long
+LEG_SHORT = 2   # webhook5/6 hedge_short
+_LEGS = (LEG_NET, LEG_LONG, LEG_SHORT)
+
+
+def _leg_position(state: ProfileState, leg: int) -> tuple[float, float]:
+    """(부호 있는 수량 + 롱 / - 숏, 진입가)"""
+    if leg == LEG_NET:
+        qty = abs(state.position_qty)
+        side = state.position_side or ("short" if state.position_qty < 0 else "long")
+        return (-qty if side == "short" else qty), state.entry_price
+    side_state = state.hedge_long if leg == LEG_LONG else state.hedge_short
+    qty = abs(side_state.qty)
+    return (qty if leg == LEG_LONG else -qty), side_state.entry_price
 
-def _handle_order_update(msg):
+
+class PositionTable:
     """
-    ENTRY 가격·수량을 WebSocket으로 감지하여 monitor_states에 기록합니다.
-    TP/SL 주문은 buy.py / sell.py 쪽에서 모두 처리하므로 여기서는 주문을 생성하지 않습니다.
+    열린 포지션 (profile × symbol × leg) 을 열 배열로 보관.
+    - 포지션이 바뀐 상태만 upsert (state._moved), 닫힌 행은 마지막 행과 자리 바꿔 제거
+    - tick: 심볼별 마크가격 벡터 → 행별 가격은 fancy index 한 번, 손익은 NumPy 한 번
     """
-    o = msg.get("o", {})
-    if msg.get("e") == "ORDER_TRADE_UPDATE" and \
-       o.get("X") == "FILLED" and o.get("S") == "BUY" and o.get("o") == "MARKET":
-        symbol = msg.get("s")  # ex. "ETHUSDT"
-        state = get_state(symbol)
-        price = float(o.get("L", 0))
-        qty   = float(o.get("q", 0))
-        now   = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-        state.update({
-            "symbol":        symbol,
-            "entry_price":   price,
-            "position_qty":  qty,
-            "entry_time":    now,
-            "first_tp_done": False,
-            "second_tp_done":False,
-            "sl_done":       False,
-            "current_price": price,
-            "pnl":           0.0
-        })
-        logger.info(f"[Monitor] Entry detected for {symbol}: {qty}@{price} at {now}")
-
-
-def _poll_price_loop():
-    client = get_binance_client()
-
-    while True:
-        # 각 심볼별 상태 순회
-        for symbol, state in monitor_states.items():
-            entry = state.get("entry_price", 0.0)
-            qty   = state.get("position_qty", 0.0)
 
-            # 진입 정보가 없으면 건너뜀
-            if not symbol or entry <= 0 or qty <= 0:
+    def __init__(self, capacity: int = 256):
+        self.size = 0
+        self.symbol_idx = np.zeros(capacity, dtype=np.intp)
+        self.qty = np.zeros(capacity)
+        self.entry = np.zeros(capacity)
+        self.last_price = np.full(capacity, np.nan)
+        self.owners: list[tuple[ProfileState, int]] = []
+        self._row: dict[tuple[str, int], int] = {}
+        self.symbols: list[str] = []
+        self._symbol_code: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self) -> None:
+        capacity = len(self.qty) * 2
+        for name in ("symbol_idx", "qty", "entry"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        last = np.full(capacity, np.nan)
+        last[:self.size] = self.last_price[:self.size]
+        self.last_price = last
+
+    def _code(self, symbol: str) -> int:
+        code = self._symbol_code.get(symbol)
+        if code is None:
+            code = self._symbol_code[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return code
+
+    def _remove(self, row: int) -> None:
+        last = self.size - 1
+        if row != last:
+            for column in (self.symbol_idx, self.qty, self.entry, self.last_price):
+                column[row] = column[last]
+            state, leg = self.owners[row] = self.owners[last]
+            self._row[(state.key, leg)] = row
+        self.owners.pop()
+        self.size = last
+
+    def upsert(self, state: ProfileState) -> None:
+        for leg in _LEGS:
+            qty, entry = _leg_position(state, leg)
+            row = self._row.get((state.key, leg))
+            if qty == 0 or entry <= 0:
+                if row is not None:
+                    del self._row[(state.key, leg)]
+                    self._remove(row)
+                    if leg == LEG_NET:
+                        set_live(state, "pnl", 0.0)
                 continue
+            if row is None:
+                if self.size == len(self.qty):
+                    self._grow()
+                row = self._row[(state.key, leg)] = self.size
+                self.owners.append((state, leg))
+                self.symbol_idx[row] = self._code(state.symbol)
+                self.size += 1
+            self.qty[row] = qty
+            self.entry[row] = entry
+            # 수량/진입가가 바뀌었으면 가격이 그대로여도 다시 계산
+            self.last_price[row] = np.nan
+
+
+class PositionMonitor:
+    """
+    마크가격 스트림(!markPrice@arr@1s) 캐시만 읽어 모든 profile 의 롱/숏 미실현 손익을 갱신.
+    심볼 수와 무관하게 REST 요청 없음.
+    """
 
-            try:
-                ticker = client.futures_symbol_ticker(symbol=symbol)
-                # 리스트 반환 시, 해당 심볼 정보 찾기
-                if isinstance(ticker, list):
-                    ticker = next((t for t in ticker if t.get("symbol") == symbol), None)
-                    if ticker is None:
-                        raise ValueError(f"No ticker data for {symbol}")
-
-                current = float(ticker["price"])
-                now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-                pnl_percent = (current / entry - 1) * 100
-
-                state.update({
-                    "current_price": current,
-                    "pnl":           pnl_percent,
-                    "last_update":   now
-                })
-                logger.info(f"[Monitor] {symbol} price {current}, PnL {pnl_percent:.2f}% at {now}")
-            except Exception:
-                logger.exception(f"[Monitor] Error fetching price for {symbol}")
-
-        time.sleep(POLL_INTERVAL)
-
-
-def start_monitor():
-    client = get_binance_client()
-    twm = ThreadedWebsocketManager(
-        api_key=client.API_KEY,
-        api_secret=client.API_SECRET
-    )
-
-    try:
-        twm.start()
-        twm.start_futures_user_socket(callback=_handle_order_update)
-        logger.info("[Monitor] WebSocket manager started")
-    except Exception:
-        logger.exception("[Monitor] Failed to start WebSocket manager")
-        return
-
-    thread = threading.Thread(target=_poll_price_loop, daemon=True)
-    thread.start()
-    logger.info("[Monitor] Price polling thread started")
\ No newline at end of file
+    def __init__(self):
+        self.table = PositionTable()
+        self._primed = False
+        self.stats: dict[str, float] = {
+            "positions": 0,
+            "symbols": 0,
+            "ticks": 0,
+            "updated": 0,
+            "stale_symbols": 0,
+            "last_tick_ms": 0.0,
+        }
+
+    def _sync(self) -> None:
+        keys = drain_moved()
+        if not self._primed:
+            # 기동 시 저널에서 복원된 포지션까지
+            keys = set(keys) | monitor_states.keys()
+            self._primed = True
+        for key in keys:
+            state = monitor_states.get(key)
+            if state is not None:
+                self.table.upsert(state)
+
+    def tick(self) -> int:
+        """가격이 바뀐 행만 state 에 반영. 반영한 행 수 반환"""
+        start = time.perf_counter()
+        self._sync()
+        table = self.table
+        n = table.size
+        self.stats["positions"] = n
+        if n == 0:
+            return 0
+
+        quotes = cached_prices(table.symbols)
+        prices = np.array([np.nan if q is None else q for q in quotes])
+        price = prices[table.symbol_idx[:n]]
+        rows = np.flatnonzero(np.isfinite(price) & (price != table.last_price[:n]))
+
+        if len(rows):
+            qty, entry, px = table.qty[rows], table.entry[rows], price[rows]
+            unrealized = (px - entry) * qty
+            pnl_pct = (px / entry - 1.0) * np.sign(qty) * 100.0
+            table.last_price[rows] = px
+
+            owners = table.owners
+            for row, p, u, pct in zip(rows.tolist(), px.tolist(), unrealized.tolist(), pnl_pct.tolist()):
+                state, leg = owners[row]
+                set_live(state, "current_price", p)
+                if leg == LEG_NET:
+                    set_live(state, "pnl", pct)
+                else:
+                    set_live(state.hedge_long if leg == LEG_LONG else state.hedge_short, "unrealized_pnl", u)
+
+        self.stats["ticks"] += 1
+        self.stats["updated"] += len(rows)
+        self.stats["symbols"] = len(table.symbols)
+        self.stats["stale_symbols"] = int(np.isnan(prices).sum())
+        self.stats["last_tick_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return len(rows)
+
+
+position_monitor = PositionMonitor()
+
+
+async def run_monitor() -> None:
+    """MONITOR_INTERVAL 마다 tick (백그라운드 작업, app/services/runtime.py 가 실행)"""
+    logger.info(f"[Monitor] Ticking every {MONITOR_INTERVAL}s (source=!markPrice@arr@1s)")
+    while True:
+        await asyncio.sleep(MONITOR_INTERVAL)
+        try:
+            position_monitor.tick()
+        except Exception:
+            logger.exception("[Monitor] Tick failed")
@@ -0,0 +1,117 @@
+# app/services/order_events.py
+
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 주문이 더 이상 변하지 않는 상태
+FINAL_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH"}
+
+# 최근 종료 주문 보관 개수 (이벤트가 REST 응답보다 먼저 도착하는 경우 대비)
+_RECENT_LIMIT = 1000
+
+# orderId(int) / clientOrderId(str) -> 대기 중인 Future
+_waiters: dict[int | str, asyncio.Future] = {}
+# orderId(int) / clientOrderId(str) -> 종료 주문 정보
+_recent: OrderedDict[int | str, dict] = OrderedDict()
+# orderId -> [rp 합, 수수료 합]. 이벤트의 rp / n 은 체결(TRADE) 1건 값이라 종료 이벤트까지 주문 단위로 누적
+_trade_totals: OrderedDict[int, list[float]] = OrderedDict()
+
+
+def _remember(key: int | str, fill: dict) -> None:
+    _recent[key] = fill
+    _recent.move_to_end(key)
+    while len(_recent) > _RECENT_LIMIT:
+        _recent.popitem(last=False)
+
+
+def _add_trade(o: dict) -> None:
+    order_id = o.get("i")
+    if order_id is None:
+        return
+    totals = _trade_totals.get(order_id)
+    if totals is None:
+        totals = _trade_totals[order_id] = [0.0, 0.0]
+        while len(_trade_totals) > _RECENT_LIMIT:
+            _trade_totals.popitem(last=False)
+    totals[0] += float(o.get("rp", 0.0) or 0.0)
+    totals[1] += float(o.get("n", 0.0) or 0.0)
+
+
+def handle_order_trade_update(msg: dict) -> None:
+    """
+    user-data stream ORDER_TRADE_UPDATE 이벤트 처리.
+    체결(TRADE)마다 실현손익/수수료를 누적하고,
+    종료 상태(FILLED 등)가 되면 주문 전체 합계와 함께 해당 주문을 기다리는 Future를 깨웁니다.
+    """
+    o = msg.get("o", {})
+    if o.get("x") == "TRADE":
+        _add_trade(o)
+    status = o.get("X")
+    if status not in FINAL_STATUSES:
+        return
+
+    # 실행 유형(x)이 없는 이벤트면 누적이 없으므로 이 이벤트 값 그대로
+    realized, commission = _trade_totals.pop(o.get("i"), None) or (
+        float(o.get("rp", 0.0) or 0.0),
+        float(o.get("n", 0.0) or 0.0),
+    )
+
+    fill = {
+        "symbol":        o.get("s"),
+        "orderId":       o.get("i"),
+        "clientOrderId": o.get("c"),
+        "status":        status,
+        "side":          o.get("S"),
+        "positionSide":  o.get("ps"),
+        "avgPrice":      float(o.get("ap", 0.0) or 0.0),
+        "executedQty":   float(o.get("z", 0.0) or 0.0),
+        "realizedPnl":   realized,
+        "commission":    commission,
+        "commissionAsset": o.get("N"),
+        "tradeTime":     o.get("T"),
+    }
+
+    for key in (fill["orderId"], fill["clientOrderId"]):
+        if key is None:
+            continue
+        _remember(key, fill)
+        fut = _waiters.pop(key, None)
+        if fut is not None and not fut.done():
+            fut.set_result(fill)
+
+
+def get_final_order(order_id: int | str | None) -> dict | None:
+    """이미 수신한 종료 주문 정보 (없으면 None)"""
+    if order_id is None:
+        return None
+    return _recent.get(order_id)
+
+
+async def wait_for_order(order_id: int | str | None, timeout: float) -> dict | None:
+    """
+    orderId 또는 clientOrderId 기준으로 종료 이벤트를 기다립니다.
+    timeout 안에 이벤트가 오지 않으면 None (호출 측에서 REST 폴링으로 대체).
+    """
+    if order_id is None:
+        return None
+
+    fill = _recent.get(order_id)
+    if fill is not None:
+        return fill
+
+    fut = _waiters.get(order_id)
+    if fut is None:
+        fut = asyncio.get_running_loop().create_future()
+        _waiters[order_id] = fut
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(fut), timeout)
+    except asyncio.TimeoutError:
+        logger.info(f"[OrderEvents] No final event for order {order_id} within {timeout}s")
+        if _waiters.get(order_id) is fut:
+            del _waiters[order_id]
+        return None
@@ -0,0 +1,86 @@
+# app/services/order_pipeline.py
+
+import asyncio
+import logging
+
+from app.services.account_config import ensure_leverage, get_cached_leverage
+from app.services.mark_price import get_mark_price, get_cached_mark_price
+from app.services.order_events import get_final_order
+from app.services.symbol_rules import SymbolRules, get_symbol_rules, lookup_symbol_rules
+from app.metrics import timed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 시장가 주문 응답에 체결 결과(status / executedQty / avgPrice)까지 받음 → futures_get_order 재조회 불필요
+RESP_RESULT = "RESULT"
+
+
+@timed("pretrade")
+async def fetch_pretrade(client, symbol: str, leverage: int | None = None) -> tuple[float, SymbolRules]:
+    """
+    진입 전 준비: (레버리지 설정), 마크가격, 심볼 규칙.
+    서로 독립이라 캐시 미스인 것만 동시에 실행 → 임계 경로는 왕복 최대 1회.
+    모두 캐시 적중이면 task 도 만들지 않고 바로 반환.
+    예외(레버리지 변경 실패, Unknown symbol 등)는 그대로 올립니다.
+    """
+    mark_price = get_cached_mark_price(symbol)
+    rules = lookup_symbol_rules(symbol)
+    set_leverage = leverage is not None and get_cached_leverage(symbol) != leverage
+    if mark_price is not None and rules is not None and not set_leverage:
+        return mark_price, rules
+
+    steps = [get_mark_price(client, symbol), get_symbol_rules(symbol)]
+    if set_leverage:
+        steps.append(ensure_leverage(client, symbol, leverage))
+    mark_price, rules, *_ = await asyncio.gather(*steps)
+    return mark_price, rules
+
+
+async def create_order(client, **params) -> dict:
+    """futures_create_order + newOrderRespType=RESULT"""
+    return await client.futures_create_order(newOrderRespType=RESP_RESULT, **params)
+
+
+def is_filled(order: dict) -> bool:
+    """RESULT 응답 기준 이미 전량 체결된 주문인지"""
+    return order.get("status") == "FILLED"
+
+
+def known_avg_price(order: dict) -> float | None:
+    """주문 응답(RESULT) 또는 이미 받은 체결 이벤트의 평균 체결가. 둘 다 없으면 None"""
+    avg = float(order.get("avgPrice") or 0.0)
+    if avg > 0:
+        return avg
+    fill = get_final_order(order.get("orderId"))
+    if fill is not None and fill["avgPrice"] > 0:
+        return fill["avgPrice"]
+    return None
+
+
+def known_executed_qty(order: dict) -> float | None:
+    """주문 응답(RESULT, 종료 상태) 또는 이미 받은 체결 이벤트의 체결 수량. 둘 다 없으면 None"""
+    if is_filled(order):
+        return float(order.get("executedQty") or 0.0)
+    fill = get_final_order(order.get("orderId"))
+    if fill is not None:
+        return fill["executedQty"]
+    return None
+
+
+async def fill_price(client, symbol: str, order: dict, fallback: float) -> float:
+    """
+    평균 체결가. 응답/이벤트에 있으면 왕복 없음.
+    응답 시점에 아직 체결 전(거래소 지연 등)인 경우에만 futures_get_order 1회, 실패하면 fallback.
+    """
+    avg = known_avg_price(order)
+    if avg is not None:
+        return avg
+
+    order_id = order.get("orderId")
+    try:
+        res = await client.futures_get_order(symbol=symbol, orderId=order_id)
+        return float(res.get("avgPrice") or 0.0) or fallback
+    except Exception as e:
+        logger.warning(f"[Order] {symbol} failed to fetch avgPrice via orderId {order_id}: {e}")
+        return fallback
@@ -0,0 +1,261 @@
+# app/services/position_book.py
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from app.clients.binance_async_client import get_binance_async_client
+from app.config import FILL_EVENT_TIMEOUT, POSITION_DRIFT_CHECK_INTERVAL
+from app.clients.rate_governor import low_priority
+from app.services.user_stream import is_connected, connection_id
+from app.metrics import timed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 수량 비교 허용 오차
+_EPS = 1e-12
+
+
+@dataclass(slots=True)
+class BookPosition:
+    amt: float = 0.0
+    entry_price: float = 0.0
+    unrealized_pnl: float = 0.0
+    # 북에 반영한 로컬 시각 (time.monotonic). 거래소 이벤트 시각 E 는 로컬 시계와 어긋날 수 있어 비교에 안 씀
+    received_at: float = 0.0
+
+
+# symbol -> positionSide("LONG"/"SHORT"/"BOTH") -> BookPosition
+_book: dict[str, dict[str, BookPosition]] = {}
+# 스냅샷을 적재했을 때의 user-data stream 연결 번호 (다르면 이벤트 누락 가능 → 재적재)
+_seed_epoch: int | None = None
+_seed_lock: asyncio.Lock | None = None
+# 주문 직후 ACCOUNT_UPDATE 수신 전까지 읽기를 잠시 대기시키기 위한 이벤트
+_pending: dict[str, asyncio.Event] = {}
+
+drift_stats: dict[str, float] = {
+    "checks": 0,
+    "mismatched_checks": 0,
+    "mismatched_positions": 0,
+    "last_check": 0.0,
+}
+
+
+def _set(symbol: str, side: str, amt: float, entry: float, upnl: float, ts: float) -> None:
+    sides = _book.setdefault(symbol, {})
+    pos = sides.get(side)
+    if pos is None:
+        sides[side] = BookPosition(amt, entry, upnl, ts)
+    else:
+        pos.amt, pos.entry_price, pos.unrealized_pnl, pos.received_at = amt, entry, upnl, ts
+
+
+def _load_rows(rows: list[dict]) -> dict[str, dict[str, BookPosition]]:
+    book: dict[str, dict[str, BookPosition]] = {}
+    now = time.monotonic()
+    for p in rows:
+        book.setdefault(p["symbol"], {})[p.get("positionSide", "BOTH")] = BookPosition(
+            float(p.get("positionAmt", 0.0)),
+            float(p.get("entryPrice", 0.0)),
+            float(p.get("unRealizedProfit", 0.0)),
+            now,
+        )
+    return book
+
+
+def _merge_snapshot(fresh: dict[str, dict[str, BookPosition]], started: float) -> dict[str, dict[str, BookPosition]]:
+    """
+    REST 스냅샷(started 시각(monotonic)에 요청)과 현재 북을 합칩니다.
+    요청이 오가는 동안 스트림으로 반영된 항목(received_at >= started)과
+    주문 직후 ACCOUNT_UPDATE 대기 중인 심볼(_pending)은 스냅샷보다 최신일 수 있으므로 북 쪽을 유지.
+    """
+    merged = fresh
+    for symbol, sides in _book.items():
+        if symbol in _pending:
+            merged[symbol] = sides
+            continue
+        for side, pos in sides.items():
+            if pos.received_at >= started:
+                merged.setdefault(symbol, {})[side] = pos
+    return merged
+
+
+def _rows(symbol: str) -> list[dict]:
+    """REST futures_position_information 과 같은 모양으로 반환 (호출부 호환)"""
+    return [
+        {
+            "symbol": symbol,
+            "positionSide": side,
+            "positionAmt": pos.amt,
+            "entryPrice": pos.entry_price,
+            "unRealizedProfit": pos.unrealized_pnl,
+        }
+        for side, pos in _book.get(symbol, {}).items()
+    ]
+
+
+def _is_trusted() -> bool:
+    return _seed_epoch is not None and is_connected() and _seed_epoch == connection_id()
+
+
+def _release_pending(symbol: str) -> None:
+    ev = _pending.pop(symbol, None)
+    if ev is not None:
+        ev.set()
+
+
+async def seed_positions(client) -> None:
+    """전체 포지션 스냅샷(REST 1회)으로 북을 교체합니다."""
+    global _book, _seed_epoch, _seed_lock
+
+    if _seed_lock is None:
+        _seed_lock = asyncio.Lock()
+
+    async with _seed_lock:
+        epoch = connection_id()
+        started = time.monotonic()
+        rows = await client.futures_position_information()
+        _book = _merge_snapshot(_load_rows(rows), started)
+        _seed_epoch = epoch
+        for symbol in list(_pending):
+            _release_pending(symbol)
+
+    logger.info(f"[PositionBook] Seeded {len(_book)} symbols (stream #{epoch})")
+
+
+@contextmanager
+def expect_update(symbol: str):
+    """
+    주문 전송을 감쌉니다 (with expect_update(symbol): order = await ...).
+    해당 심볼의 ACCOUNT_UPDATE를 받을 때까지 get_positions()가 잠시 기다리도록 표시하고,
+    주문 전송이 예외로 끝나면 기다릴 체결이 없으므로 바로 표시를 지웁니다.
+    """
+    marked = symbol not in _pending
+    if marked:
+        _pending[symbol] = asyncio.Event()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        if marked and not ok:
+            _release_pending(symbol)
+
+
+def release_update(symbol: str) -> None:
+    """예외 없이 끝났지만 주문이 하나도 나가지 않은 경우(fan-out 전 프로필 실패 등) expect_update 표시 해제"""
+    _release_pending(symbol)
+
+
+def apply_account_update(msg: dict) -> None:
+    """
+    user-data stream ACCOUNT_UPDATE 이벤트 반영
+      {"e": "ACCOUNT_UPDATE", "E": ..., "a": {"P": [{"s", "pa", "ep", "up", "ps"}, ...]}}
+    """
+    ts = time.monotonic()
+    for p in msg.get("a", {}).get("P", []):
+        symbol = p["s"]
+        _set(
+            symbol,
+            p.get("ps", "BOTH"),
+            float(p.get("pa", 0.0)),
+            float(p.get("ep", 0.0)),
+            float(p.get("up", 0.0)),
+            ts,
+        )
+        _release_pending(symbol)
+
+
+@timed("positions")
+async def get_positions(client, symbol: str) -> list[dict]:
+    """
+    포지션 조회. 북을 신뢰할 수 있으면 REST 왕복 없이 반환합니다.
+    - 스트림 단절 중: 기존처럼 심볼 단위 REST 조회
+    - 스트림 재연결 후: 전체 스냅샷 재적재
+    - 직전 주문의 ACCOUNT_UPDATE 미수신: FILL_EVENT_TIMEOUT 동안 대기 후 REST로 대체
+    """
+    if not is_connected():
+        return await client.futures_position_information(symbol=symbol)
+
+    if not _is_trusted():
+        await seed_positions(client)
+        return _rows(symbol)
+
+    ev = _pending.get(symbol)
+    if ev is None:
+        return _rows(symbol)
+
+    try:
+        await asyncio.wait_for(ev.wait(), FILL_EVENT_TIMEOUT)
+        return _rows(symbol)
+    except asyncio.TimeoutError:
+        logger.info(f"[PositionBook] No ACCOUNT_UPDATE for {symbol}, falling back to REST")
+
+    positions = await client.futures_position_information(symbol=symbol)
+    now = time.monotonic()
+    _book[symbol] = {}
+    for p in positions:
+        _set(symbol, p.get("positionSide", "BOTH"), float(p.get("positionAmt", 0.0)),
+             float(p.get("entryPrice", 0.0)), float(p.get("unRealizedProfit", 0.0)), now)
+    _release_pending(symbol)
+    return positions
+
+
+async def check_drift(client) -> int:
+    """
+    REST 스냅샷과 북을 비교해 어긋난 포지션 수를 세고, 북을 스냅샷으로 교정합니다.
+    요청 중에 스트림으로 갱신된 항목과 주문 진행 중(_pending)인 심볼은 비교/교정 대상에서 제외.
+    """
+    global _book
+
+    started = time.monotonic()
+    rows = await client.futures_position_information()
+    fresh = _load_rows(rows)
+
+    mismatched = 0
+    for symbol in set(fresh) | set(_book):
+        if symbol in _pending:
+            continue
+        sides = set(fresh.get(symbol, {})) | set(_book.get(symbol, {}))
+        for side in sides:
+            a = fresh.get(symbol, {}).get(side)
+            b = _book.get(symbol, {}).get(side)
+            if b is not None and b.received_at >= started:
+                continue
+            amt_a = a.amt if a else 0.0
+            amt_b = b.amt if b else 0.0
+            if abs(amt_a - amt_b) > _EPS:
+                mismatched += 1
+                logger.warning(f"[PositionBook] Drift {symbol} {side}: book={amt_b} exchange={amt_a}")
+
+    drift_stats["checks"] += 1
+    drift_stats["last_check"] = time.time()
+    if mismatched:
+        drift_stats["mismatched_checks"] += 1
+        drift_stats["mismatched_positions"] += mismatched
+
+    _book = _merge_snapshot(fresh, started)
+    return mismatched
+
+
+async def run_drift_checker() -> None:
+    """주기적 드리프트 체크 (백그라운드 작업, app/services/runtime.py 가 실행)"""
+    while True:
+        await asyncio.sleep(POSITION_DRIFT_CHECK_INTERVAL)
+        try:
+            if not is_connected():
+                continue
+            client = await get_binance_async_client()
+            # 드리프트 체크는 주문 예산을 잠식하지 않도록 낮은 우선순위
+            with low_priority():
+                if _is_trusted():
+                    await check_drift(client)
+                else:
+                    await seed_positions(client)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("[PositionBook] Drift check failed")
@@ -0,0 +1,345 @@
+# app/services/protective_orders.py
+
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET
+
+from app.config import TP_RATIO, TP_PART_RATIO, SL_RATIO, FILL_EVENT_TIMEOUT
+from app.clients.binance_async_client import get_binance_async_client
+from app.services.symbol_rules import SymbolRules, lookup_symbol_rules
+from app.services.order_pipeline import RESP_RESULT, is_filled, known_avg_price
+from app.services.order_events import wait_for_order
+from app.metrics import timed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# newClientOrderId: "{tp|sl}-{profile}-{N|L|S}{i|c}-{lot}"
+#   N = one-way(BOTH), L/S = hedge LONG/SHORT, i/c = initial_capital / capital(복리), lot = 진입 시각(ms, base36)
+# 체결 이벤트만 보고 어느 프로필·모드의 어느 진입에 속한 주문인지 알 수 있도록 id 에 담음 (Binance 상한 36자)
+KIND_TP = "tp"
+KIND_SL = "sl"
+_KINDS = (KIND_TP, KIND_SL)
+_MODE_CODES = {None: "N", "LONG": "L", "SHORT": "S"}
+_CODE_MODES = {v: k for k, v in _MODE_CODES.items()}
+
+# 사이드 태스크 (취소/손절 수량 조정) 참조 유지
+_tasks: set[asyncio.Task] = set()
+
+
+@dataclass(slots=True)
+class ProtectiveFill:
+    kind: str                     # "tp" | "sl"
+    profile: str
+    position_side: str | None     # None(one-way) | "LONG" | "SHORT"
+    use_initial_capital: bool
+    lot: str                      # 진입 시각(ms, base36). 수량 조정한 손절은 끝에 r
+    symbol: str
+    side: str                     # 청산 주문 side (SELL = 롱 청산)
+    qty: float                    # 누적 체결 수량
+    price: float                  # 평균 체결가
+    stop_price: float
+
+
+def _lot_id() -> str:
+    n = int(time.time() * 1000)
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while n:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+    return out
+
+
+def client_order_id(kind: str, profile: str, position_side: str | None, use_initial_capital: bool, lot: str) -> str:
+    return f"{kind}-{profile}-{_MODE_CODES[position_side]}{'i' if use_initial_capital else 'c'}-{lot}"
+
+
+def parse_client_order_id(cid: str | None) -> tuple[str, str, str | None, bool, str] | None:
+    """보호 주문 id 이면 (kind, profile, position_side, use_initial_capital, lot), 아니면 None"""
+    if not cid:
+        return None
+    parts = cid.split("-")
+    if len(parts) != 4 or parts[0] not in _KINDS or len(parts[2]) != 2:
+        return None
+    kind, profile, flags, lot = parts
+    if flags[0] not in _CODE_MODES or flags[1] not in ("i", "c"):
+        return None
+    return kind, profile, _CODE_MODES[flags[0]], flags[1] == "i", lot
+
+
+def format_price(price: float, rules: SymbolRules) -> str:
+    """PRICE_FILTER tickSize 에 맞춰 반올림한 가격 문자열"""
+    if rules.tick_size > 0:
+        price = round(price / rules.tick_size) * rules.tick_size
+    return f"{price:.{rules.price_precision}f}"
+
+
+def protective_prices(is_long: bool, ref_price: float) -> tuple[float, float]:
+    """(익절가, 손절가). 숏은 TP_RATIO/SL_RATIO 를 기준가 반대편으로 뒤집어 적용"""
+    if is_long:
+        return ref_price * TP_RATIO, ref_price * SL_RATIO
+    return ref_price * (2.0 - TP_RATIO), ref_price * (2.0 - SL_RATIO)
+
+
+def _close_params(
+    symbol: str,
+    close_side: str,
+    position_side: str | None,
+    order_type: str,
+    qty_str: str,
+    stop_price: str,
+    cid: str,
+) -> dict:
+    # batchOrders 는 JSON 으로 직렬화되므로 값은 모두 문자열
+    params = {
+        "symbol": symbol,
+        "side": close_side,
+        "type": order_type,
+        "quantity": qty_str,
+        "stopPrice": stop_price,
+        "workingType": "MARK_PRICE",
+        "newClientOrderId": cid,
+    }
+    if position_side is None:
+        # one-way: 여러 프로필이 순포지션을 공유 → closePosition 대신 수량 + reduceOnly
+        params["reduceOnly"] = "true"
+    else:
+        # hedge: positionSide 반대 방향이면 청산 주문 (reduceOnly 보내면 -1106)
+        params["positionSide"] = position_side
+    return params
+
+
+def build_batch(
+    symbol: str,
+    is_long: bool,
+    qty: float,
+    rules: SymbolRules,
+    ref_price: float,
+    profile: str,
+    use_initial_capital: bool,
+    position_side: str | None = None,
+    entry_qty: float | None = None,
+) -> list[dict]:
+    """
+    [시장가 진입, 부분 익절(TAKE_PROFIT_MARKET), 손절(STOP_MARKET)]
+    - 익절 수량: qty × TP_PART_RATIO 를 stepSize 로 내림. minQty 미만이면 익절 주문 생략
+    - 손절 수량: 진입 수량 전체 (익절 체결 후 남은 수량으로 다시 냄)
+    - entry_qty: 진입 주문 수량이 qty 와 다를 때 (반대 포지션 청산분을 합친 one-way 플립 주문)
+    """
+    qty_str = f"{qty:.{rules.qty_precision}f}"
+    entry = {
+        "symbol": symbol,
+        "side": SIDE_BUY if is_long else SIDE_SELL,
+        "type": ORDER_TYPE_MARKET,
+        "quantity": qty_str if entry_qty is None else f"{entry_qty:.{rules.qty_precision}f}",
+        # 응답에 체결 결과(avgPrice)까지 → 호출부 재조회 불필요
+        "newOrderRespType": RESP_RESULT,
+    }
+    if position_side is not None:
+        entry["positionSide"] = position_side
+
+    close_side = SIDE_SELL if is_long else SIDE_BUY
+    tp_price, sl_price = protective_prices(is_long, ref_price)
+    lot = _lot_id()
+    batch = [entry]
+
+    tp_qty = min(math.floor(qty * TP_PART_RATIO / rules.step_size) * rules.step_size, qty)
+    if tp_qty >= rules.min_qty:
+        batch.append(_close_params(
+            symbol, close_side, position_side, "TAKE_PROFIT_MARKET",
+            f"{tp_qty:.{rules.qty_precision}f}", format_price(tp_price, rules),
+            client_order_id(KIND_TP, profile, position_side, use_initial_capital, lot),
+        ))
+
+    batch.append(_close_params(
+        symbol, close_side, position_side, "STOP_MARKET",
+        qty_str, format_price(sl_price, rules),
+        client_order_id(KIND_SL, profile, position_side, use_initial_capital, lot),
+    ))
+    return batch
+
+
+@timed("entry_with_protection")
+async def place_entry_with_protection(
+    client,
+    symbol: str,
+    is_long: bool,
+    qty: float,
+    rules: SymbolRules,
+    ref_price: float,
+    profile: str,
+    use_initial_capital: bool,
+    position_side: str | None = None,
+    entry_qty: float | None = None,
+) -> tuple[dict, list[dict]]:
+    """
+    진입 + 보호 주문을 batchOrders 한 번으로 전송 (왕복 1회, 진입과 보호 주문 사이 무방비 구간 없음).
+    반환: (진입 주문 응답, 보호 주문 결과 목록)
+    - 진입이 거부되면 접수된 보호 주문을 취소하고 HTTPException
+    - 보호 주문만 거부되면 진입 체결 후 실제 체결가 기준으로 개별 재전송 (_retry_rejected).
+      그래도 거부되면 결과 목록에 error 로 남김 (라우터가 status=partial 로 표시)
+    """
+    batch = build_batch(symbol, is_long, qty, rules, ref_price, profile, use_initial_capital, position_side, entry_qty)
+    results = await client.futures_place_batch_order(batchOrders=batch)
+
+    entry = results[0]
+    protection = []
+    for params, res in zip(batch[1:], results[1:]):
+        item = {
+            "type": params["type"],
+            "clientOrderId": params["newClientOrderId"],
+            "qty": float(params["quantity"]),
+            "stopPrice": float(params["stopPrice"]),
+        }
+        if "code" in res:
+            item["error"] = f"{res.get('code')}: {res.get('msg')}"
+        else:
+            item["orderId"] = res.get("orderId")
+        protection.append(item)
+
+    if "code" in entry:
+        placed = [p["clientOrderId"] for p in protection if "error" not in p]
+        await _cancel_ids(client, symbol, placed)
+        raise HTTPException(status_code=400, detail=f"Entry order rejected: {entry.get('code')}: {entry.get('msg')}")
+
+    rejected = [item for item in protection if "error" in item]
+    if rejected:
+        params_by_id = {params["newClientOrderId"]: params for params in batch[1:]}
+        await _retry_rejected(client, symbol, is_long, entry, rejected, params_by_id, rules, ref_price, profile)
+
+    for item in protection:
+        if "error" in item:
+            logger.error(f"[Protect] {profile}:{symbol} {item['type']} rejected, position is unprotected: {item['error']}")
+        else:
+            logger.info(f"[Protect] {profile}:{symbol} {item['type']} {item['qty']}@{item['stopPrice']} ({item['clientOrderId']})")
+    return entry, protection
+
+
+async def _retry_rejected(
+    client,
+    symbol: str,
+    is_long: bool,
+    entry: dict,
+    rejected: list[dict],
+    params_by_id: dict[str, dict],
+    rules: SymbolRules,
+    ref_price: float,
+    profile: str,
+) -> None:
+    """
+    batchOrders 는 실행 순서를 보장하지 않아 reduceOnly 익절/손절이 진입 체결 전에 거부될 수 있음.
+    진입 체결을 확인한 뒤 실제 평균 체결가 기준 가격으로 거부된 주문만 개별 전송 (같은 clientOrderId 재사용 → 짝 주문 처리 유지).
+    결과는 rejected 항목에 그대로 반영.
+    """
+    if not is_filled(entry):
+        await wait_for_order(entry.get("orderId"), FILL_EVENT_TIMEOUT)
+    tp_price, sl_price = protective_prices(is_long, known_avg_price(entry) or ref_price)
+
+    async def retry(item: dict) -> None:
+        params = dict(params_by_id[item["clientOrderId"]])
+        params["stopPrice"] = format_price(tp_price if params["type"] == "TAKE_PROFIT_MARKET" else sl_price, rules)
+        try:
+            res = await client.futures_create_order(**params)
+        except Exception as e:
+            item["error"] = str(e)
+            return
+        logger.info(f"[Protect] {profile}:{symbol} {item['type']} re-placed after entry fill ({item['clientOrderId']})")
+        del item["error"]
+        item["orderId"] = res.get("orderId")
+        item["stopPrice"] = float(params["stopPrice"])
+        item["retried"] = True
+
+    await asyncio.gather(*(retry(item) for item in rejected))
+
+
+async def _cancel_ids(client, symbol: str, client_ids: list[str]) -> None:
+    async def cancel(cid: str) -> None:
+        try:
+            await client.futures_cancel_order(symbol=symbol, origClientOrderId=cid)
+            logger.info(f"[Protect] Canceled {cid}")
+        except Exception as e:
+            # 이미 체결/만료된 주문 (-2011) 등
+            logger.info(f"[Protect] Cancel {cid} skipped: {e}")
+
+    if client_ids:
+        await asyncio.gather(*(cancel(cid) for cid in client_ids))
+
+
+@timed("cancel_protective")
+async def cancel_protective(client, symbol: str, profile: str, position_side: str | None = None) -> None:
+    """해당 프로필/포지션 방향의 열린 보호 주문 전부 취소 (웹훅 STOP 으로 직접 청산할 때)"""
+    open_orders = await client.futures_get_open_orders(symbol=symbol)
+    ids = []
+    for order in open_orders:
+        parsed = parse_client_order_id(order.get("clientOrderId"))
+        if parsed is not None and parsed[1] == profile and parsed[2] == position_side:
+            ids.append(order["clientOrderId"])
+    await _cancel_ids(client, symbol, ids)
+
+
+def parse_fill(msg: dict) -> ProtectiveFill | None:
+    """ORDER_TRADE_UPDATE 가 보호 주문의 종료(체결분 있음) 이벤트면 ProtectiveFill, 아니면 None"""
+    o = msg.get("o", {})
+    parsed = parse_client_order_id(o.get("c"))
+    if parsed is None or o.get("X") not in ("FILLED", "EXPIRED", "CANCELED"):
+        return None
+    qty = float(o.get("z", 0.0) or 0.0)
+    if qty <= 0:
+        return None
+    kind, profile, position_side, use_initial_capital, lot = parsed
+    return ProtectiveFill(
+        kind=kind,
+        profile=profile,
+        position_side=position_side,
+        use_initial_capital=use_initial_capital,
+        lot=lot,
+        symbol=o.get("s"),
+        side=o.get("S"),
+        qty=qty,
+        price=float(o.get("ap", 0.0) or 0.0),
+        stop_price=float(o.get("sp", 0.0) or 0.0),
+    )
+
+
+async def _after_fill(fill: ProtectiveFill, remaining: float) -> None:
+    client = await get_binance_async_client()
+    tp_id = client_order_id(KIND_TP, fill.profile, fill.position_side, fill.use_initial_capital, fill.lot)
+    sl_id = client_order_id(KIND_SL, fill.profile, fill.position_side, fill.use_initial_capital, fill.lot)
+    rules = lookup_symbol_rules(fill.symbol)
+    if fill.kind == KIND_SL or remaining <= 0 or rules is None:
+        # 손절 체결(또는 전량 청산) → 남은 짝 주문 정리
+        await _cancel_ids(client, fill.symbol, [tp_id] if fill.kind == KIND_SL else [sl_id])
+        return
+
+    # 부분 익절 → 손절을 남은 수량으로 다시 냄 (STOP_MARKET 은 수량 변경 API 가 없음, clientOrderId 재사용 불가 → 끝에 r)
+    try:
+        old = await client.futures_cancel_order(symbol=fill.symbol, origClientOrderId=sl_id)
+    except Exception as e:
+        logger.info(f"[Protect] {sl_id} not open anymore, not resizing: {e}")
+        return
+
+    params = _close_params(
+        fill.symbol, fill.side, fill.position_side, "STOP_MARKET",
+        f"{remaining:.{rules.qty_precision}f}", str(old.get("stopPrice")), f"{sl_id}r",
+    )
+    try:
+        await client.futures_create_order(**params)
+        logger.info(f"[Protect] {fill.profile}:{fill.symbol} stop resized to {params['quantity']} ({params['newClientOrderId']})")
+    except Exception:
+        logger.exception(f"[Protect] Failed to re-place stop for {fill.profile}:{fill.symbol}")
+
+
+def schedule_after_fill(fill: ProtectiveFill, remaining: float) -> None:
+    """
+    체결 핸들러(동기)에서 짝 주문 정리를 백그라운드로.
+    - 손절 체결: 익절 취소 / 익절 체결: 손절을 remaining 수량으로 다시 냄 (0 이면 취소)
+    """
+    task = asyncio.get_running_loop().create_task(_after_fill(fill, remaining))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
@@ -0,0 +1,128 @@
+# app/services/runtime.py
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from app.config import BACKGROUND_RESTART_BASE, BACKGROUND_RESTART_MAX, BACKGROUND_STOP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 이 시간(초) 이상 돌다가 죽었으면 일시 장애로 보고 backoff 를 처음부터
+_STABLE_SECONDS = 60.0
+
+
+@dataclass(slots=True)
+class Worker:
+    name: str
+    factory: Callable[[], Awaitable[None]]
+    status: str = "idle"              # idle / running / backoff / finished / stopped
+    restarts: int = 0
+    failures: int = 0                 # 연속 실패 수 (backoff 계산용)
+    started_at: float = 0.0
+    last_error: str = ""
+    last_error_at: float = 0.0
+    next_start_at: float = 0.0
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "restarts": self.restarts,
+            "uptime": round(time.time() - self.started_at, 1) if self.status == "running" else 0.0,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at,
+            "next_start_in": round(max(self.next_start_at - time.time(), 0.0), 1) if self.status == "backoff" else 0.0,
+        }
+
+
+class BackgroundRuntime:
+    """
+    앱 이벤트 루프 위의 백그라운드 작업 (스트림 소비, 가격/심볼 규칙 갱신, 동기화, flush 루프).
+    - 작업은 코루틴 함수 하나: 정상 return = 끝남(재시작 안 함), 예외 = backoff 후 재시작
+    - backoff: BACKGROUND_RESTART_BASE × 2^(연속 실패-1), 상한 BACKGROUND_RESTART_MAX, ±20% jitter
+    - stop(): 등록 역순으로 취소 후 BACKGROUND_STOP_TIMEOUT 까지 대기
+    스레드를 쓰지 않으므로 monitor_states 등 공유 상태는 요청 처리와 같은 루프에서만 바뀜.
+    """
+
+    def __init__(self):
+        self._workers: dict[str, Worker] = {}
+        self._started = False
+
+    def add(self, name: str, factory: Callable[[], Awaitable[None]]) -> None:
+        """작업 등록. 이미 시작된 상태면 바로 띄움"""
+        if name in self._workers:
+            raise ValueError(f"background worker {name!r} already registered")
+        worker = self._workers[name] = Worker(name, factory)
+        if self._started:
+            self._spawn(worker)
+
+    def _spawn(self, worker: Worker) -> None:
+        worker.task = asyncio.get_running_loop().create_task(self._supervise(worker), name=f"bg:{worker.name}")
+
+    async def _supervise(self, worker: Worker) -> None:
+        while True:
+            worker.status = "running"
+            worker.started_at = time.time()
+            try:
+                await worker.factory()
+            except asyncio.CancelledError:
+                worker.status = "stopped"
+                raise
+            except Exception as e:
+                ran = time.time() - worker.started_at
+                worker.failures = 1 if ran >= _STABLE_SECONDS else worker.failures + 1
+                worker.restarts += 1
+                worker.last_error = f"{type(e).__name__}: {e}"
+                worker.last_error_at = time.time()
+                delay = min(BACKGROUND_RESTART_BASE * 2 ** (worker.failures - 1), BACKGROUND_RESTART_MAX)
+                delay *= random.uniform(0.8, 1.2)
+                worker.status = "backoff"
+                worker.next_start_at = time.time() + delay
+                logger.exception(f"[Runtime] {worker.name} failed, restarting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            worker.status = "finished"
+            logger.info(f"[Runtime] {worker.name} finished")
+            return
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        for worker in self._workers.values():
+            self._spawn(worker)
+        logger.info(f"[Runtime] Started {len(self._workers)} workers: {', '.join(self._workers)}")
+
+    async def stop(self) -> None:
+        """등록 역순으로 취소. 제한 시간 안에 안 끝나는 작업은 로그만 남김"""
+        workers = [w for w in reversed(self._workers.values()) if w.task is not None]
+        for worker in workers:
+            worker.task.cancel()
+
+        tasks = [w.task for w in workers]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=BACKGROUND_STOP_TIMEOUT)
+            for task in pending:
+                logger.warning(f"[Runtime] {task.get_name()} did not stop within {BACKGROUND_STOP_TIMEOUT}s")
+
+        for worker in workers:
+            worker.task = None
+            if worker.status != "finished":
+                worker.status = "stopped"
+        self._workers.clear()
+        self._started = False
+
+    def healthy(self) -> bool:
+        return all(w.status in ("running", "finished") for w in self._workers.values())
+
+    def snapshot(self) -> dict[str, dict]:
+        return {name: w.snapshot() for name, w in self._workers.items()}
+
+
+runtime = BackgroundRuntime()
@@ -3,14 +3,20 @@ import math
 from fastapi import HTTPException
 from binance.enums import SIDE_SELL, ORDER_TYPE_MARKET
 from binance.exceptions import BinanceAPIException
-from app.clients.binance_client import get_binance_client
-from app.config import DRY_RUN, TRADE_LEVERAGE, BUY_PCT
+from app.clients.binance_async_client import get_binance_async_client
+from app.config import DRY_RUN, TRADE_LEVERAGE, BUY_PCT, PROTECTIVE_ORDERS
 from app.state import get_state
+from app.services.order_pipeline import fetch_pretrade, create_order, fill_price
+from app.services.position_book import expect_update
+from app.services.trade_ledger import record_entry
+from app.services.protective_orders import place_entry_with_protection
+from app.metrics import timed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def execute_sell(
+@timed("execute_sell")
+async def execute_sell(
     symbol: str,
     leverage: int | None = None,
     use_initial_capital: bool = False,
@@ -21,36 +27,29 @@ def execute_sell(
     - use_initial_capital=False: state['capital'] 기준 사이징(복리, /webhook)
     - profile: "webhook1" | "webhook2" | "webhook3"
     """
-    client = get_binance_client()
+    client = await get_binance_async_client()
     state = get_state(symbol, profile)
 
     if DRY_RUN:
         logger.info(f"[DRY_RUN] SELL {symbol}")
         return {"skipped": "dry_run"}
 
-    # 레버리지 설정 (우선순위: 인자 > 글로벌 설정)
+    # 레버리지 설정 (우선순위: 인자 > 글로벌 설정, 거래소 값과 같으면 생략)
+    # + 마크가격 + 심볼 규칙: 서로 독립이라 동시에 (캐시 미스인 것만 왕복)
     leverage_to_use = leverage or TRADE_LEVERAGE
-    client.futures_change_leverage(symbol=symbol, leverage=leverage_to_use)
+    mark_price, rules = await fetch_pretrade(client, symbol, leverage_to_use)
 
     # ⬇️ 핵심: 사이징 기준 자본 선택
-    base_capital = (
-        state.get("initial_capital", 0.0)
-        if use_initial_capital
-        else state.get("capital", 0.0)
-    )
+    base_capital = state.initial_capital if use_initial_capital else state.capital
     
     # 수량 계산
-    mark_price = float(client.futures_mark_price(symbol=symbol)["markPrice"])
     allocation = base_capital * BUY_PCT * leverage_to_use
     raw_qty = allocation / mark_price
 
     # 거래소 LOT_SIZE 규칙에 맞춰 수량 보정
-    info = client.futures_exchange_info()
-    sym_info = next(s for s in info["symbols"] if s["symbol"] == symbol)
-    lot_f = next(f for f in sym_info["filters"] if f["filterType"] == "LOT_SIZE")
-    step = float(lot_f["stepSize"])
-    min_qty = float(lot_f["minQty"])
-    qty_prec = int(round(-math.log10(step), 0)) if step > 0 else 0
+    step = rules.step_size
+    min_qty = rules.min_qty
+    qty_prec = rules.qty_precision
 
     qty = math.floor(raw_qty / step) * step
     if qty < min_qty:
@@ -58,22 +57,24 @@ def execute_sell(
 
     qty_str = f"{qty:.{qty_prec}f}"
 
-    # 시장가 숏 진입
-    order = client.futures_create_order(
-        symbol=symbol,
-        side=SIDE_SELL,
-        type=ORDER_TYPE_MARKET,
-        quantity=qty_str
-    )
+    # 시장가 숏 진입 (PROTECTIVE_ORDERS 면 익절/손절 주문까지 한 번에)
+    with expect_update(symbol):
+        protection = None
+        if PROTECTIVE_ORDERS:
+            order, protection = await place_entry_with_protection(
+                client, symbol, False, qty, rules, mark_price, profile, use_initial_capital
+            )
+        else:
+            order = await create_order(
+                client,
+                symbol=symbol,
+                side=SIDE_SELL,
+                type=ORDER_TYPE_MARKET,
+                quantity=qty_str
+            )
 
-    # 주문 상세 재조회 → avgPrice 보정
-    order_id = order.get("orderId")
-    try:
-        filled_order = client.futures_get_order(symbol=symbol, orderId=order_id)
-        entry = float(filled_order.get("avgPrice") or mark_price)
-    except Exception as e:
-        logger.warning(f"[SELL] Failed to fetch avgPrice via orderId {order_id}: {e}")
-        entry = mark_price
+    # RESULT 응답의 avgPrice 사용 (아직 체결 전일 때만 재조회)
+    entry = await fill_price(client, symbol, order, mark_price)
 
     logger.info(
         f"[SELL] {profile}:{symbol} {qty}@{entry} "
@@ -81,14 +82,16 @@ def execute_sell(
     )
 
     # 상태 저장 (진입 정보 및 카운트)
-    state.update({
-        "entry_price":   entry,
-        "position_qty":  -qty,
-        "current_price": entry,
-        "position_side": "short",
-        "leverage":      leverage_to_use,
-        "short_count":   state.get("short_count", 0) + 1,
-        "trade_count":   state.get("trade_count", 0) + 1
-    })
+    state.entry_price   = entry
+    state.position_qty  = -qty
+    state.current_price = entry
+    state.position_side = "short"
+    state.leverage      = leverage_to_use
+    state.short_count  += 1
+    state.trade_count  += 1
+    record_entry(profile, symbol, False, qty, entry, leverage_to_use)
 
-    return {"sell": {"filled": qty, "entry": entry}}
\ No newline at end of file
+    result = {"sell": {"filled": qty, "entry": entry}}
+    if protection is not None:
+        result["protection"] = protection
+    return result
\ No newline at end of file
@@ -1,15 +1,19 @@
 import logging
 import math
 from binance.enums import SIDE_BUY, ORDER_TYPE_MARKET
-from app.clients.binance_client import get_binance_client
+from app.clients.binance_async_client import get_binance_async_client
 from app.config import TRADE_LEVERAGE, DRY_RUN
 from app.state import get_state
+from app.services.order_pipeline import fetch_pretrade, create_order, fill_price
+from app.services.position_book import expect_update
+from app.metrics import timed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-def execute_simple_buy(symbol: str):
-    client = get_binance_client()
+@timed("execute_simple_buy")
+async def execute_simple_buy(symbol: str):
+    client = await get_binance_async_client()
     state = get_state(symbol)
 
     if DRY_RUN:
@@ -17,20 +21,12 @@ def execute_simple_buy(symbol: str):
         return {"skipped": "dry_run"}
 
     try:
-        # 1) 레버리지 설정
-        client.futures_change_leverage(symbol=symbol, leverage=TRADE_LEVERAGE)
-
-        # 2) 자본 및 가격 정보 가져오기
-        capital    = state.get("capital", 0.0)
-        mark_price = float(client.futures_mark_price(symbol=symbol)["markPrice"])
-
-        # 3) 거래 심볼 정보 가져오기 (precision, minQty 등)
-        info     = client.futures_exchange_info()
-        sym_info = next(s for s in info["symbols"] if s["symbol"] == symbol)
-        lot_f    = next(f for f in sym_info["filters"] if f["filterType"] == "LOT_SIZE")
-        step     = float(lot_f["stepSize"])
-        min_qty  = float(lot_f["minQty"])
-        qty_prec = int(round(-math.log10(step), 0))
+        # 1~3) 레버리지 설정 + 가격 + 거래 심볼 정보(precision, minQty 등) 동시에
+        mark_price, rules = await fetch_pretrade(client, symbol, TRADE_LEVERAGE)
+        capital  = state.get("capital", 0.0)
+        step     = rules.step_size
+        min_qty  = rules.min_qty
+        qty_prec = rules.qty_precision
 
         # 4) 진입 가능한 최소 자본 확인
         min_required_capital = (min_qty * mark_price) / TRADE_LEVERAGE
@@ -66,12 +62,12 @@ def execute_simple_buy(symbol: str):
 
         # 7) 시장가 매수
         qty_str = f"{qty:.{qty_prec}f}"
-        order = client.futures_create_order(
-            symbol=symbol, side=SIDE_BUY,
-            type=ORDER_TYPE_MARKET, quantity=qty_str
-        )
-        details = client.futures_get_order(symbol=symbol, orderId=order["orderId"])
-        entry   = float(details["avgPrice"])
+        with expect_update(symbol):
+            order = await create_order(
+                client, symbol=symbol, side=SIDE_BUY,
+                type=ORDER_TYPE_MARKET, quantity=qty_str
+            )
+        entry = await fill_price(client, symbol, order, mark_price)
 
         logger.info(f"[BUY] {symbol} {qty}@{entry}")
         return {"buy": {"filled": qty, "entry": entry}}
@@ -0,0 +1,212 @@
+# app/services/state_journal.py
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from app.config import STATE_DB_PATH, STATE_FLUSH_INTERVAL, STATE_SNAPSHOT_ROWS
+from app.state import monitor_states, load_states, drain_dirty, mark_dirty
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# SQLite (WAL) 두 테이블
+# - journal : 변경된 상태 한 건씩 append (seq 순서 = 적용 순서)
+# - snapshot: key 별 마지막 상태. 저널이 STATE_SNAPSHOT_ROWS 를 넘으면 저널을 여기로 압축
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS journal ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, data TEXT NOT NULL, ts REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS snapshot ("
+    " key TEXT PRIMARY KEY, data TEXT NOT NULL, seq INTEGER NOT NULL)",
+)
+
+_conn: sqlite3.Connection | None = None
+_journal_rows = 0
+# 스레드에서 실행 중인 디스크 쓰기 (_append / _compact). flush 가 취소돼도 스레드는 계속 돌므로
+# 같은 연결을 쓰기 전에(stop_state_journal) 끝날 때까지 기다려야 함
+_inflight: asyncio.Future | None = None
+
+journal_stats: dict[str, float] = {
+    "loaded_states": 0,
+    "replayed_rows": 0,
+    "load_seconds": 0.0,
+    "flushes": 0,
+    "rows_written": 0,
+    "snapshots": 0,
+    "last_flush": 0.0,
+    "errors": 0,
+}
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # autocommit 모드 + 명시적 트랜잭션. flush 는 asyncio.to_thread 로 한 번에 하나씩만 실행
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for ddl in _SCHEMA:
+        conn.execute(ddl)
+    return conn
+
+
+def load_state_journal(path: str = STATE_DB_PATH) -> int:
+    """
+    기동 시 1회 (동기): 스냅샷 적재 후 저널 꼬리를 seq 순으로 재생해 monitor_states 를 복원합니다.
+    복원한 상태 수를 반환. path 가 비어 있으면 영속화를 끕니다.
+    """
+    global _conn, _journal_rows
+
+    if not path:
+        logger.info("[StateJournal] STATE_DB_PATH not set, state will not persist")
+        return 0
+
+    start = time.perf_counter()
+    _conn = _connect(path)
+
+    rows: dict[str, str] = dict(_conn.execute("SELECT key, data FROM snapshot"))
+    replayed = 0
+    for key, data in _conn.execute("SELECT key, data FROM journal ORDER BY seq"):
+        rows[key] = data
+        replayed += 1
+    _journal_rows = replayed
+
+    load_states({key: json.loads(data) for key, data in rows.items()})
+
+    journal_stats["loaded_states"] = len(rows)
+    journal_stats["replayed_rows"] = replayed
+    journal_stats["load_seconds"] = round(time.perf_counter() - start, 4)
+    logger.info(
+        f"[StateJournal] Restored {len(rows)} states ({replayed} journal rows) "
+        f"in {journal_stats['load_seconds'] * 1000:.1f}ms from {path}"
+    )
+    return len(rows)
+
+
+def _append(rows: list[tuple[str, str, float]]) -> None:
+    _conn.execute("BEGIN")
+    try:
+        _conn.executemany("INSERT INTO journal (key, data, ts) VALUES (?, ?, ?)", rows)
+        _conn.execute("COMMIT")
+    except BaseException:
+        _conn.execute("ROLLBACK")
+        raise
+
+
+def _compact() -> None:
+    """저널의 key 별 최신 행을 스냅샷으로 옮기고 저널을 비웁니다."""
+    _conn.execute("BEGIN IMMEDIATE")
+    try:
+        (max_seq,) = _conn.execute("SELECT MAX(seq) FROM journal").fetchone()
+        if max_seq is not None:
+            _conn.execute(
+                "INSERT OR REPLACE INTO snapshot (key, data, seq) "
+                "SELECT key, data, seq FROM journal "
+                "WHERE seq IN (SELECT MAX(seq) FROM journal WHERE seq <= ? GROUP BY key)",
+                (max_seq,),
+            )
+            _conn.execute("DELETE FROM journal WHERE seq <= ?", (max_seq,))
+        _conn.execute("COMMIT")
+    except BaseException:
+        _conn.execute("ROLLBACK")
+        raise
+    _conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def _collect() -> tuple[list[str], list[tuple[str, str, float]]]:
+    # 직렬화는 이벤트 루프 위에서 (상태가 쓰는 도중 바뀌지 않도록), 디스크 쓰기만 스레드로
+    keys = drain_dirty()
+    now = time.time()
+    rows = [(key, json.dumps(monitor_states[key].to_dict()), now) for key in keys if key in monitor_states]
+    return keys, rows
+
+
+async def _in_thread(fn, *args) -> None:
+    """fn 을 스레드에서 실행. 호출한 쪽이 취소돼도 쓰기 자체는 끝까지 (shield)"""
+    global _inflight
+
+    _inflight = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    await asyncio.shield(_inflight)
+
+
+async def flush() -> int:
+    """dirty 상태를 저널에 한 트랜잭션으로 기록. 기록한 행 수 반환"""
+    global _journal_rows
+
+    if _conn is None:
+        return 0
+
+    keys, rows = _collect()
+    if not rows:
+        return 0
+
+    try:
+        await _in_thread(_append, rows)
+    except asyncio.CancelledError:
+        # 기록 완료 여부를 알 수 없음 → 다시 dirty (중복 기록돼도 마지막 상태는 같음)
+        mark_dirty(keys)
+        raise
+    except Exception:
+        # 다음 주기에 다시 시도
+        mark_dirty(keys)
+        journal_stats["errors"] += 1
+        raise
+
+    _journal_rows += len(rows)
+    journal_stats["flushes"] += 1
+    journal_stats["rows_written"] += len(rows)
+    journal_stats["last_flush"] = time.time()
+
+    if _journal_rows >= STATE_SNAPSHOT_ROWS:
+        await _in_thread(_compact)
+        _journal_rows = 0
+        journal_stats["snapshots"] += 1
+        logger.info("[StateJournal] Journal compacted into snapshot")
+
+    return len(rows)
+
+
+async def run_state_journal() -> None:
+    """주기적 flush (백그라운드 작업, app/services/runtime.py 가 실행). 영속화를 껐으면 바로 끝남"""
+    if _conn is None:
+        return
+    logger.info(f"[StateJournal] Flushing every {STATE_FLUSH_INTERVAL}s")
+    while True:
+        await asyncio.sleep(STATE_FLUSH_INTERVAL)
+        try:
+            await flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("[StateJournal] Flush failed")
+
+
+async def stop_state_journal() -> None:
+    """(runtime 이 flush 작업을 멈춘 뒤) 남은 변경 기록 → 스냅샷 압축 후 닫기"""
+    global _conn, _journal_rows
+
+    if _conn is None:
+        return
+
+    # 취소된 flush 의 스레드 쓰기가 남아 있으면 같은 연결을 쓰기 전에 끝날 때까지 대기
+    if _inflight is not None and not _inflight.done():
+        try:
+            await _inflight
+        except Exception:
+            logger.exception("[StateJournal] In-flight flush failed")
+
+    try:
+        _, rows = _collect()
+        if rows:
+            _append(rows)
+        _compact()
+        _journal_rows = 0
+    except Exception:
+        logger.exception("[StateJournal] Final flush failed")
+    finally:
+        _conn.close()
+        _conn = None
@@ -1,21 +1,52 @@
 import logging
+import asyncio
+import math
 import time
 from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET
-from app.clients.binance_client import get_binance_client
-from app.config import DRY_RUN, POLL_INTERVAL, MAX_WAIT, FEE_RATE
+from app.clients.binance_async_client import get_binance_async_client
+from app.config import (
+    DRY_RUN, POLL_INTERVAL, MAX_WAIT, FEE_RATE, FILL_EVENT_TIMEOUT,
+    TRADE_LEVERAGE, BUY_PCT, PROTECTIVE_ORDERS, SWITCH_FLIP_ORDER,
+)
 from app.services.buy import execute_buy
 from app.services.sell import execute_sell
+from app.services.mark_price import get_mark_price
+from app.services.order_events import wait_for_order, get_final_order
+from app.services.order_pipeline import (
+    create_order, fetch_pretrade, is_filled, known_avg_price, known_executed_qty,
+)
+from app.services.user_stream import is_connected
 from app.state import get_state
+from app.services.position_book import expect_update, get_positions
+from app.services.trade_ledger import record_entry, record_exit
+from app.services.protective_orders import (
+    parse_fill, schedule_after_fill, place_entry_with_protection, cancel_protective,
+)
+from app.services.symbol_rules import get_symbol_rules
+from app.services.trigger_engine import engine as trigger_engine, Trigger
+from app.metrics import timed, track_alert
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def _wait_for(symbol: str, target_amt: float) -> bool:
-    client = get_binance_client()
+@timed("wait_fill")
+async def _wait_for(symbol: str, target_amt: float, order: dict | None = None) -> bool:
+    # 0) RESULT 응답에서 이미 체결 확인됨
+    if order is not None and is_filled(order):
+        return True
+
+    # 1) user-data stream ORDER_TRADE_UPDATE 로 체결 확인 (폴링 지연 없음)
+    if order is not None and is_connected():
+        fill = await wait_for_order(order.get("orderId"), FILL_EVENT_TIMEOUT)
+        if fill is not None and fill["status"] == "FILLED":
+            return True
+
+    # 2) 이벤트 미수신/스트림 단절 시 기존 REST 폴링으로 대체
+    client = await get_binance_async_client()
     start = time.time()
     while time.time() - start < MAX_WAIT:
-        positions = client.futures_position_information(symbol=symbol)
+        positions = await client.futures_position_information(symbol=symbol)
         current = next(
             (float(p["positionAmt"]) for p in positions if p["symbol"] == symbol),
             0.0
@@ -26,21 +57,23 @@ def _wait_for(symbol: str, target_amt: float) -> bool:
             return True
         if target_amt == 0 and current == 0:
             return True
-        time.sleep(POLL_INTERVAL)
+        await asyncio.sleep(POLL_INTERVAL)
     logger.warning(f"Switch timeout: target {target_amt}, current {current}")
     return False
 
 
-def _cancel_open_reduceonly_orders(symbol: str):
-    client = get_binance_client()
-    open_orders = client.futures_get_open_orders(symbol=symbol)
+@timed("cancel_reduceonly")
+async def _cancel_open_reduceonly_orders(symbol: str):
+    client = await get_binance_async_client()
+    open_orders = await client.futures_get_open_orders(symbol=symbol)
     for order in open_orders:
         if order.get("reduceOnly"):
-            client.futures_cancel_order(symbol=symbol, orderId=order["orderId"])
+            await client.futures_cancel_order(symbol=symbol, orderId=order["orderId"])
             logger.info(f"[Cleanup] Canceled reduceOnly order {order['orderId']}")
 
 
-def switch_position(
+@track_alert
+async def switch_position(
     symbol: str,
     action: str,
     profile: str = "webhook1",
@@ -57,14 +90,14 @@ def switch_position(
       - 포지션 사이징 시 initial_capital만 사용
       - 청산 후 capital 갱신(복리) 금지
     """
-    client = get_binance_client()
+    client = await get_binance_async_client()
     state = get_state(symbol, profile)
 
     if DRY_RUN:
         logger.info(f"[DRY_RUN] switch_position {action} {symbol}")
         return {"skipped": "dry_run"}
 
-    positions = client.futures_position_information(symbol=symbol)
+    positions = await get_positions(client, symbol)
     current_amt = next(
         (float(p["positionAmt"]) for p in positions if p["symbol"] == symbol),
         0.0
@@ -72,18 +105,20 @@ def switch_position(
 
     # === BUY_STOP : 롱 청산 ===
     if action.upper() == "BUY_STOP" and current_amt > 0:
-        _cancel_open_reduceonly_orders(symbol)
-        order = client.futures_create_order(
-            symbol=symbol,
-            side=SIDE_SELL,
-            type=ORDER_TYPE_MARKET,
-            quantity=abs(current_amt),
-            reduceOnly=True
-        )
-        _wait_for(symbol, 0.0)
-        _cancel_open_reduceonly_orders(symbol)
+        await _cancel_open_reduceonly_orders(symbol)
+        with expect_update(symbol):
+            order = await create_order(
+                client,
+                symbol=symbol,
+                side=SIDE_SELL,
+                type=ORDER_TYPE_MARKET,
+                quantity=abs(current_amt),
+                reduceOnly=True
+            )
+        await _wait_for(symbol, 0.0, order)
+        await _cancel_open_reduceonly_orders(symbol)
 
-        exit_price = _get_exit_price(client, symbol, order)
+        exit_price = await _get_exit_price(client, symbol, order)
         pnl_percent = _update_capital_after_exit(
             symbol, 
             long_exit=True, 
@@ -95,18 +130,20 @@ def switch_position(
 
     # === SELL_STOP : 숏 청산 ===
     if action.upper() == "SELL_STOP" and current_amt < 0:
-        _cancel_open_reduceonly_orders(symbol)
-        order = client.futures_create_order(
-            symbol=symbol,
-            side=SIDE_BUY,
-            type=ORDER_TYPE_MARKET,
-            quantity=abs(current_amt),
-            reduceOnly=True
-        )
-        _wait_for(symbol, 0.0)
-        _cancel_open_reduceonly_orders(symbol)
+        await _cancel_open_reduceonly_orders(symbol)
+        with expect_update(symbol):
+            order = await create_order(
+                client,
+                symbol=symbol,
+                side=SIDE_BUY,
+                type=ORDER_TYPE_MARKET,
+                quantity=abs(current_amt),
+                reduceOnly=True
+            )
+        await _wait_for(symbol, 0.0, order)
+        await _cancel_open_reduceonly_orders(symbol)
 
-        exit_price = _get_exit_price(client, symbol, order)
+        exit_price = await _get_exit_price(client, symbol, order)
         pnl_percent = _update_capital_after_exit(
             symbol,
             long_exit=False,
@@ -121,21 +158,29 @@ def switch_position(
         if current_amt > 0:
             return {"skipped": "already_long"}
 
-        _cancel_open_reduceonly_orders(symbol)
+        if current_amt < 0 and SWITCH_FLIP_ORDER:
+            # 숏 청산 + 롱 진입을 주문 1건으로
+            flipped = await _flip_position(client, symbol, positions, True, profile, leverage, use_initial_capital)
+            if flipped is not None:
+                return flipped
+
+        await _cancel_open_reduceonly_orders(symbol)
 
         if current_amt < 0:
             # 먼저 숏 청산
-            order = client.futures_create_order(
-                symbol=symbol,
-                side=SIDE_BUY,
-                type=ORDER_TYPE_MARKET,
-                quantity=abs(current_amt),
-                reduceOnly=True
-            )
-            _wait_for(symbol, 0.0)
-            _cancel_open_reduceonly_orders(symbol)
-
-            exit_price = _get_exit_price(client, symbol, order)
+            with expect_update(symbol):
+                order = await create_order(
+                    client,
+                    symbol=symbol,
+                    side=SIDE_BUY,
+                    type=ORDER_TYPE_MARKET,
+                    quantity=abs(current_amt),
+                    reduceOnly=True
+                )
+            await _wait_for(symbol, 0.0, order)
+            await _cancel_open_reduceonly_orders(symbol)
+
+            exit_price = await _get_exit_price(client, symbol, order)
             _update_capital_after_exit(
                 symbol,
                 long_exit=False,
@@ -145,7 +190,7 @@ def switch_position(
             )
 
         # 롱 진입 (플래그 전파)
-        return execute_buy(
+        return await execute_buy(
             symbol,
             leverage=leverage,
             use_initial_capital=use_initial_capital,
@@ -157,21 +202,29 @@ def switch_position(
         if current_amt < 0:
             return {"skipped": "already_short"}
 
-        _cancel_open_reduceonly_orders(symbol)
+        if current_amt > 0 and SWITCH_FLIP_ORDER:
+            # 롱 청산 + 숏 진입을 주문 1건으로
+            flipped = await _flip_position(client, symbol, positions, False, profile, leverage, use_initial_capital)
+            if flipped is not None:
+                return flipped
+
+        await _cancel_open_reduceonly_orders(symbol)
 
         if current_amt > 0:
             # 먼저 롱 청산
-            order = client.futures_create_order(
-                symbol=symbol,
-                side=SIDE_SELL,
-                type=ORDER_TYPE_MARKET,
-                quantity=current_amt,
-                reduceOnly=True
-            )
-            _wait_for(symbol, 0.0)
-            _cancel_open_reduceonly_orders(symbol)
-
-            exit_price = _get_exit_price(client, symbol, order)
+            with expect_update(symbol):
+                order = await create_order(
+                    client,
+                    symbol=symbol,
+                    side=SIDE_SELL,
+                    type=ORDER_TYPE_MARKET,
+                    quantity=current_amt,
+                    reduceOnly=True
+                )
+            await _wait_for(symbol, 0.0, order)
+            await _cancel_open_reduceonly_orders(symbol)
+
+            exit_price = await _get_exit_price(client, symbol, order)
             _update_capital_after_exit(
                 symbol,
                 long_exit=True,
@@ -181,7 +234,7 @@ def switch_position(
             )
 
         # 숏 진입 (플래그 전파)
-        return execute_sell(
+        return await execute_sell(
             symbol,
             leverage=leverage,
             use_initial_capital=use_initial_capital,
@@ -192,18 +245,273 @@ def switch_position(
     return {"skipped": "unknown_action"}
 
 
-def _get_exit_price(client, symbol: str, order: dict) -> float:
+@timed("flip_position")
+async def _flip_position(
+    client,
+    symbol: str,
+    positions: list[dict],
+    to_long: bool,
+    profile: str,
+    leverage: int | None,
+    use_initial_capital: bool,
+) -> dict | None:
+    """
+    SWITCH_FLIP_ORDER: 반대 포지션 청산 + 신규 진입을 시장가 1건(|current_amt| + 신규 수량)으로.
+    - 신규 수량은 execute_buy/sell 과 같은 사이징. 복리 프로필은 청산분 PnL 을 마크가격으로 추정해 반영한 capital 기준
+    - 체결 수량을 청산분(|current_amt|)과 진입분(나머지)으로 나누고, 체결 리포트의 rp / 수수료로
+      청산분 체결가를 역산해 _update_capital_after_exit, 나머지 금액으로 진입가를 구해 execute_buy/sell 과 같은 상태 갱신
+    - 체결 이벤트를 못 받으면 평균가 하나로 양쪽 정산
+    - 청산분만 체결되면 청산 결과만 반환 (done / exit_price / pnl)
+    - 신규 수량이 minQty 미만이면 None → 호출부의 기존 경로(청산 후 진입 시도)로
+    """
+    state = get_state(symbol, profile)
+    leverage_to_use = leverage or TRADE_LEVERAGE
+    current = next(p for p in positions if p["symbol"] == symbol and float(p["positionAmt"]) != 0)
+    current_amt = float(current["positionAmt"])
+    exchange_entry = float(current.get("entryPrice") or 0.0)
+    close_qty = abs(current_amt)
+    long_exit = not to_long
+
+    # 남은 reduceOnly(익절/손절) 주문 정리와 진입 준비(레버리지/마크가격/규칙)를 동시에
+    _, (mark_price, rules) = await asyncio.gather(
+        _cancel_open_reduceonly_orders(symbol),
+        fetch_pretrade(client, symbol, leverage_to_use),
+    )
+
+    base_capital = state.initial_capital if use_initial_capital else state.capital
+    if not use_initial_capital and state.entry_price > 0 and state.position_qty != 0:
+        _, _, net_est = _net_exit_pnl(state.entry_price, mark_price, long_exit, state.leverage)
+        base_capital *= 1.0 + net_est
+
+    step = rules.step_size
+    new_qty = math.floor(base_capital * BUY_PCT * leverage_to_use / mark_price / step) * step
+    if new_qty < rules.min_qty:
+        logger.warning(f"[FLIP] {profile}:{symbol} new qty {new_qty} < minQty {rules.min_qty}, falling back to close + entry")
+        return None
+
+    total = close_qty + new_qty
+    with expect_update(symbol):
+        protection = None
+        if PROTECTIVE_ORDERS:
+            # 익절/손절 수량은 신규 진입분 기준, 진입 주문만 청산분 포함
+            order, protection = await place_entry_with_protection(
+                client, symbol, to_long, new_qty, rules, mark_price, profile, use_initial_capital,
+                entry_qty=total,
+            )
+        else:
+            order = await create_order(
+                client,
+                symbol=symbol,
+                side=SIDE_BUY if to_long else SIDE_SELL,
+                type=ORDER_TYPE_MARKET,
+                quantity=f"{total:.{rules.qty_precision}f}"
+            )
+    # 청산분 실현손익/수수료는 체결 리포트(ORDER_TRADE_UPDATE rp / n 의 주문 단위 합계)에서 가져옴
+    fill = None
+    if is_connected():
+        fill = await wait_for_order(order.get("orderId"), FILL_EVENT_TIMEOUT)
+    if fill is None:
+        await _wait_for(symbol, 1.0 if to_long else -1.0, order)
+    price = await _get_exit_price(client, symbol, order)
+
+    # 체결 수량을 청산분 / 진입분으로 분리. 응답/이벤트로 모르면 포지션 변화량으로
+    executed = known_executed_qty(order)
+    if executed is None:
+        positions = await get_positions(client, symbol)
+        new_amt = next((float(p["positionAmt"]) for p in positions if p["symbol"] == symbol), 0.0)
+        executed = abs(new_amt - current_amt)
+    closed = min(executed, close_qty)
+    opened = round(max(executed - close_qty, 0.0), rules.qty_precision)
+
+    if closed <= 0:
+        logger.warning(f"[FLIP] {profile}:{symbol} order {order.get('orderId')} filled nothing ({order.get('status')})")
+        return {"skipped": "not_filled"}
+
+    # 평균가 하나로는 청산분 손익을 알 수 없음 → rp 로 청산분 체결가 역산 (rp = (청산가 - 진입가) × 수량, 숏은 반대)
+    exit_price = price
+    exit_fee_rate = None
+    realized = commission = None
+    if fill is not None and fill["executedQty"] > 0:
+        realized = fill["realizedPnl"]
+        if exchange_entry > 0:
+            exit_price = exchange_entry + realized / closed if long_exit else exchange_entry - realized / closed
+        # 수수료는 주문 전체에 대해 한 번 → 청산분 비중만큼 (USDT 로 낸 경우만)
+        if fill.get("commissionAsset") in (None, "USDT"):
+            commission = fill["commission"] * closed / fill["executedQty"]
+            exit_fee_rate = commission / (exit_price * closed)
+
+    pnl_percent = _update_capital_after_exit(
+        symbol,
+        long_exit=long_exit,
+        exit_price=exit_price,
+        profile=profile,
+        use_initial_capital=use_initial_capital,
+        qty=None if closed >= close_qty else closed,
+        exit_fee_rate=exit_fee_rate,
+    )
+
+    logger.info(
+        f"[FLIP] {profile}:{symbol} {'SHORT→LONG' if to_long else 'LONG→SHORT'} {executed}@{price} "
+        f"(close {closed}@{exit_price:.4f} rp={realized} fee={commission}, open {opened}, "
+        f"base={'initial_capital' if use_initial_capital else 'capital'})"
+    )
+
+    closed_info = {"exit_price": exit_price, "pnl": pnl_percent, "realized_pnl": realized, "commission": commission}
+    if opened <= 0:
+        # 청산분만 체결 → 청산 결과만 (진입 상태 기록 없음)
+        return {"done": "buy_stop" if long_exit else "sell_stop", **closed_info}
+
+    # 진입분 평균가 = (전체 체결 금액 - 청산분 금액) / 진입 수량
+    entry = round((price * executed - exit_price * closed) / opened, rules.price_precision)
+    state.entry_price   = entry
+    state.position_qty  = opened if to_long else -opened
+    state.current_price = price
+    state.position_side = "long" if to_long else "short"
+    state.leverage      = leverage_to_use
+    if to_long:
+        state.long_count += 1
+    else:
+        state.short_count += 1
+    state.trade_count  += 1
+    record_entry(profile, symbol, to_long, opened, entry, leverage_to_use)
+
+    result = {
+        "buy" if to_long else "sell": {"filled": opened, "entry": entry},
+        "closed": {"qty": closed, **closed_info},
+    }
+    if protection is not None:
+        result["protection"] = protection
+    return result
+
+
+@timed("reduce_position")
+async def reduce_position(
+    symbol: str,
+    profile: str,
+    fraction: float,
+    use_initial_capital: bool = False,
+) -> dict:
+    """
+    profile 포지션의 fraction 만큼 시장가 reduceOnly 청산 (트리거 엔진의 부분 익절 / 전량 청산).
+    수량은 stepSize 로 내림. fraction 1(또는 보유 수량 이상)이면 이 프로필 보유 수량만 청산
+    (BUY_STOP/SELL_STOP 은 계정 순포지션 전체를 닫으므로 다른 프로필 몫까지 닫힘).
+    정산은 실제 체결 수량 기준, 체결이 없으면 정산 안 함.
+    """
+    client = await get_binance_async_client()
+    state = get_state(symbol, profile)
+
+    held = abs(state.position_qty)
+    if held == 0:
+        return {"skipped": "no_position"}
+    long_exit = state.position_qty > 0
+
+    rules = await get_symbol_rules(symbol)
+    qty = math.floor(held * fraction / rules.step_size) * rules.step_size
+    full = qty >= held - rules.step_size / 2
+    if full:
+        qty = held
+    elif qty < rules.min_qty:
+        return {"skipped": "below_min_qty"}
+
+    if full and PROTECTIVE_ORDERS:
+        # 이 프로필 포지션을 다 닫음 → 이 프로필의 익절/손절 주문 정리
+        await cancel_protective(client, symbol, profile)
+
+    with expect_update(symbol):
+        order = await create_order(
+            client,
+            symbol=symbol,
+            side=SIDE_SELL if long_exit else SIDE_BUY,
+            type=ORDER_TYPE_MARKET,
+            quantity=f"{qty:.{rules.qty_precision}f}",
+            reduceOnly=True
+        )
+    if not is_filled(order) and is_connected():
+        await wait_for_order(order.get("orderId"), FILL_EVENT_TIMEOUT)
+
+    executed = known_executed_qty(order)
+    if executed is None:
+        try:
+            res = await client.futures_get_order(symbol=symbol, orderId=order.get("orderId"))
+            executed = float(res.get("executedQty") or 0.0)
+        except Exception as e:
+            logger.warning(f"[Reduce] {profile}:{symbol} failed to fetch executedQty, not settling: {e}")
+            return {"skipped": "fill_unknown", "order": order}
+    if executed <= 0:
+        logger.warning(f"[Reduce] {profile}:{symbol} order {order.get('orderId')} filled nothing ({order.get('status')})")
+        return {"skipped": "not_filled"}
+
+    exit_price = await _get_exit_price(client, symbol, order)
+    pnl_percent = _update_capital_after_exit(
+        symbol,
+        long_exit=long_exit,
+        exit_price=exit_price,
+        profile=profile,
+        use_initial_capital=use_initial_capital,
+        qty=executed,
+    )
+    done = "buy_stop" if long_exit else "sell_stop"
+    return {"done": done if executed >= held - rules.step_size / 2 else "partial_exit",
+            "qty": executed, "exit_price": exit_price, "pnl": pnl_percent}
+
+
+async def exit_on_trigger(trigger: Trigger) -> dict:
+    """트리거 엔진 발동 → one-way 청산 (심볼 실행 큐 안에서 실행). 전량이어도 이 프로필 몫만"""
+    state = get_state(trigger.symbol, trigger.profile)
+    if state.position_qty == 0 or (state.position_qty > 0) != trigger.is_long:
+        return {"skipped": "no_matching_position"}
+    return await reduce_position(
+        trigger.symbol, trigger.profile, min(trigger.fraction, 1.0), trigger.use_initial_capital
+    )
+
+
+@timed("exit_price")
+async def _get_exit_price(client, symbol: str, order: dict) -> float:
     """주문 ID 기반으로 청산 평균 체결가(avgPrice) 조회"""
     order_id = order.get("orderId")
+
+    # RESULT 응답 / 체결 이벤트로 이미 받은 avgPrice가 있으면 재조회 생략
+    avg = known_avg_price(order)
+    if avg is not None:
+        return avg
+
     try:
-        filled_order = client.futures_get_order(symbol=symbol, orderId=order_id)
+        filled_order = await client.futures_get_order(symbol=symbol, orderId=order_id)
         return float(
             filled_order.get("avgPrice")
-            or client.futures_mark_price(symbol=symbol)["markPrice"]
+            or await get_mark_price(client, symbol)
         )
     except Exception as e:
         logger.warning(f"[Exit] Failed to fetch avgPrice: {e}")
-        return float(client.futures_mark_price(symbol=symbol)["markPrice"])
+        return await get_mark_price(client, symbol)
+
+
+def _net_exit_pnl(
+    entry_price: float,
+    exit_price: float,
+    long_exit: bool,
+    leverage: float,
+    exit_fee_rate: float | None = None,
+) -> tuple[float, float, float]:
+    """
+    (raw_pnl, total_fee, net_pnl) 수익률 (배수 아님, 0.01 = 1%)
+    - exit_fee_rate: 체결 리포트로 안 실제 청산 수수료율 (수수료 / 청산 명목가). None 이면 FEE_RATE
+    """
+    # 가격 변화로 인한 PnL (레버리지 반영 전)
+    if long_exit:
+        price_change = (exit_price / entry_price - 1.0)
+    else:
+        price_change = (entry_price / exit_price - 1.0)
+
+    # 레버리지 반영
+    raw_pnl = price_change * leverage  # 예: +1% * 5배 = +5%
+
+    # 거래 수수료(왕복) 반영
+    fee_per_side = FEE_RATE * leverage       # 한 쪽 수수료
+    total_fee = fee_per_side * 2             # 진입 + 청산
+    if exit_fee_rate is not None:
+        total_fee = fee_per_side + exit_fee_rate * leverage
+    return raw_pnl, total_fee, raw_pnl - total_fee
 
 
 def _update_capital_after_exit(
@@ -211,10 +519,15 @@ def _update_capital_after_exit(
     long_exit: bool,
     exit_price: float,
     profile: str = "webhook1",
-    use_initial_capital: bool = False
+    use_initial_capital: bool = False,
+    qty: float | None = None,
+    exit_fee_rate: float | None = None,
 ) -> float:
     """
     포지션 청산 후 PnL 계산 및 상태 업데이트.
+    - qty: 부분 청산 수량 (보호 주문 익절 등). None 이면 전량.
+        capital/daily_pnl 에는 청산 비중(qty / 보유 수량)만큼 반영하고 나머지 수량·진입가는 유지
+    - exit_fee_rate: 체결 리포트의 실제 청산 수수료율 (one-way 플립). None 이면 FEE_RATE 추정
     - 수익률 계산 시 거래 수수료 포함:
         raw_pnl = (가격변화 × 레버리지)
         net_pnl = raw_pnl - (FEE_RATE * 레버리지 * 2)   # 왕복 수수료
@@ -227,27 +540,18 @@ def _update_capital_after_exit(
     """
     state = get_state(symbol, profile)
     try:
-        entry_price = state.get("entry_price", 0.0)
-        position_qty = abs(state.get("position_qty", 0.0))
-        leverage = state.get("leverage", 1)
+        entry_price = state.entry_price
+        position_qty = abs(state.position_qty)
+        leverage = state.leverage
 
         if entry_price == 0 or position_qty == 0:
             logger.warning(f"[{symbol}] No entry_price or qty found. Skipping capital update.")
             return 0.0
 
-        # 가격 변화로 인한 PnL (레버리지 반영 전)
-        if long_exit:
-            price_change = (exit_price / entry_price - 1.0)
-        else:
-            price_change = (entry_price / exit_price - 1.0)
+        closed_qty = position_qty if qty is None else min(qty, position_qty)
+        weight = closed_qty / position_qty
 
-        # 레버리지 반영
-        raw_pnl = price_change * leverage  # 예: +1% * 5배 = +5%
-        
-        # 거래 수수료(왕복) 반영
-        fee_per_side = FEE_RATE * leverage       # 한 쪽 수수료
-        total_fee = fee_per_side * 2             # 진입 + 청산
-        net_pnl = raw_pnl - total_fee            # 최종 수익률(배수 아님)
+        raw_pnl, total_fee, net_pnl = _net_exit_pnl(entry_price, exit_price, long_exit, leverage, exit_fee_rate)
 
         if use_initial_capital:
             # /webhook2, /wehbook3: 복리 금지
@@ -258,25 +562,62 @@ def _update_capital_after_exit(
             )
         else:
             # /webhook: 기존 복리
-            capital_before = state["capital"]
-            state["capital"] = capital_before * (1.0 + net_pnl)
+            capital_before = state.capital
+            state.capital = capital_before * (1.0 + net_pnl * weight)
             logger.info(
                 f"[{profile}:{symbol}] Exit @ {exit_price:.4f}, Entry @ {entry_price:.4f}, "
                 f"RawPnL {raw_pnl*100:.2f}% - Fee {total_fee*100:.2f}% = Net {net_pnl*100:.2f}%"
             )
             logger.info(
                 f"[{profile}:{symbol}] Capital ${capital_before:.2f} "
-                f"→ ${state['capital']:.2f}"
+                f"→ ${state.capital:.2f}"
             )
 
         # 공통 후처리
-        state["daily_pnl"] = state.get("daily_pnl", 0.0) + net_pnl * 100.0
-        state["entry_price"] = 0.0
-        state["position_qty"] = 0.0
-        state["position_side"] = None
+        record_exit(profile, symbol, long_exit, closed_qty, entry_price, exit_price, leverage, net_pnl * 100.0)
+        state.daily_pnl += net_pnl * 100.0 * weight
+        remaining = position_qty - closed_qty
+        if remaining > position_qty * 1e-9:
+            state.position_qty = remaining if long_exit else -remaining
+            logger.info(f"[{profile}:{symbol}] Partial exit {closed_qty} ({weight*100:.0f}%), {remaining} left")
+            return net_pnl * 100.0
+
+        state.entry_price = 0.0
+        state.position_qty = 0.0
+        state.position_side = None
+        # 이 포지션에 걸린 프로세스 내 트리거(트레일링/시간 등)도 같이 정리
+        trigger_engine.cancel_position(symbol, profile)
 
         return net_pnl * 100.0
 
     except Exception:
         logger.exception(f"[{profile}:{symbol}] Failed to update capital after exit")
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+
+def on_protective_fill(msg: dict) -> None:
+    """
+    one-way 보호 주문(익절/손절, app/services/protective_orders.py) 체결 반영.
+    user-data stream ORDER_TRADE_UPDATE 핸들러: 해당 프로필 상태에 (부분) 청산 정산 후 짝 주문 정리 예약
+    """
+    fill = parse_fill(msg)
+    if fill is None or fill.position_side is not None:
+        return
+
+    state = get_state(fill.symbol, fill.profile)
+    long_exit = fill.side == SIDE_SELL
+    held = state.position_qty
+    if held == 0 or (held > 0) != long_exit:
+        logger.info(f"[Protect] {fill.profile}:{fill.symbol} {fill.kind} filled but no matching position in state, skipping")
+        return
+
+    logger.info(f"[Protect] {fill.profile}:{fill.symbol} {fill.kind} filled {fill.qty}@{fill.price}")
+    _update_capital_after_exit(
+        fill.symbol,
+        long_exit=long_exit,
+        exit_price=fill.price,
+        profile=fill.profile,
+        use_initial_capital=fill.use_initial_capital,
+        qty=fill.qty,
+    )
+    schedule_after_fill(fill, abs(state.position_qty))
@@ -1,16 +1,27 @@
 # app/services/switching_hedge.py
 
 import logging
+import asyncio
+import math
 import time
-from datetime import datetime
-from zoneinfo import ZoneInfo
 
 from binance.enums import SIDE_BUY, SIDE_SELL, ORDER_TYPE_MARKET
 
-from app.clients.binance_client import get_binance_client
-from app.config import DRY_RUN, POLL_INTERVAL, MAX_WAIT, FEE_RATE
+from app.clients.binance_async_client import get_binance_async_client
+from app.config import DRY_RUN, POLL_INTERVAL, MAX_WAIT, FEE_RATE, FILL_EVENT_TIMEOUT, PROTECTIVE_ORDERS
 from app.state import get_state
 from app.services.hedge_orders import execute_hedge_entry
+from app.services.account_config import ensure_hedge_mode, ensure_leverage
+from app.services.mark_price import get_mark_price
+from app.services.order_events import wait_for_order
+from app.services.order_pipeline import create_order, is_filled, known_avg_price, known_executed_qty
+from app.services.user_stream import is_connected
+from app.services.position_book import expect_update, get_positions
+from app.services.trade_ledger import record_exit
+from app.services.protective_orders import cancel_protective, parse_fill, schedule_after_fill
+from app.services.symbol_rules import get_symbol_rules
+from app.services.trigger_engine import engine as trigger_engine, Trigger
+from app.metrics import timed, track_alert
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -18,17 +29,18 @@ logger.setLevel(logging.INFO)
 VALID_ACTIONS = {"BUY", "SELL", "BUY_STOP", "SELL_STOP"}
 
 
-def _ensure_hedge_mode(client) -> None:
+@timed("hedge_mode")
+async def _ensure_hedge_mode(client) -> None:
+    # 캐시상 이미 Hedge Mode면 REST 호출 없음
     try:
-        mode = client.futures_get_position_mode()
-        if not mode.get("dualSidePosition"):
-            client.futures_change_position_mode(dualSidePosition=True)
+        await ensure_hedge_mode(client)
     except Exception as e:
         logger.warning("ensure_hedge_mode failed: %s", e)
 
 
-def _get_positions(client, symbol: str) -> list[dict]:
-    return client.futures_position_information(symbol=symbol)
+async def _get_positions(client, symbol: str) -> list[dict]:
+    # ACCOUNT_UPDATE 기반 포지션 북 (신뢰 불가 시 REST)
+    return await get_positions(client, symbol)
 
 
 def _side_amt(positions: list[dict], symbol: str, side: str) -> float:
@@ -43,7 +55,8 @@ def _any_open(positions: list[dict], symbol: str) -> bool:
     return _side_amt(positions, symbol, "LONG") != 0.0 or _side_amt(positions, symbol, "SHORT") != 0.0
 
 
-def _enforce_leverage_policy_state_based(client, symbol: str, requested_leverage: int, profile: str) -> dict | None:
+@timed("leverage_policy")
+async def _enforce_leverage_policy_state_based(client, symbol: str, requested_leverage: int, profile: str) -> dict | None:
     """
     ✅ state 기반 레버리지 정책 (네가 원한 방식)
     - 포지션이 없으면: requested_leverage를 state에 저장하고 거래소에 set 시도
@@ -51,19 +64,19 @@ def _enforce_leverage_policy_state_based(client, symbol: str, requested_leverage
       (읽기 기반 정책 제거: positions에서 leverage가 안 내려오는 환경 대응)
     """
     state = get_state(symbol, profile)
-    positions = _get_positions(client, symbol)
+    positions = await _get_positions(client, symbol)
     has_open = _any_open(positions, symbol)
 
-    saved = int(state.get("hedge_symbol_leverage", 0) or 0)
+    saved = int(state.hedge_symbol_leverage or 0)
 
     if not has_open:
         # ✅ 신규 진입 구간: 요청 leverage로 고정
-        state["hedge_symbol_leverage"] = requested_leverage
-        state["leverage"] = requested_leverage  # (호환/로그용)
+        state.hedge_symbol_leverage = requested_leverage
+        state.leverage = requested_leverage  # (호환/로그용)
 
         # 거래소 세팅 시도 (실패하면 거래 자체를 막는 게 안전)
         try:
-            client.futures_change_leverage(symbol=symbol, leverage=requested_leverage)
+            await ensure_leverage(client, symbol, requested_leverage)
         except Exception as e:
             return {"skipped": f"failed_to_set_leverage:{e}"}
 
@@ -72,54 +85,74 @@ def _enforce_leverage_policy_state_based(client, symbol: str, requested_leverage
     # ✅ 포지션이 열려있으면: saved leverage가 기준
     # saved가 비어있으면(서버 재시작 등) 요청 leverage로 복구
     if saved <= 0:
-        state["hedge_symbol_leverage"] = requested_leverage
-        state["leverage"] = requested_leverage
+        state.hedge_symbol_leverage = requested_leverage
+        state.leverage = requested_leverage
         saved = requested_leverage
 
     # 요청 leverage가 다르게 와도, 여기서 스킵하지 않고 "saved로 강제"하는 방식
     # (원하면 mismatch일 때 스킵하도록 바꿀 수도 있음)
-    state["leverage"] = saved
+    state.leverage = saved
 
-    # (선택) 거래소에도 saved로 보정 세팅 시도 — 실패해도 주문은 진행 가능하니 warning만
+    # (선택) 거래소에도 saved로 보정 세팅 시도 (캐시와 같으면 생략) — 실패해도 주문은 진행 가능하니 warning만
     try:
-        client.futures_change_leverage(symbol=symbol, leverage=saved)
+        await ensure_leverage(client, symbol, saved)
     except Exception as e:
         logger.warning(f"[{profile}:{symbol}] futures_change_leverage failed while open (continue): {e}")
 
     return None
 
 
-def _wait_for_side_close(symbol: str, position_side: str) -> bool:
-    client = get_binance_client()
+@timed("wait_fill")
+async def _wait_for_side_close(symbol: str, position_side: str, order: dict | None = None) -> bool:
+    # 0) RESULT 응답에서 이미 체결 확인됨
+    if order is not None and is_filled(order):
+        return True
+
+    # 1) user-data stream ORDER_TRADE_UPDATE 로 체결 확인 (폴링 지연 없음)
+    if order is not None and is_connected():
+        fill = await wait_for_order(order.get("orderId"), FILL_EVENT_TIMEOUT)
+        if fill is not None and fill["status"] == "FILLED":
+            return True
+
+    # 2) 이벤트 미수신/스트림 단절 시 기존 REST 폴링으로 대체
+    client = await get_binance_async_client()
     start = time.time()
     while time.time() - start < MAX_WAIT:
-        positions = _get_positions(client, symbol)
+        positions = await client.futures_position_information(symbol=symbol)
         amt = _side_amt(positions, symbol, position_side)
         if amt == 0.0:
             return True
-        time.sleep(POLL_INTERVAL)
+        await asyncio.sleep(POLL_INTERVAL)
     logger.warning("Close timeout: %s %s", symbol, position_side)
     return False
 
 
-def _get_exit_price(client, symbol: str, order: dict) -> float:
+@timed("exit_price")
+async def _get_exit_price(client, symbol: str, order: dict) -> float:
     order_id = order.get("orderId")
+
+    # RESULT 응답 / 체결 이벤트로 이미 받은 avgPrice가 있으면 재조회 생략
+    avg = known_avg_price(order)
+    if avg is not None:
+        return avg
+
     try:
-        filled = client.futures_get_order(symbol=symbol, orderId=order_id)
+        filled = await client.futures_get_order(symbol=symbol, orderId=order_id)
         avg = filled.get("avgPrice")
         if avg:
             return float(avg)
     except Exception as e:
         logger.warning("[Exit] Failed to fetch avgPrice: %s", e)
 
-    return float(client.futures_mark_price(symbol=symbol)["markPrice"])
+    return await get_mark_price(client, symbol)
 
 
-def _sync_state_from_exchange(symbol: str, profile: str) -> None:
-    client = get_binance_client()
+@timed("sync_state")
+async def _sync_state_from_exchange(symbol: str, profile: str) -> None:
+    client = await get_binance_async_client()
     state = get_state(symbol, profile)
 
-    positions = client.futures_position_information(symbol=symbol)
+    positions = await _get_positions(client, symbol)
 
     long_qty = 0.0
     long_entry = 0.0
@@ -147,17 +180,19 @@ def _sync_state_from_exchange(symbol: str, profile: str) -> None:
             short_entry = entry
             short_u = upnl
 
-    now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+    now = time.time()
 
-    state["hedge"]["long"]["qty"] = long_qty
-    state["hedge"]["long"]["entry_price"] = long_entry
-    state["hedge"]["long"]["unrealized_pnl"] = long_u
-    state["hedge"]["long"]["update_time"] = now
+    long_state = state.hedge_long
+    long_state.qty = long_qty
+    long_state.entry_price = long_entry
+    long_state.unrealized_pnl = long_u
+    long_state.update_time = now
 
-    state["hedge"]["short"]["qty"] = short_qty
-    state["hedge"]["short"]["entry_price"] = short_entry
-    state["hedge"]["short"]["unrealized_pnl"] = short_u
-    state["hedge"]["short"]["update_time"] = now
+    short_state = state.hedge_short
+    short_state.qty = short_qty
+    short_state.entry_price = short_entry
+    short_state.unrealized_pnl = short_u
+    short_state.update_time = now
 
 
 def _apply_compounding_after_exit(
@@ -167,21 +202,25 @@ def _apply_compounding_after_exit(
     exit_price: float,
     use_initial_capital: bool,
     leverage: int,
+    qty: float | None = None,
 ) -> float:
     """
     exit_side 별 수익률 계산 + (복리모드면) capital 갱신.
     net_pnl = raw_pnl - 왕복수수료(FEE_RATE * leverage * 2)
+    qty: 부분 청산 수량 (보호 주문 체결). capital/daily_pnl 에 비중만큼 반영하고 side qty 를 줄임
     반환: pnl_percent(%)
     """
     state = get_state(symbol, profile)
 
+    side_state = state.hedge_long if exit_side == "LONG" else state.hedge_short
+
     if exit_side == "LONG":
-        entry = float(state["hedge"]["long"]["entry_price"])
+        entry = float(state.hedge_long.entry_price)
         if entry <= 0:
             return 0.0
         price_change = (exit_price / entry - 1.0)
     else:
-        entry = float(state["hedge"]["short"]["entry_price"])
+        entry = float(state.hedge_short.entry_price)
         if entry <= 0:
             return 0.0
         price_change = (entry / exit_price - 1.0)
@@ -190,22 +229,39 @@ def _apply_compounding_after_exit(
     total_fee = (FEE_RATE * leverage) * 2
     net_pnl = raw_pnl - total_fee
 
-    if not use_initial_capital:
-        before = float(state.get("capital", 0.0))
-        state["capital"] = before * (1.0 + net_pnl)
+    held = abs(float(side_state.qty))
+    closed_qty = held if qty is None or held <= 0 else min(qty, held)
+    weight = closed_qty / held if held > 0 else 1.0
 
-    state["daily_pnl"] = state.get("daily_pnl", 0.0) + net_pnl * 100.0
+    if not use_initial_capital:
+        before = float(state.capital)
+        state.capital = before * (1.0 + net_pnl * weight)
+
+    state.daily_pnl += net_pnl * 100.0 * weight
+    record_exit(profile, symbol, exit_side == "LONG", closed_qty, entry, exit_price, leverage, net_pnl * 100.0)
+
+    remaining = held - closed_qty
+    if qty is not None:
+        # 거래소 동기화 전까지 남은 수량 (SHORT 는 음수)
+        side_state.qty = remaining if exit_side == "LONG" else -remaining
+        if remaining <= held * 1e-9:
+            side_state.qty = 0.0
+            side_state.entry_price = 0.0
+    if remaining <= held * 1e-9:
+        # 이 side 에 걸린 프로세스 내 트리거도 같이 정리
+        trigger_engine.cancel_position(symbol, profile, exit_side)
     return net_pnl * 100.0
 
 
-def switch_position_hedge(
+@track_alert
+async def switch_position_hedge(
     symbol: str,
     action: str,
     leverage: int,
     profile: str,
     use_initial_capital: bool,
 ) -> dict:
-    client = get_binance_client()
+    client = await get_binance_async_client()
 
     if DRY_RUN:
         return {"skipped": "dry_run"}
@@ -214,53 +270,53 @@ def switch_position_hedge(
     if action not in VALID_ACTIONS:
         return {"skipped": "unknown_action"}
 
-    _ensure_hedge_mode(client)
+    await _ensure_hedge_mode(client)
 
     # ✅ state 기반 레버리지 정책 적용
     # - 포지션 없으면: 요청 leverage 고정 + 거래소 set
     # - 포지션 있으면: state leverage로 강제(요청 leverage 무시)
     if action in ("BUY", "SELL"):
-        policy = _enforce_leverage_policy_state_based(client, symbol, leverage, profile)
+        policy = await _enforce_leverage_policy_state_based(client, symbol, leverage, profile)
         if policy is not None:
             return policy
 
-        # enforce에서 state["leverage"]를 saved로 맞춰놨으니 여기서 최종 leverage를 다시 가져옴
+        # enforce에서 state.leverage를 saved로 맞춰놨으니 여기서 최종 leverage를 다시 가져옴
         state = get_state(symbol, profile)
-        leverage = int(state.get("hedge_symbol_leverage", leverage))
+        leverage = int(state.hedge_symbol_leverage)
     else:
         # STOP은 레버리지 정책과 무관하게 청산 진행
         state = get_state(symbol, profile)
         # PnL 계산용으로는 state leverage를 쓰는 게 더 일관적
-        leverage = int(state.get("hedge_symbol_leverage", leverage))
-        state["leverage"] = leverage
+        leverage = int(state.hedge_symbol_leverage)
+        state.leverage = leverage
 
     # ✅ BUY: LONG 추가진입 (스킵 없음)
     if action == "BUY":
-        res = execute_hedge_entry(
+        res = await execute_hedge_entry(
             symbol=symbol,
             position_side="LONG",
             leverage=leverage,
             profile=profile,
             use_initial_capital=use_initial_capital,
         )
-        _sync_state_from_exchange(symbol, profile)
+        await _sync_state_from_exchange(symbol, profile)
         return res
 
     # ✅ SELL: SHORT 추가진입 (스킵 없음)
     if action == "SELL":
-        res = execute_hedge_entry(
+        res = await execute_hedge_entry(
             symbol=symbol,
             position_side="SHORT",
             leverage=leverage,
             profile=profile,
             use_initial_capital=use_initial_capital,
         )
-        _sync_state_from_exchange(symbol, profile)
+        await _sync_state_from_exchange(symbol, profile)
         return res
 
     # STOP 처리 전에 최신 포지션 동기화
-    _sync_state_from_exchange(symbol, profile)
-    positions = _get_positions(client, symbol)
+    await _sync_state_from_exchange(symbol, profile)
+    positions = await _get_positions(client, symbol)
 
     # ✅ BUY_STOP: LONG만 청산
     if action == "BUY_STOP":
@@ -268,15 +324,21 @@ def switch_position_hedge(
         if long_amt <= 0:
             return {"skipped": "no_long_position"}
 
-        order = client.futures_create_order(
-            symbol=symbol,
-            side=SIDE_SELL,
-            type=ORDER_TYPE_MARKET,
-            quantity=str(abs(long_amt)),
-            positionSide="LONG",
-        )
-        _wait_for_side_close(symbol, "LONG")
-        exit_price = _get_exit_price(client, symbol, order)
+        if PROTECTIVE_ORDERS:
+            # 직접 청산 → 이 프로필의 LONG 익절/손절 주문 정리 (청산 후 남아 있으면 다음 진입분을 닫음)
+            await cancel_protective(client, symbol, profile, "LONG")
+
+        with expect_update(symbol):
+            order = await create_order(
+                client,
+                symbol=symbol,
+                side=SIDE_SELL,
+                type=ORDER_TYPE_MARKET,
+                quantity=str(abs(long_amt)),
+                positionSide="LONG",
+            )
+        await _wait_for_side_close(symbol, "LONG", order)
+        exit_price = await _get_exit_price(client, symbol, order)
 
         pnl = _apply_compounding_after_exit(
             symbol=symbol,
@@ -287,7 +349,7 @@ def switch_position_hedge(
             leverage=leverage,
         )
 
-        _sync_state_from_exchange(symbol, profile)
+        await _sync_state_from_exchange(symbol, profile)
         return {"done": "buy_stop", "exit_price": exit_price, "pnl": pnl}
 
     # ✅ SELL_STOP: SHORT만 청산
@@ -296,15 +358,21 @@ def switch_position_hedge(
         if short_amt >= 0:
             return {"skipped": "no_short_position"}
 
-        order = client.futures_create_order(
-            symbol=symbol,
-            side=SIDE_BUY,
-            type=ORDER_TYPE_MARKET,
-            quantity=str(abs(short_amt)),
-            positionSide="SHORT",
-        )
-        _wait_for_side_close(symbol, "SHORT")
-        exit_price = _get_exit_price(client, symbol, order)
+        if PROTECTIVE_ORDERS:
+            # 직접 청산 → 이 프로필의 SHORT 익절/손절 주문 정리 (청산 후 남아 있으면 다음 진입분을 닫음)
+            await cancel_protective(client, symbol, profile, "SHORT")
+
+        with expect_update(symbol):
+            order = await create_order(
+                client,
+                symbol=symbol,
+                side=SIDE_BUY,
+                type=ORDER_TYPE_MARKET,
+                quantity=str(abs(short_amt)),
+                positionSide="SHORT",
+            )
+        await _wait_for_side_close(symbol, "SHORT", order)
+        exit_price = await _get_exit_price(client, symbol, order)
 
         pnl = _apply_compounding_after_exit(
             symbol=symbol,
@@ -315,7 +383,120 @@ def switch_position_hedge(
             leverage=leverage,
         )
 
-        _sync_state_from_exchange(symbol, profile)
+        await _sync_state_from_exchange(symbol, profile)
         return {"done": "sell_stop", "exit_price": exit_price, "pnl": pnl}
 
-    return {"skipped": "unknown_action"}
\ No newline at end of file
+    return {"skipped": "unknown_action"}
+
+
+def on_protective_fill(msg: dict) -> None:
+    """
+    hedge 보호 주문(익절/손절, app/services/protective_orders.py) 체결 반영.
+    user-data stream ORDER_TRADE_UPDATE 핸들러: 해당 side 에 (부분) 청산 정산 후 짝 주문 정리 예약
+    """
+    fill = parse_fill(msg)
+    if fill is None or fill.position_side is None:
+        return
+
+    state = get_state(fill.symbol, fill.profile)
+    side_state = state.hedge_long if fill.position_side == "LONG" else state.hedge_short
+    if side_state.qty == 0:
+        logger.info(f"[Protect] {fill.profile}:{fill.symbol} {fill.kind} filled but no {fill.position_side} in state, skipping")
+        return
+
+    logger.info(f"[Protect] {fill.profile}:{fill.symbol} {fill.position_side} {fill.kind} filled {fill.qty}@{fill.price}")
+    _apply_compounding_after_exit(
+        symbol=fill.symbol,
+        profile=fill.profile,
+        exit_side=fill.position_side,
+        exit_price=fill.price,
+        use_initial_capital=fill.use_initial_capital,
+        leverage=int(state.hedge_symbol_leverage or state.leverage),
+        qty=fill.qty,
+    )
+    schedule_after_fill(fill, abs(side_state.qty))
+
+
+@timed("reduce_position")
+async def reduce_side(
+    symbol: str,
+    profile: str,
+    position_side: str,
+    fraction: float,
+    use_initial_capital: bool,
+) -> dict:
+    """
+    hedge side 포지션의 fraction 만큼 시장가 청산 (트리거 엔진의 부분 익절 등).
+    수량은 stepSize 로 내림. side 수량 이상이면 BUY_STOP/SELL_STOP 전량 청산 경로로.
+    정산은 실제 체결 수량 기준, 체결이 없으면 정산 안 함.
+    """
+    client = await get_binance_async_client()
+    state = get_state(symbol, profile)
+    leverage = int(state.hedge_symbol_leverage or state.leverage)
+    stop_action = "BUY_STOP" if position_side == "LONG" else "SELL_STOP"
+
+    positions = await _get_positions(client, symbol)
+    held = abs(_side_amt(positions, symbol, position_side))
+    if held == 0:
+        return {"skipped": f"no_{position_side.lower()}_position"}
+
+    rules = await get_symbol_rules(symbol)
+    qty = math.floor(held * fraction / rules.step_size) * rules.step_size
+    if qty >= held - rules.step_size / 2:
+        return await switch_position_hedge(symbol, stop_action, leverage, profile, use_initial_capital)
+    if qty < rules.min_qty:
+        return {"skipped": "below_min_qty"}
+
+    with expect_update(symbol):
+        order = await create_order(
+            client,
+            symbol=symbol,
+            side=SIDE_SELL if position_side == "LONG" else SIDE_BUY,
+            type=ORDER_TYPE_MARKET,
+            quantity=f"{qty:.{rules.qty_precision}f}",
+            positionSide=position_side,
+        )
+    if not is_filled(order) and is_connected():
+        await wait_for_order(order.get("orderId"), FILL_EVENT_TIMEOUT)
+
+    # 정산은 요청 수량이 아니라 실제 체결 수량 기준 (부분 체결)
+    executed = known_executed_qty(order)
+    if executed is None:
+        try:
+            res = await client.futures_get_order(symbol=symbol, orderId=order.get("orderId"))
+            executed = float(res.get("executedQty") or 0.0)
+        except Exception as e:
+            logger.warning(f"[Reduce] {profile}:{symbol} {position_side} failed to fetch executedQty, not settling: {e}")
+            return {"skipped": "fill_unknown", "order": order}
+    if executed <= 0:
+        logger.warning(f"[Reduce] {profile}:{symbol} {position_side} order {order.get('orderId')} "
+                       f"filled nothing ({order.get('status')})")
+        return {"skipped": "not_filled"}
+
+    exit_price = await _get_exit_price(client, symbol, order)
+    pnl = _apply_compounding_after_exit(
+        symbol=symbol,
+        profile=profile,
+        exit_side=position_side,
+        exit_price=exit_price,
+        use_initial_capital=use_initial_capital,
+        leverage=leverage,
+        qty=executed,
+    )
+    await _sync_state_from_exchange(symbol, profile)
+    return {"done": "partial_exit", "qty": executed, "exit_price": exit_price, "pnl": pnl}
+
+
+async def exit_on_trigger(trigger: Trigger) -> dict:
+    """트리거 엔진 발동 → hedge side 청산 (심볼 실행 큐 안에서 실행)"""
+    state = get_state(trigger.symbol, trigger.profile)
+    side_state = state.hedge_long if trigger.position_side == "LONG" else state.hedge_short
+    if side_state.qty == 0:
+        return {"skipped": f"no_{trigger.position_side.lower()}_position"}
+    if trigger.fraction >= 1.0:
+        return await switch_position_hedge(
+            trigger.symbol, "BUY_STOP" if trigger.position_side == "LONG" else "SELL_STOP",
+            int(state.hedge_symbol_leverage or state.leverage), trigger.profile, trigger.use_initial_capital,
+        )
+    return await reduce_side(trigger.symbol, trigger.profile, trigger.position_side, trigger.fraction,
+                             trigger.use_initial_capital)
@@ -0,0 +1,202 @@
+# app/services/symbol_rules.py
+
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+
+from fastapi import HTTPException
+
+from app.clients.binance_client import get_binance_client
+from app.config import SYMBOL_RULES_TTL, SYMBOL_RULES_SNAPSHOT, SYMBOL_RULES_MISS_TTL
+from app.metrics import timed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolRules:
+    symbol: str
+    status: str
+    step_size: float
+    min_qty: float
+    qty_precision: int
+    tick_size: float
+    price_precision: int
+    min_notional: float
+
+
+# symbol -> SymbolRules (갱신 시 dict 통째로 교체 → 읽기 쪽은 락 불필요)
+_rules: dict[str, SymbolRules] = {}
+_loaded_at: float = 0.0
+
+_refresh_lock = threading.Lock()
+# 요청 경로의 갱신 1건 (동시에 캐시 미스가 나도 다운로드는 한 번만)
+_refreshing: asyncio.Future | None = None
+# symbol -> 만료 시각(monotonic). 갱신 후에도 없던 심볼 (negative cache)
+_misses: dict[str, float] = {}
+
+
+def _precision(step: float) -> int:
+    return max(int(round(-math.log10(step), 0)), 0) if step > 0 else 0
+
+
+def _parse_exchange_info(info: dict) -> dict[str, SymbolRules]:
+    """futures_exchange_info() 응답 → 심볼별 SymbolRules 인덱스"""
+    rules: dict[str, SymbolRules] = {}
+    for s in info.get("symbols", []):
+        filters = {f.get("filterType"): f for f in s.get("filters", [])}
+        lot_f = filters.get("LOT_SIZE", {})
+        price_f = filters.get("PRICE_FILTER", {})
+        notional_f = filters.get("MIN_NOTIONAL", {})
+
+        step = float(lot_f.get("stepSize", 0.0))
+        tick = float(price_f.get("tickSize", 0.0))
+
+        rules[s["symbol"]] = SymbolRules(
+            symbol=s["symbol"],
+            status=s.get("status", ""),
+            step_size=step,
+            min_qty=float(lot_f.get("minQty", 0.0)),
+            qty_precision=_precision(step),
+            tick_size=tick,
+            price_precision=_precision(tick),
+            # 선물은 "notional", 현물 스타일 응답은 "minNotional"
+            min_notional=float(notional_f.get("notional", notional_f.get("minNotional", 0.0))),
+        )
+    return rules
+
+
+def _save_snapshot() -> None:
+    try:
+        directory = os.path.dirname(SYMBOL_RULES_SNAPSHOT)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{SYMBOL_RULES_SNAPSHOT}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"loaded_at": _loaded_at, "rules": [asdict(r) for r in _rules.values()]},
+                f,
+            )
+        os.replace(tmp, SYMBOL_RULES_SNAPSHOT)
+    except Exception as e:
+        logger.warning(f"[SymbolRules] Failed to save snapshot: {e}")
+
+
+def load_snapshot() -> bool:
+    """
+    로컬 스냅샷으로 캐시를 채웁니다 (재시작 시 웜 스타트).
+    스냅샷이 TTL보다 오래됐더라도 일단 사용하고, 갱신은 백그라운드에 맡깁니다.
+    """
+    global _rules, _loaded_at
+
+    try:
+        with open(SYMBOL_RULES_SNAPSHOT, encoding="utf-8") as f:
+            data = json.load(f)
+        _rules = {r["symbol"]: SymbolRules(**r) for r in data.get("rules", [])}
+        _loaded_at = float(data.get("loaded_at", 0.0))
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.warning(f"[SymbolRules] Failed to load snapshot: {e}")
+        return False
+
+    logger.info(f"[SymbolRules] Loaded {len(_rules)} symbols from snapshot")
+    return True
+
+
+def refresh_symbol_rules(requested_at: float | None = None) -> None:
+    """
+    exchange info를 한 번 내려받아 캐시 전체를 교체하고 스냅샷을 저장합니다.
+    requested_at 이후에 (락을 기다리는 사이 다른 스레드가) 이미 갱신했으면 다시 받지 않습니다.
+    """
+    global _rules, _loaded_at
+
+    with _refresh_lock:
+        if requested_at is not None and _loaded_at >= requested_at:
+            return
+        info = get_binance_client().futures_exchange_info()
+        _rules = _parse_exchange_info(info)
+        _loaded_at = time.time()
+        _save_snapshot()
+
+    logger.info(f"[SymbolRules] Refreshed {len(_rules)} symbols")
+
+
+def is_stale() -> bool:
+    return time.time() - _loaded_at >= SYMBOL_RULES_TTL
+
+
+def is_valid_symbol(symbol: str) -> bool:
+    rules = _rules.get(symbol)
+    return rules is not None and rules.status == "TRADING"
+
+
+def check_symbol(symbol: str) -> None:
+    """
+    웹훅 경로의 심볼 검증. 캐시가 신선할 때만 판단하며(콜드 스타트/만료면 통과),
+    모르는 심볼이나 TRADING 이 아닌 심볼은 거래소를 건드리기 전에 400 으로 거절합니다.
+    """
+    if not is_stale() and not is_valid_symbol(symbol):
+        raise HTTPException(status_code=400, detail=f"Unknown or non-trading symbol {symbol}")
+
+
+async def _refresh_shared() -> None:
+    """요청 경로 갱신 single-flight: 진행 중인 갱신이 있으면 그 결과를 같이 기다립니다."""
+    global _refreshing
+
+    if _refreshing is None or _refreshing.done():
+        _refreshing = asyncio.ensure_future(asyncio.to_thread(refresh_symbol_rules, time.time()))
+    # 기다리던 요청 하나가 취소돼도 다른 대기자의 갱신은 계속
+    await asyncio.shield(_refreshing)
+
+
+def lookup_symbol_rules(symbol: str) -> SymbolRules | None:
+    """캐시만 보는 O(1) 조회. 네트워크 왕복 없음."""
+    return _rules.get(symbol)
+
+
+@timed("symbol_rules")
+async def get_symbol_rules(symbol: str) -> SymbolRules:
+    """
+    주문 사이징용 조회. 캐시 적중 시 네트워크 왕복 없이 바로 반환합니다.
+    캐시가 신선한데 없는 심볼, 최근 갱신 후에도 없던 심볼은 갱신 없이 바로 거절합니다.
+    그 외(콜드 스타트/만료된 캐시)에만 갱신을 시도하며, 동시 미스는 갱신 한 번을 같이 기다리고
+    이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+    """
+    rules = _rules.get(symbol)
+    if rules is not None:
+        return rules
+
+    now = time.monotonic()
+    if not is_stale() or _misses.get(symbol, 0.0) > now:
+        raise HTTPException(status_code=400, detail=f"Unknown symbol {symbol}")
+
+    logger.info(f"[SymbolRules] {symbol} not cached, refreshing")
+    await _refresh_shared()
+
+    rules = _rules.get(symbol)
+    if rules is None:
+        now = time.monotonic()
+        for expired in [s for s, until in _misses.items() if until <= now]:
+            del _misses[expired]
+        _misses[symbol] = now + SYMBOL_RULES_MISS_TTL
+        raise HTTPException(status_code=400, detail=f"Unknown symbol {symbol}")
+    _misses.pop(symbol, None)
+    return rules
+
+
+async def run_symbol_rules_refresher() -> None:
+    """
+    TTL 기반 주기 갱신 (백그라운드 작업, app/services/runtime.py 가 실행).
+    동기 클라이언트 호출은 스레드에서, 실패하면 예외를 올려 runtime 의 backoff 재시도에 맡깁니다.
+    """
+    while True:
+        if is_stale():
+            await asyncio.to_thread(refresh_symbol_rules)
+        await asyncio.sleep(min(SYMBOL_RULES_TTL, 60.0))
@@ -0,0 +1,273 @@
+# app/services/trade_ledger.py
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from app.config import FEE_RATE, TRADE_LEDGER_DIR, TRADE_LEDGER_CHUNK_ROWS, TRADE_LEDGER_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+KIND_ENTRY = 0  # 진입 체결
+KIND_EXIT = 1   # 청산 (entry/exit/pnl 포함)
+
+# 컬럼별 파일 하나 (chunk_000000/ts.f8 ...). 고정 길이라 np.memmap 으로 바로 매핑
+#   side       : +1 롱 / -1 숏
+#   fee        : 추정 수수료 (USDT, FEE_RATE × 체결 금액, 청산은 진입+청산 양쪽)
+#   net_pnl    : 청산 손익 (USDT, 수수료 차감)
+#   net_pnl_pct: 앱이 capital 갱신에 쓰는 수익률(%) (레버리지·왕복 수수료 반영)
+COLUMNS: tuple[tuple[str, str], ...] = (
+    ("ts", "f8"),
+    ("profile", "S16"),
+    ("symbol", "S20"),
+    ("kind", "u1"),
+    ("side", "i1"),
+    ("qty", "f8"),
+    ("entry_price", "f8"),
+    ("exit_price", "f8"),
+    ("leverage", "f4"),
+    ("fee", "f8"),
+    ("net_pnl", "f8"),
+    ("net_pnl_pct", "f8"),
+)
+_COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+
+def _stored_capacity(path: str) -> int:
+    """기존 청크의 행 용량 (컬럼 파일 크기 / 행 크기). 설정(TRADE_LEDGER_CHUNK_ROWS)이 바뀌어도 만든 당시 그대로"""
+    name, dtype = COLUMNS[0]
+    return os.path.getsize(os.path.join(path, f"{name}.{dtype}")) // np.dtype(dtype).itemsize
+
+
+class _Chunk:
+    __slots__ = ("path", "columns", "count", "capacity")
+
+    def __init__(self, path: str, capacity: int | None, create: bool):
+        """create=False 면 capacity 는 무시하고 파일에 기록된 크기로 엽니다"""
+        self.path = path
+        mode = "w+" if create else "r+"
+        if create:
+            os.makedirs(path, exist_ok=True)
+        else:
+            capacity = _stored_capacity(path)
+        self.capacity = capacity
+        self.columns = {
+            name: np.memmap(os.path.join(path, f"{name}.{dtype}"), dtype=dtype, mode=mode, shape=(capacity,))
+            for name, dtype in COLUMNS
+        }
+        # 확정된 행 수 (컬럼을 쓴 뒤에 갱신 → 중간에 죽어도 반쯤 쓴 행은 안 보임)
+        self.count = np.memmap(os.path.join(path, "count.i8"), dtype="i8", mode=mode, shape=(1,))
+
+    @property
+    def rows(self) -> int:
+        return int(self.count[0])
+
+    def view(self) -> dict[str, np.ndarray]:
+        n = self.rows
+        return {name: col[:n] for name, col in self.columns.items()}
+
+
+class TradeLedger:
+    """
+    append-only 컬럼형 거래 원장.
+    - 기록: 주문 경로에서는 deque.append 만 (O(1)), 파일 쓰기는 flush 태스크가 스레드에서 묶어서
+    - 저장: chunk_rows 행 단위 디렉터리, 컬럼마다 고정 길이 파일 → np.memmap
+    - 조회: chunks() 는 확정된 구간의 memmap 슬라이스(복사 없음)
+    """
+
+    def __init__(self, directory: str, chunk_rows: int):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self._chunks: list[_Chunk] = []
+        self._pending: deque[tuple] = deque()
+        self.recorded = 0
+
+    def open(self) -> int:
+        os.makedirs(self.directory, exist_ok=True)
+        names = sorted(d for d in os.listdir(self.directory) if d.startswith("chunk_"))
+        self._chunks = [_Chunk(os.path.join(self.directory, d), None, create=False) for d in names]
+        return len(self)
+
+    def __len__(self) -> int:
+        return sum(c.rows for c in self._chunks)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def append(self, row: tuple) -> None:
+        """COLUMNS 순서의 튜플 1행. 디스크는 건드리지 않음"""
+        self._pending.append(row)
+        self.recorded += 1
+
+    def _new_chunk(self) -> _Chunk:
+        path = os.path.join(self.directory, f"chunk_{len(self._chunks):06d}")
+        chunk = _Chunk(path, self.chunk_rows, create=True)
+        self._chunks.append(chunk)
+        return chunk
+
+    def write_pending(self) -> int:
+        """
+        대기 행을 파일에 기록 (flush 태스크 스레드에서 호출). 기록한 행 수 반환.
+        쓰기에 실패하면 확정(count 갱신)되지 않은 행은 대기열 앞에 되돌려 다음 flush 에서 다시 씁니다.
+        """
+        rows = []
+        while self._pending:
+            rows.append(self._pending.popleft())
+        if not rows:
+            return 0
+
+        start = 0
+        try:
+            batch = np.array(rows, dtype=list(COLUMNS))
+            while start < len(batch):
+                chunk = self._chunks[-1] if self._chunks else None
+                if chunk is None or chunk.rows >= chunk.capacity:
+                    chunk = self._new_chunk()
+                n = chunk.rows
+                take = min(chunk.capacity - n, len(batch) - start)
+                part = batch[start:start + take]
+                for name in _COLUMN_NAMES:
+                    chunk.columns[name][n:n + take] = part[name]
+                    chunk.columns[name].flush()
+                chunk.count[0] = n + take
+                chunk.count.flush()
+                start += take
+        except BaseException:
+            # 그 사이 append 된 행은 뒤에 있으므로 순서 유지
+            self._pending.extendleft(reversed(rows[start:]))
+            raise
+        return len(rows)
+
+    def chunks(self) -> list[dict[str, np.ndarray]]:
+        """청크별 {컬럼: 읽기 뷰} (복사 없음)"""
+        return [c.view() for c in list(self._chunks)]
+
+    def rows_since(self, start: int) -> dict[str, np.ndarray]:
+        """start 번째 행부터 확정된 끝까지 (증분 집계용). 한 청크 안이면 뷰 그대로"""
+        parts: list[dict[str, np.ndarray]] = []
+        offset = 0
+        for view in self.chunks():
+            n = len(view["ts"])
+            if offset + n > start:
+                lo = max(start - offset, 0)
+                parts.append({name: col[lo:] for name, col in view.items()})
+            offset += n
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+        return {name: np.concatenate([p[name] for p in parts]) for name in _COLUMN_NAMES}
+
+    def columns(self, names: tuple[str, ...] | None = None) -> dict[str, np.ndarray]:
+        """전체 구간 컬럼. 청크가 하나면 뷰 그대로, 여러 개면 이어붙인 배열"""
+        names = names or _COLUMN_NAMES
+        views = self.chunks()
+        if len(views) == 1:
+            return {name: views[0][name] for name in names}
+        if not views:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS if name in names}
+        return {name: np.concatenate([v[name] for v in views]) for name in names}
+
+    def close(self) -> None:
+        self._chunks = []
+
+
+ledger = TradeLedger(TRADE_LEDGER_DIR, TRADE_LEDGER_CHUNK_ROWS)
+_enabled = False
+# 진행 중인 파일 쓰기 (스레드). 종료 시 끝날 때까지 기다린 뒤 마지막 flush
+_inflight: asyncio.Future | None = None
+
+
+def _side(is_long: bool) -> int:
+    return 1 if is_long else -1
+
+
+def record_entry(profile: str, symbol: str, is_long: bool, qty: float, entry_price: float,
+                 leverage: float) -> None:
+    """진입 체결 1건"""
+    if not _enabled:
+        return
+    ledger.append((
+        time.time(), profile, symbol, KIND_ENTRY, _side(is_long),
+        qty, entry_price, 0.0, leverage, FEE_RATE * qty * entry_price, 0.0, 0.0,
+    ))
+
+
+def record_exit(profile: str, symbol: str, is_long: bool, qty: float, entry_price: float,
+                exit_price: float, leverage: float, net_pnl_pct: float) -> None:
+    """청산 1건 (is_long: 청산한 포지션 방향)"""
+    if not _enabled:
+        return
+    qty = abs(qty)
+    fee = FEE_RATE * qty * (entry_price + exit_price)
+    gross = (exit_price - entry_price) * qty * _side(is_long)
+    ledger.append((
+        time.time(), profile, symbol, KIND_EXIT, _side(is_long),
+        qty, entry_price, exit_price, leverage, fee, gross - fee, net_pnl_pct,
+    ))
+
+
+async def flush() -> int:
+    """
+    대기 행 기록. 호출한 쪽(flush 태스크)이 취소돼도 스레드의 쓰기는 끝까지 (shield)
+    → stop_trade_ledger 의 마지막 기록과 같은 청크를 동시에 건드리지 않음
+    """
+    global _inflight
+
+    if not _enabled or not ledger.pending:
+        return 0
+    _inflight = asyncio.ensure_future(asyncio.to_thread(ledger.write_pending))
+    return await asyncio.shield(_inflight)
+
+
+async def run_trade_ledger() -> None:
+    """대기 행 주기적 flush (백그라운드 작업, app/services/runtime.py 가 실행). 기록을 껐으면 바로 끝남"""
+    if not _enabled:
+        return
+    while True:
+        await asyncio.sleep(TRADE_LEDGER_FLUSH_INTERVAL)
+        try:
+            await flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("[TradeLedger] Flush failed")
+
+
+def open_trade_ledger() -> None:
+    """원장 파일 열기 (기동 시 1회). TRADE_LEDGER_DIR 이 비어 있으면 기록 안 함"""
+    global _enabled
+
+    if not TRADE_LEDGER_DIR:
+        logger.info("[TradeLedger] TRADE_LEDGER_DIR not set, trades will not be recorded")
+        return
+    if _enabled:
+        return
+
+    rows = ledger.open()
+    _enabled = True
+    logger.info(f"[TradeLedger] Opened {TRADE_LEDGER_DIR} ({rows} rows)")
+
+
+async def stop_trade_ledger() -> None:
+    """(runtime 이 flush 작업을 멈춘 뒤) 남은 행 기록 후 닫기"""
+    global _enabled
+
+    if _enabled:
+        if _inflight is not None and not _inflight.done():
+            try:
+                await _inflight
+            except Exception:
+                logger.exception("[TradeLedger] In-flight flush failed")
+        try:
+            ledger.write_pending()
+        except Exception:
+            logger.exception("[TradeLedger] Final flush failed")
+        ledger.close()
+        _enabled = False
@@ -0,0 +1,415 @@
+# app/services/trigger_engine.py
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+
+from app.config import TRIGGER_CLOCK_INTERVAL
+from app.services.execution import scheduler, ACCOUNT
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+KIND_STOP = "stop"
+KIND_TAKE_PROFIT = "take_profit"
+KIND_TRAILING = "trailing"
+KIND_TIME = "time"
+KINDS = (KIND_STOP, KIND_TAKE_PROFIT, KIND_TRAILING, KIND_TIME)
+
+# 낡은 heap 항목(취소/재설정된 트리거)이 살아있는 트리거의 이 배수를 넘으면 heap 재구성
+_COMPACT_RATIO = 4
+
+
+@dataclass(slots=True)
+class Trigger:
+    symbol: str
+    profile: str
+    is_long: bool                       # 보호하는 포지션 방향
+    kind: str                           # stop / take_profit / trailing / time
+    fraction: float = 1.0               # 발동 시점 보유 수량 중 청산 비중 (1.0 = 전량)
+    level: float = 0.0                  # 발동 가격 (trailing 은 extreme 에서 계산)
+    callback: float = 0.0               # trailing 되돌림 비율 (0.01 = 1%)
+    extreme: float = 0.0                # trailing 기준 최고가(롱) / 최저가(숏)
+    deadline: float = 0.0               # time: 발동 시각 (epoch)
+    position_side: str | None = None    # hedge 프로필이면 "LONG" / "SHORT"
+    use_initial_capital: bool = False
+    id: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def fires_below(self) -> bool:
+        """가격이 level 이하로 내려오면 발동 (롱 손절/트레일링, 숏 익절)"""
+        return self.is_long != (self.kind == KIND_TAKE_PROFIT)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "profile": self.profile,
+            "side": "long" if self.is_long else "short",
+            "position_side": self.position_side,
+            "kind": self.kind,
+            "fraction": self.fraction,
+            "level": self.level,
+            "callback": self.callback,
+            "extreme": self.extreme,
+            "deadline": self.deadline,
+            "created_at": self.created_at,
+        }
+
+
+class _Cohort:
+    """같은 기준가(최고가/최저가)를 공유하는 trailing 트리거 묶음. members: (callback, id) min-heap"""
+
+    __slots__ = ("extreme", "members")
+
+    def __init__(self, extreme: float, members: list[tuple[float, int]]):
+        self.extreme = extreme
+        self.members = members
+
+
+class _SymbolBook:
+    """
+    심볼 하나의 가격 트리거 인덱스.
+    - below: (−level, id) max-heap → 가격 ≤ 맨 위 level 인 것만 꺼냄 (롱 손절, 숏 익절)
+    - above: (level, id) min-heap → 가격 ≥ 맨 위 level 인 것만 꺼냄 (롱 익절, 숏 손절)
+    - rising / falling: trailing 롱 / 숏 cohort heap (기준가 순)
+      새 고점(저점)이 나오면 그보다 낮은(높은) 기준가의 cohort 는 모두 기준가가 현재가가 되므로 하나로 합침
+      → 고점 갱신 비용이 트리거 수가 아니라 cohort 수에 비례. 발동은 cohort 안에서 callback 작은 순
+    틱마다 건드리는 항목은 넘어선 트리거 수에 비례 (전체 스캔 없음).
+    취소된 트리거 항목은 꺼낼 때 버리고, 너무 쌓이면 이 심볼만 다시 만듦.
+    """
+
+    __slots__ = ("below", "above", "rising", "falling", "cohort_of", "ids", "stale", "lo", "hi", "_seq")
+
+    def __init__(self):
+        self.below: list[tuple[float, int]] = []
+        self.above: list[tuple[float, int]] = []
+        self.rising: list[tuple[float, int, _Cohort]] = []     # (최고가, seq, cohort)
+        self.falling: list[tuple[float, int, _Cohort]] = []    # (−최저가, seq, cohort)
+        self.cohort_of: dict[int, _Cohort] = {}
+        self.ids: set[int] = set()
+        self.stale = 0
+        # lo < 가격 < hi 이면 이 심볼은 할 일 없음 (발동/고점 갱신 없음) → evaluate 생략
+        self.lo = -math.inf
+        self.hi = math.inf
+        self._seq = itertools.count()
+
+    def needs_compaction(self) -> bool:
+        return self.stale > _COMPACT_RATIO * len(self.ids) + 64
+
+    def push(self, t: Trigger) -> None:
+        if t.kind == KIND_TRAILING:
+            cohort = _Cohort(t.extreme, [(t.callback, t.id)])
+            self.cohort_of[t.id] = cohort
+            if t.is_long:
+                heapq.heappush(self.rising, (t.extreme, next(self._seq), cohort))
+                self.lo = max(self.lo, t.extreme * (1.0 - t.callback))
+                self.hi = min(self.hi, t.extreme)
+            else:
+                heapq.heappush(self.falling, (-t.extreme, next(self._seq), cohort))
+                self.lo = max(self.lo, t.extreme)
+                self.hi = min(self.hi, t.extreme * (1.0 + t.callback))
+        elif t.fires_below:
+            heapq.heappush(self.below, (-t.level, t.id))
+            self.lo = max(self.lo, t.level)
+        else:
+            heapq.heappush(self.above, (t.level, t.id))
+            self.hi = min(self.hi, t.level)
+
+    def _bounds(self) -> None:
+        """evaluate 후 다음 틱에 할 일이 생기는 가격 경계 재계산 (취소된 항목이 남아 있으면 보수적으로 좁음)"""
+        lo = -self.below[0][0] if self.below else -math.inf
+        hi = self.above[0][0] if self.above else math.inf
+        if self.rising:
+            hi = min(hi, self.rising[0][0])
+            for _, _, cohort in self.rising:
+                lo = max(lo, cohort.extreme * (1.0 - cohort.members[0][0]))
+        if self.falling:
+            lo = max(lo, -self.falling[0][0])
+            for _, _, cohort in self.falling:
+                hi = min(hi, cohort.extreme * (1.0 + cohort.members[0][0]))
+        self.lo = lo
+        self.hi = hi
+
+    def refresh(self, t: Trigger) -> None:
+        """trailing 기준가/발동가를 cohort 값으로 맞춤 (조회용)"""
+        cohort = self.cohort_of.get(t.id)
+        if cohort is not None:
+            t.extreme = cohort.extreme
+            t.level = cohort.extreme * (1.0 - t.callback if t.is_long else 1.0 + t.callback)
+
+    def rebuild(self, triggers: dict[int, Trigger]) -> None:
+        live = [triggers[tid] for tid in self.ids]
+        for t in live:
+            self.refresh(t)
+        self.below, self.above, self.rising, self.falling = [], [], [], []
+        self.cohort_of = {}
+        self.stale = 0
+        self.lo, self.hi = -math.inf, math.inf
+        for t in live:
+            self.push(t)
+
+    def _merge(self, heap: list, key: float, extreme: float) -> None:
+        """heap 맨 위에서 key 보다 작은 cohort 를 모두 꺼내 기준가 extreme 인 하나로 합침"""
+        merged = heapq.heappop(heap)[2]
+        while heap and heap[0][0] < key:
+            other = heapq.heappop(heap)[2]
+            if len(other.members) > len(merged.members):
+                merged, other = other, merged
+            # 작은 쪽을 큰 쪽에 넣음 (옮겨지는 트리거마다 cohort 참조 갱신)
+            for member in other.members:
+                heapq.heappush(merged.members, member)
+                self.cohort_of[member[1]] = merged
+        merged.extreme = extreme
+        heapq.heappush(heap, (key, next(self._seq), merged))
+
+    def _pop_cohort(self, cohort: _Cohort, limit: float, triggers: dict[int, Trigger], fired: list[Trigger]) -> bool:
+        """cohort 에서 callback ≤ limit 인 트리거를 발동 목록에. cohort 가 비면 True"""
+        members = cohort.members
+        while members and members[0][0] <= limit:
+            _, tid = heapq.heappop(members)
+            t = triggers.get(tid)
+            if t is None:
+                self.stale -= 1
+                continue
+            self.refresh(t)
+            fired.append(t)
+        return not members
+
+    def evaluate(self, price: float, triggers: dict[int, Trigger], fired: list[Trigger]) -> None:
+        # 1) trailing: 새 고점/저점이면 해당 cohort 들의 기준가를 현재가로 (합침) 후 되돌림 확인
+        rising = self.rising
+        if rising:
+            if rising[0][0] < price:
+                self._merge(rising, price, price)
+            emptied = False
+            for _, _, cohort in rising:
+                # 롱: price ≤ 최고가 × (1 − cb)  ⇔  cb ≤ 1 − price / 최고가
+                if cohort.members[0][0] <= 1.0 - price / cohort.extreme:
+                    emptied |= self._pop_cohort(cohort, 1.0 - price / cohort.extreme, triggers, fired)
+            if emptied:
+                rising[:] = [entry for entry in rising if entry[2].members]
+                heapq.heapify(rising)
+
+        falling = self.falling
+        if falling:
+            if -falling[0][0] > price:
+                self._merge(falling, -price, price)
+            emptied = False
+            for _, _, cohort in falling:
+                # 숏: price ≥ 최저가 × (1 + cb)  ⇔  cb ≤ price / 최저가 − 1
+                if cohort.members[0][0] <= price / cohort.extreme - 1.0:
+                    emptied |= self._pop_cohort(cohort, price / cohort.extreme - 1.0, triggers, fired)
+            if emptied:
+                falling[:] = [entry for entry in falling if entry[2].members]
+                heapq.heapify(falling)
+
+        # 2) 가격이 넘어선 stop / take_profit 만 꺼냄
+        below = self.below
+        while below and -below[0][0] >= price:
+            _, tid = heapq.heappop(below)
+            t = triggers.get(tid)
+            if t is not None:
+                fired.append(t)
+            else:
+                self.stale -= 1
+
+        above = self.above
+        while above and above[0][0] <= price:
+            _, tid = heapq.heappop(above)
+            t = triggers.get(tid)
+            if t is not None:
+                fired.append(t)
+            else:
+                self.stale -= 1
+
+        self._bounds()
+
+
+ExitHandler = Callable[[Trigger], Awaitable[dict]]
+
+
+class TriggerEngine:
+    """
+    거래소 주문으로 표현하기 어려운 청산 조건 (트레일링, 시간 청산, 단계별 부분 익절) 을 프로세스 안에서 평가.
+    - 가격: 마크가격 스트림 수신 시 on_prices (app/services/mark_price.py listener) → 심볼별 heap 으로 넘어선 것만
+    - 시간: run_trigger_clock 이 TRIGGER_CLOCK_INTERVAL 마다 deadline heap 확인
+    - 발동: 심볼 실행 큐(execution.scheduler)에 청산 작업 제출 → 웹훅 알림과 같은 순서로 직렬 실행
+      one-way / hedge 청산 함수는 switching.py / switching_hedge.py 가 register_exit 로 등록
+    트리거는 메모리에만 있음 (재시작 시 다시 걸어야 함). 포지션이 전량 청산되면 cancel_position 으로 함께 삭제.
+    """
+
+    def __init__(self):
+        self._triggers: dict[int, Trigger] = {}
+        self._books: dict[str, _SymbolBook] = {}
+        self._deadlines: list[tuple[float, int]] = []
+        # (symbol, profile, position_side) -> trigger id
+        self._by_position: dict[tuple[str, str, str | None], set[int]] = {}
+        self._exits: dict[bool, ExitHandler] = {}
+        self._ids = itertools.count(1)
+        self.stats: dict[str, float] = {
+            "live": 0,
+            "fired": 0,
+            "ticks": 0,
+            "last_eval_us": 0.0,
+            "max_eval_us": 0.0,
+        }
+
+    def register_exit(self, hedge: bool, handler: ExitHandler) -> None:
+        """발동된 트리거를 실제로 청산할 함수 (hedge=True: position_side 있는 트리거)"""
+        self._exits[hedge] = handler
+
+    # ── 등록 / 삭제 ─────────────────────────────────
+    def add(self, trigger: Trigger) -> Trigger:
+        if trigger.kind not in KINDS:
+            raise ValueError(f"unknown trigger kind {trigger.kind!r}")
+        if trigger.kind == KIND_TRAILING:
+            if not 0.0 < trigger.callback < 1.0 or trigger.extreme <= 0:
+                raise ValueError("trailing trigger needs 0 < callback < 1 and a reference price")
+            trigger.level = trigger.extreme * (1.0 - trigger.callback if trigger.is_long else 1.0 + trigger.callback)
+
+        trigger.id = next(self._ids)
+        self._triggers[trigger.id] = trigger
+        self._by_position.setdefault(
+            (trigger.symbol, trigger.profile, trigger.position_side), set()
+        ).add(trigger.id)
+
+        if trigger.kind == KIND_TIME:
+            heapq.heappush(self._deadlines, (trigger.deadline, trigger.id))
+        else:
+            book = self._books.get(trigger.symbol)
+            if book is None:
+                book = self._books[trigger.symbol] = _SymbolBook()
+            book.push(trigger)
+            book.ids.add(trigger.id)
+        self.stats["live"] = len(self._triggers)
+        logger.info(f"[Trigger] Armed #{trigger.id} {trigger.kind} {trigger.profile}:{trigger.symbol} "
+                    f"level={trigger.level} fraction={trigger.fraction}")
+        return trigger
+
+    def _remove(self, trigger: Trigger, fired: bool = False) -> None:
+        self._triggers.pop(trigger.id, None)
+        self.stats["live"] = len(self._triggers)
+        key = (trigger.symbol, trigger.profile, trigger.position_side)
+        ids = self._by_position.get(key)
+        if ids is not None:
+            ids.discard(trigger.id)
+            if not ids:
+                del self._by_position[key]
+
+        if trigger.kind != KIND_TIME:
+            book = self._books[trigger.symbol]
+            book.ids.discard(trigger.id)
+            book.cohort_of.pop(trigger.id, None)
+            if not book.ids:
+                del self._books[trigger.symbol]
+            elif not fired:
+                # 발동분은 이미 heap 에서 꺼냄. 취소분은 heap 에 남아 꺼낼 때 버려짐
+                book.stale += 1
+                if book.needs_compaction():
+                    book.rebuild(self._triggers)
+
+    def cancel(self, trigger_id: int) -> bool:
+        trigger = self._triggers.get(trigger_id)
+        if trigger is None:
+            return False
+        self._remove(trigger)
+        return True
+
+    def cancel_position(self, symbol: str, profile: str, position_side: str | None = None) -> int:
+        """포지션이 청산되면 그 포지션에 걸린 트리거 전부 삭제. 삭제 수 반환"""
+        ids = self._by_position.get((symbol, profile, position_side))
+        if not ids:
+            return 0
+        removed = [self._triggers[i] for i in list(ids)]
+        for trigger in removed:
+            self._remove(trigger)
+        logger.info(f"[Trigger] Position closed, dropped {len(removed)} triggers for {profile}:{symbol}")
+        return len(removed)
+
+    def find(self, symbol: str | None = None, profile: str | None = None) -> list[Trigger]:
+        found = [t for t in self._triggers.values()
+                 if (symbol is None or t.symbol == symbol) and (profile is None or t.profile == profile)]
+        for t in found:
+            if t.kind == KIND_TRAILING:
+                self._books[t.symbol].refresh(t)
+        return found
+
+    # ── 평가 ─────────────────────────────────────────
+    def on_prices(self, items: list[dict]) -> None:
+        """markPriceUpdate 목록 수신 시 (스트림 루프에서 동기 호출)"""
+        books = self._books
+        if not books:
+            return
+        t0 = time.perf_counter()
+        fired: list[Trigger] = []
+        triggers = self._triggers
+        for item in items:
+            book = books.get(item["s"])
+            if book is not None:
+                price = float(item["p"])
+                if price <= book.lo or price >= book.hi:
+                    book.evaluate(price, triggers, fired)
+        for trigger in fired:
+            self._fire(trigger)
+
+        elapsed = (time.perf_counter() - t0) * 1e6
+        self.stats["ticks"] += 1
+        self.stats["last_eval_us"] = round(elapsed, 1)
+        self.stats["max_eval_us"] = max(self.stats["max_eval_us"], round(elapsed, 1))
+
+    def check_deadlines(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        deadlines = self._deadlines
+        count = 0
+        while deadlines and deadlines[0][0] <= now:
+            _, tid = heapq.heappop(deadlines)
+            trigger = self._triggers.get(tid)
+            if trigger is not None:
+                self._fire(trigger)
+                count += 1
+        return count
+
+    def _fire(self, trigger: Trigger) -> None:
+        self._remove(trigger, fired=trigger.kind != KIND_TIME)
+        self.stats["fired"] += 1
+        handler = self._exits.get(trigger.position_side is not None)
+        if handler is None:
+            logger.error(f"[Trigger] No exit handler for #{trigger.id} ({trigger.profile}:{trigger.symbol})")
+            return
+        logger.info(f"[Trigger] Fired #{trigger.id} {trigger.kind} {trigger.profile}:{trigger.symbol} "
+                    f"level={trigger.level:.8g} fraction={trigger.fraction}")
+        try:
+            fut = scheduler.submit((ACCOUNT, trigger.symbol), handler, trigger)
+        except HTTPException:
+            # 종료 중(스케줄러가 새 작업을 받지 않음). 가격 스트림 콜백이라 예외를 올리지 않음
+            logger.warning(f"[Trigger] Exit for #{trigger.id} dropped: shutting down")
+            return
+        fut.add_done_callback(lambda f, t=trigger: self._done(t, f))
+
+    @staticmethod
+    def _done(trigger: Trigger, fut: asyncio.Future) -> None:
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            logger.error(f"[Trigger] Exit for #{trigger.id} failed: {fut.exception()!r}")
+        else:
+            logger.info(f"[Trigger] Exit for #{trigger.id} done: {fut.result()}")
+
+
+engine = TriggerEngine()
+
+
+async def run_trigger_clock() -> None:
+    """시간 트리거 확인 (백그라운드 작업, app/services/runtime.py 가 실행)"""
+    while True:
+        await asyncio.sleep(TRIGGER_CLOCK_INTERVAL)
+        engine.check_deadlines()
@@ -0,0 +1,71 @@
+# app/services/user_stream.py
+
+import logging
+from collections import defaultdict
+from typing import Callable
+
+from app.clients.binance_async_client import get_binance_async_client, get_socket_manager
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# event type("e") -> handler 목록
+_handlers: dict[str, list[Callable[[dict], None]]] = defaultdict(list)
+_connected: bool = False
+# (재)연결될 때마다 증가 → 연결 사이에 놓친 이벤트가 있을 수 있음을 알림
+_connection_id: int = 0
+
+
+def register_handler(event_type: str, handler: Callable[[dict], None]) -> None:
+    """
+    선물 user-data stream 이벤트 핸들러 등록.
+    핸들러는 이벤트 루프 위에서 동기로 호출되므로 짧게 끝나야 합니다.
+    """
+    if handler not in _handlers[event_type]:
+        _handlers[event_type].append(handler)
+
+
+def is_connected() -> bool:
+    """스트림이 살아있을 때만 이벤트 기반 대기를 신뢰할 수 있습니다."""
+    return _connected
+
+
+def connection_id() -> int:
+    return _connection_id
+
+
+def dispatch(msg: dict) -> None:
+    for handler in _handlers.get(msg.get("e"), ()):
+        try:
+            handler(msg)
+        except Exception:
+            logger.exception(f"[UserStream] Handler failed for {msg.get('e')}")
+
+
+async def run_user_stream() -> None:
+    """
+    선물 user-data stream 소비 (백그라운드 작업, app/services/runtime.py 가 실행).
+    연결이 끊겨 예외가 나면 runtime 이 backoff 후 다시 호출합니다.
+    """
+    global _connected, _connection_id
+
+    client = await get_binance_async_client()
+    bsm = get_socket_manager(client)
+
+    async with bsm.futures_user_socket() as stream:
+        logger.info("[UserStream] Connected to futures user-data stream")
+        _connected = True
+        _connection_id += 1
+        try:
+            while True:
+                msg = await stream.recv()
+                if msg.get("e") == "error":
+                    # 라이브러리 자체 재연결(최대 5회)을 다 쓰면 더 이상 메시지가 오지 않음
+                    # → 예외로 끝내 runtime 이 새 listenKey / 새 소켓으로 다시 시작
+                    if msg.get("type") == "BinanceWebsocketUnableToConnect":
+                        raise ConnectionError(f"user-data stream gave up reconnecting: {msg}")
+                    logger.warning(f"[UserStream] Stream error: {msg}")
+                    continue
+                dispatch(msg)
+        finally:
+            _connected = False
@@ -1,73 +1,266 @@
 # app/state.py
+import time
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-monitor_states: dict[str, dict] = {}
+_KST = ZoneInfo("Asia/Seoul")
+_TIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+# 시각 필드는 epoch 초(float, 0 = 없음)로 저장. dict 식 접근(state["entry_time"])에서만 KST 문자열로 변환
+_TIME_FIELDS = frozenset({"entry_time", "last_reset", "update_time", "last_order_time"})
+
+# 마지막 저널 flush 이후 값이 바뀐 상태 key (app/services/state_journal.py 가 수거)
+_dirty: set[str] = set()
+# 마지막 대시보드 push 이후 값이 바뀐 상태 key (app/services/dashboard_feed.py 가 수거)
+_changed: set[str] = set()
+# 포지션(수량/진입가/방향)이 바뀐 상태 key (app/services/monitor.py 가 포지션 테이블 갱신에 사용)
+_moved: set[str] = set()
+_POSITION_FIELDS = frozenset({"position_qty", "entry_price", "position_side"})
+_HEDGE_POSITION_FIELDS = frozenset({"qty", "entry_price"})
+
+_set = object.__setattr__
+
+
+def format_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts, _KST).strftime(_TIME_FMT) if ts else ""
+
+
+def parse_ts(value) -> float:
+    """epoch 초 / "YYYY-mm-dd HH:MM:SS" / "YYYY-mm-dd" (KST) → epoch 초"""
+    if not value:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    fmt = _TIME_FMT if len(value) > 10 else "%Y-%m-%d"
+    return datetime.strptime(value, fmt).replace(tzinfo=_KST).timestamp()
+
+
+class _Compat:
+    """
+    기존 dict 기반 코드(state.get / state["x"] / state.update)용 접근자.
+    슬롯에 없는 키는 extra dict 에 보관합니다 (monitor/dashboard 의 TP/SL 표시 필드 등).
+    """
+    __slots__ = ()
+
+    def __getitem__(self, name: str):
+        if name in self.__dataclass_fields__ and not name.startswith("_"):
+            value = getattr(self, name)
+            return format_ts(value) if name in _TIME_FIELDS else value
+        extra = self.extra
+        if extra is not None and name in extra:
+            return extra[name]
+        raise KeyError(name)
+
+    def __setitem__(self, name: str, value) -> None:
+        if name in self.__dataclass_fields__ and not name.startswith("_"):
+            setattr(self, name, parse_ts(value) if name in _TIME_FIELDS else value)
+            return
+        if self.extra is None:
+            _set(self, "extra", {})
+        self.extra[name] = value
+        _dirty.add(self.key)
+        _changed.add(self.key)
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, name: str, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def update(self, values: dict | None = None, **kwargs) -> None:
+        for name, value in {**(values or {}), **kwargs}.items():
+            self[name] = value
+
+
+@dataclass(slots=True)
+class HedgeSide(_Compat):
+    """webhook5/6 (Hedge) 한쪽 방향의 거래소 동기화 포지션"""
+    key: str                      # 소유 ProfileState key (dirty 표시용)
+    qty: float = 0.0              # Binance positionAmt (LONG +, SHORT 는 보통 -)
+    entry_price: float = 0.0      # Binance entryPrice
+    unrealized_pnl: float = 0.0
+    update_time: float = 0.0      # 마지막 동기화 시각 (epoch)
+    last_order_qty: float = 0.0
+    last_order_time: float = 0.0
+    extra: dict | None = None
+
+    def __setattr__(self, name, value):
+        _set(self, name, value)
+        _dirty.add(self.key)
+        _changed.add(self.key)
+        if name in _HEDGE_POSITION_FIELDS:
+            _moved.add(self.key)
+
+    def to_dict(self) -> dict:
+        d = {f: getattr(self, f) for f in _HEDGE_FIELDS}
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+
+@dataclass(slots=True)
+class ProfileState(_Compat):
+    key: str                      # "profile:symbol"
+    profile: str
+    symbol: str
+
+    # 공통 자본
+    capital: float = 50.0          # 복리용(웹훅5: compounding)
+    initial_capital: float = 50.0  # 고정자본용(웹훅6: no compounding)
+
+    # ===== 기존 webhook1~4 호환 필드(유지) =====
+    entry_price: float = 0.0
+    position_qty: float = 0.0
+    position_side: str | None = None
+    entry_time: float = 0.0
+
+    current_price: float = 0.0
+    pnl: float = 0.0
+    daily_pnl: float = 0.0
+
+    trade_count: int = 0
+    long_count: int = 0
+    short_count: int = 0
+
+    leverage: int = 1
+    last_reset: float = field(default_factory=time.time)
+
+    # ===== webhook5/6 (Hedge) 전용 필드 =====
+    hedge_long: HedgeSide | None = None
+    hedge_short: HedgeSide | None = None
+    # 요청 레버리지 정책 확인용(“열려있으면 일치 강제”)
+    hedge_symbol_leverage: int = 1
+    # 추가진입 카운터(가드 넣을 때 유용)
+    hedge_long_add_count: int = 0
+    hedge_short_add_count: int = 0
+
+    extra: dict | None = None
+
+    def __post_init__(self):
+        if self.hedge_long is None:
+            _set(self, "hedge_long", HedgeSide(self.key))
+        if self.hedge_short is None:
+            _set(self, "hedge_short", HedgeSide(self.key))
+
+    def __setattr__(self, name, value):
+        _set(self, name, value)
+        _dirty.add(self.key)
+        _changed.add(self.key)
+        if name in _POSITION_FIELDS:
+            _moved.add(self.key)
+
+    def __getitem__(self, name: str):
+        # 기존 state["hedge"]["long"]["qty"] 형태 호환
+        if name == "hedge":
+            return {"long": self.hedge_long, "short": self.hedge_short}
+        return _Compat.__getitem__(self, name)
+
+    def to_dict(self) -> dict:
+        """저널/스냅샷용 (시각은 epoch 그대로)"""
+        d = {f: getattr(self, f) for f in _STATE_FIELDS}
+        d["hedge"] = {"long": self.hedge_long.to_dict(), "short": self.hedge_short.to_dict()}
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    @classmethod
+    def from_dict(cls, key: str, data: dict) -> "ProfileState":
+        """to_dict 결과 또는 예전 dict 상태(문자열 시각, 중첩 hedge dict) 복원"""
+        profile, symbol = key.split(":", 1)
+        state = cls(key, profile, symbol)
+        for name, value in data.items():
+            if name == "hedge":
+                for side, sub in (value or {}).items():
+                    target = state.hedge_long if side == "long" else state.hedge_short
+                    for k, v in sub.items():
+                        target[k] = v
+            elif name not in ("key", "profile", "symbol"):
+                state[name] = value
+        return state
+
+
+_HEDGE_FIELDS = tuple(f.name for f in fields(HedgeSide) if f.name not in ("key", "extra"))
+_STATE_FIELDS = tuple(
+    f.name for f in fields(ProfileState)
+    if f.name not in ("key", "hedge_long", "hedge_short", "extra")
+)
+
+# "profile:symbol" -> ProfileState (전체 순회/저널용)
+monitor_states: dict[str, ProfileState] = {}
+# profile -> symbol -> ProfileState (조회/목록 O(1))
+_index: dict[str, dict[str, ProfileState]] = {}
+
 
 def _make_key(symbol: str, profile: str) -> str:
     return f"{profile}:{symbol}"
 
 
-def _default_state(symbol: str, profile: str) -> dict:
-    now_str = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-    return {
-        "profile": profile,
-        "symbol": symbol,
-
-        # 공통 자본
-        "capital": 50.0,          # 복리용(웹훅5: compounding)
-        "initial_capital": 50.0,  # 고정자본용(웹훅6: no compounding)
-
-        # ===== 기존 webhook1~4 호환 필드(유지) =====
-        "entry_price": 0.0,
-        "position_qty": 0.0,
-        "position_side": None,
-        "entry_time": "",
-
-        "current_price": 0.0,
-        "pnl": 0.0,
-        "daily_pnl": 0.0,
-
-        "trade_count": 0,
-        "long_count": 0,
-        "short_count": 0,
-
-        "leverage": 1,
-        "last_reset": now_str,
-
-        # ===== webhook5/6 (Hedge) 전용 필드 =====
-        # 거래소 동기화용(진짜 포지션 상태)
-        "hedge": {
-            "long": {
-                "qty": 0.0,         # Binance positionAmt (LONG는 +)
-                "entry_price": 0.0, # Binance entryPrice
-                "unrealized_pnl": 0.0,
-                "update_time": "",  # 마지막 동기화 시각(Asia/Seoul 문자열)
-            },
-            "short": {
-                "qty": 0.0,         # Binance positionAmt (SHORT는 -로 내려오는 경우 많음)
-                "entry_price": 0.0,
-                "unrealized_pnl": 0.0,
-                "update_time": "",
-            },
-        },
-
-        # 요청 레버리지 정책 확인용(“열려있으면 일치 강제”)
-        "hedge_symbol_leverage": 1,
-
-        # 추가진입 카운터(가드 넣을 때 유용)
-        "hedge_long_add_count": 0,
-        "hedge_short_add_count": 0,
-    }
-
-
-def get_state(symbol: str, profile: str = "default") -> dict:
-    key = _make_key(symbol, profile)
-    if key not in monitor_states:
-        monitor_states[key] = _default_state(symbol, profile)
-    return monitor_states[key]
+def _register(state: ProfileState) -> None:
+    monitor_states[state.key] = state
+    _index.setdefault(state.profile, {})[state.symbol] = state
+
+
+def get_state(symbol: str, profile: str = "default") -> ProfileState:
+    by_symbol = _index.get(profile)
+    if by_symbol is not None:
+        state = by_symbol.get(symbol)
+        if state is not None:
+            return state
+
+    state = ProfileState(_make_key(symbol, profile), profile, symbol)
+    _register(state)
+    return state
 
 
 def list_symbols(profile: str) -> list[str]:
-    prefix = f"{profile}:"
-    return [k.split(":", 1)[1] for k in monitor_states.keys() if k.startswith(prefix)]
\ No newline at end of file
+    return list(_index.get(profile, ()))
+
+
+def load_states(rows: dict[str, dict]) -> None:
+    """영속화된 상태로 monitor_states 를 채웁니다 (기본값 위에 덮어써서 새 필드도 유지)."""
+    for key, data in rows.items():
+        _register(ProfileState.from_dict(key, data))
+        # 방금 읽은 값이라 다시 쓸 필요 없음
+        _dirty.discard(key)
+
+
+def mark_dirty(keys) -> None:
+    _dirty.update(keys)
+
+
+def drain_dirty() -> list[str]:
+    """flush 대상 key 를 꺼내고 비웁니다 (집합을 통째로 교체 → 다른 스레드의 표시 유실 없음)."""
+    global _dirty
+    keys, _dirty = _dirty, set()
+    return list(keys)
+
+
+def drain_moved() -> list[str]:
+    """포지션이 바뀐 key 를 꺼내고 비웁니다."""
+    global _moved
+    keys, _moved = _moved, set()
+    return list(keys)
+
+
+def set_live(target: "ProfileState | HedgeSide", name: str, value) -> None:
+    """
+    시세로 매번 다시 계산되는 값(현재가 / 미실현 손익) 갱신.
+    저널(dirty)에는 남기지 않고 대시보드 변경 표시만 합니다.
+    """
+    _set(target, name, value)
+    _changed.add(target.key)
+
+
+def drain_changed() -> list[str]:
+    """대시보드 push 대상 key 를 꺼내고 비웁니다 (저널의 dirty 와 별개)."""
+    global _changed
+    keys, _changed = _changed, set()
+    return list(keys)
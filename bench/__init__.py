@@ -0,0 +1,5 @@
+# bench/__init__.py
+"""
+성능 측정 스크립트 모음.
+각 모듈은 `python -m bench.<module>` 으로 실행합니다.
+"""
@@ -0,0 +1,129 @@
+# bench/bench_analytics.py
+"""
+성과 분석 비교 (거래 이력이 많을 때 /analytics 응답 시간)
+
+  기존: 거래 이력을 행(dict) 단위 파이썬 루프로 매번 전체 재계산
+  신규: app.services.analytics.TradeAnalytics (원장 memmap 컬럼 + NumPy 증분 집계)
+
+실행:
+  python -m bench.bench_analytics
+  python -m bench.bench_analytics --trades 1000000
+"""
+
+import argparse
+import math
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.analytics import TradeAnalytics
+from app.services.trade_ledger import COLUMNS, KIND_ENTRY, KIND_EXIT, TradeLedger
+
+PROFILES = [f"webhook{i + 1}" for i in range(6)]
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT"]
+
+
+def _synthetic_rows(trades: int, t0: float, seed: int) -> np.ndarray:
+    """진입/청산 한 쌍씩 (2 × trades 행)"""
+    rng = np.random.default_rng(seed)
+    rows = np.zeros(trades * 2, dtype=list(COLUMNS))
+    ts = t0 + np.cumsum(rng.uniform(1, 120, trades))
+    hold = rng.uniform(30, 3600, trades)
+    profile = np.array(PROFILES, dtype="S16")[rng.integers(0, len(PROFILES), trades)]
+    symbol = np.array(SYMBOLS, dtype="S20")[rng.integers(0, len(SYMBOLS), trades)]
+    side = np.where(rng.random(trades) < 0.5, 1, -1).astype("i1")
+    entry = rng.uniform(10, 100, trades)
+    exit_ = entry * (1 + rng.normal(0, 0.01, trades))
+    qty = rng.uniform(0.1, 2, trades)
+    fee = 0.0005 * qty * (entry + exit_)
+    pnl = (exit_ - entry) * qty * side - fee
+
+    for i, (t, kind) in enumerate(((ts, KIND_ENTRY), (ts + hold, KIND_EXIT))):
+        part = rows[i::2]
+        part["ts"], part["profile"], part["symbol"] = t, profile, symbol
+        part["kind"], part["side"], part["qty"], part["entry_price"] = kind, side, qty, entry
+        part["leverage"] = 5
+        if kind == KIND_EXIT:
+            part["exit_price"], part["fee"], part["net_pnl"] = exit_, fee, pnl
+            part["net_pnl_pct"] = pnl / (qty * entry / 5) * 100
+    rows.sort(order="ts", kind="stable")
+    return rows
+
+
+def _write(ledger: TradeLedger, rows: np.ndarray) -> None:
+    for row in rows.tolist():
+        ledger.append(row)
+    ledger.write_pending()
+
+
+def _legacy_report(history: list[dict]) -> dict:
+    """행 단위 루프 (profile 별 승률/손익/샤프/낙폭/보유 시간)"""
+    out: dict[str, dict] = {}
+    opened: dict[tuple, float] = {}
+    for row in history:
+        key = (row["profile"], row["symbol"], row["side"])
+        if row["kind"] == KIND_ENTRY:
+            opened.setdefault(key, row["ts"])
+            continue
+        g = out.setdefault(row["profile"], {"n": 0, "wins": 0, "pnl": 0.0, "r": [], "eq": 0.0, "peak": 0.0,
+                                            "mdd": 0.0, "hold": 0.0})
+        g["n"] += 1
+        g["wins"] += row["net_pnl"] > 0
+        g["pnl"] += row["net_pnl"]
+        g["r"].append(row["net_pnl_pct"] / 100)
+        g["eq"] += row["net_pnl"]
+        g["peak"] = max(g["peak"], g["eq"])
+        g["mdd"] = max(g["mdd"], g["peak"] - g["eq"])
+        g["hold"] += row["ts"] - opened.pop(key, row["ts"])
+    for g in out.values():
+        r = g.pop("r")
+        mean = sum(r) / len(r)
+        std = math.sqrt(sum((x - mean) ** 2 for x in r) / max(len(r) - 1, 1))
+        g["sharpe"] = mean / std if std else None
+    return out
+
+
+def _ms(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=150_000)
+    parser.add_argument("--incremental", type=int, default=500, help="추가로 들어오는 거래 수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = TradeLedger(tmp, 65536)
+        ledger.open()
+        history = _synthetic_rows(args.trades, 1.7e9, seed=1)
+        _write(ledger, history)
+        extra = _synthetic_rows(args.incremental, float(history["ts"][-1]) + 1, seed=2)
+
+        names = [name for name, _ in COLUMNS]
+        dicts = [dict(zip(names, row)) for row in history.tolist()]
+        legacy_full = _ms(lambda: _legacy_report(dicts))
+
+        analytics = TradeAnalytics(ledger)
+        first = _ms(analytics.refresh)
+        report = _ms(analytics.report)
+
+        _write(ledger, extra)
+        dicts.extend(dict(zip(names, row)) for row in extra.tolist())
+        legacy_inc = _ms(lambda: _legacy_report(dicts))
+        incremental = _ms(analytics.refresh)
+
+        print(f"{len(ledger)} ledger rows ({args.trades} + {args.incremental} trades, "
+              f"{len(PROFILES)} profiles × {len(SYMBOLS)} symbols)")
+        print(f"{'':28s}{'legacy':>12s}{'numpy':>12s}")
+        print(f"{'full history (ms)':28s}{legacy_full:12.2f}{first:12.2f}")
+        print(f"{'+new trades (ms)':28s}{legacy_inc:12.2f}{incremental:12.2f}")
+        print(f"{'report() only (ms)':28s}{'':>12s}{report:12.2f}")
+        ledger.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench/bench_metrics.py
+"""
+계측 오버헤드 측정 (운영에서 항상 켜두기 위한 확인용)
+
+  bare     : 아무것도 안 하는 코루틴 await
+  timed    : @timed(...) 로 감싼 같은 코루틴 (알림 컨텍스트 안)
+  observe  : Histogram.observe 1회
+
+실행:
+  python -m bench.bench_metrics
+"""
+
+import asyncio
+import time
+
+from app import metrics
+
+N = 200_000
+
+
+async def _noop():
+    return None
+
+
+_timed_noop = metrics.timed("bench")(_noop)
+
+
+@metrics.track_alert
+async def _alert(symbol: str, action: str, profile: str = "bench"):
+    t0 = time.perf_counter()
+    for _ in range(N):
+        await _noop()
+    bare = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(N):
+        await _timed_noop()
+    timed = time.perf_counter() - t0
+    return bare, timed
+
+
+def main() -> None:
+    bare, timed = asyncio.run(_alert("BTCUSDT", "BUY"))
+
+    h = metrics.Histogram("bench_seconds", "bench", ("a", "b"))
+    labels = ("x", "y")
+    t0 = time.perf_counter()
+    for i in range(N):
+        h.observe(labels, 0.003)
+    observe = time.perf_counter() - t0
+
+    print(f"bare    await : {bare / N * 1e6:.3f} µs")
+    print(f"@timed  await : {timed / N * 1e6:.3f} µs  (overhead {(timed - bare) / N * 1e6:.3f} µs)")
+    print(f"observe       : {observe / N * 1e6:.3f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# bench/bench_monitor.py
+"""
+포지션 모니터 비교 (열린 포지션이 많을 때 tick 비용 / REST 사용량)
+
+  기존: 상태마다 futures_symbol_ticker 1회 (POLL_INTERVAL 마다, 롱만) + state.update
+  신규: app.services.monitor.PositionMonitor (마크가격 스트림 캐시 + 열 배열 NumPy 1회, 롱/숏/hedge 전부)
+
+실행:
+  python -m bench.bench_monitor
+  python -m bench.bench_monitor --symbols 500 --profiles 6
+"""
+
+import argparse
+import random
+import time
+
+from app import state as state_mod
+from app.services import mark_price
+from app.services.monitor import PositionMonitor
+
+ROUNDS = 50
+
+
+def _legacy_tick(states: list, prices: dict[str, float]) -> int:
+    """기존 _poll_price_loop 한 바퀴에서 REST 호출을 뺀 부분 (요청 수 반환)"""
+    requests = 0
+    for state in states:
+        entry = state.get("entry_price", 0.0)
+        qty = state.get("position_qty", 0.0)
+        if entry <= 0 or qty <= 0:
+            continue
+        requests += 1
+        current = prices[state.symbol]
+        state.update({"current_price": current, "pnl": (current / entry - 1) * 100})
+    return requests
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--profiles", type=int, default=6)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    for p in range(args.profiles):
+        profile = f"webhook{p + 1}"
+        for sym in symbols:
+            st = state_mod.get_state(sym, profile)
+            if p < 4:
+                is_long = rng.random() < 0.5
+                st.entry_price = 100.0
+                st.position_qty = 1.0 if is_long else -1.0
+                st.position_side = "long" if is_long else "short"
+            else:
+                st.hedge_long.qty, st.hedge_long.entry_price = 1.0, 100.0
+                st.hedge_short.qty, st.hedge_short.entry_price = -1.0, 101.0
+
+    states = list(state_mod.monitor_states.values())
+    monitor = PositionMonitor()
+
+    def move_prices() -> dict[str, float]:
+        prices = {s: 100.0 + rng.uniform(-2, 2) for s in symbols}
+        mark_price.update_prices([{"s": s, "p": p} for s, p in prices.items()])
+        return prices
+
+    legacy_s = new_s = 0.0
+    requests = updated = 0
+    for _ in range(ROUNDS):
+        prices = move_prices()
+        t0 = time.perf_counter()
+        requests = _legacy_tick(states, prices)
+        legacy_s += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        updated = monitor.tick()
+        new_s += time.perf_counter() - t0
+        state_mod.drain_dirty()
+        state_mod.drain_changed()
+
+    print(f"{len(states)} states, {monitor.stats['positions']} open legs, {len(symbols)} symbols")
+    print(f"{'':30s}{'legacy':>12s}{'vectorized':>12s}")
+    print(f"{'tick CPU excl. REST (ms)':30s}{legacy_s / ROUNDS * 1000:12.2f}{new_s / ROUNDS * 1000:12.2f}")
+    print(f"{'REST requests / tick':30s}{requests:12d}{0:12d}")
+    print(f"{'legs updated / tick':30s}{requests:12d}{updated:12d}")
+    print(f"{'journal rows / tick':30s}{requests:12d}{0:12d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# bench/bench_state.py
+"""
+상태 모델 비교 (심볼 수가 많을 때 메모리 / 주문 경로 접근 비용)
+
+  기존: "profile:symbol" -> 중첩 dict (생성 시 datetime.now(ZoneInfo).strftime, 목록은 전체 key 스캔)
+  신규: app.state.ProfileState (slots) + profile -> symbol 인덱스
+
+실행:
+  python -m bench.bench_state
+  python -m bench.bench_state --symbols 2000 --profiles 6
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app import state as state_mod
+
+N = 200_000
+
+
+def _legacy_state(symbol: str, profile: str) -> dict:
+    """기존 app/state.py _default_state 와 같은 구조"""
+    now_str = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+    return {
+        "profile": profile, "symbol": symbol,
+        "capital": 50.0, "initial_capital": 50.0,
+        "entry_price": 0.0, "position_qty": 0.0, "position_side": None, "entry_time": "",
+        "current_price": 0.0, "pnl": 0.0, "daily_pnl": 0.0,
+        "trade_count": 0, "long_count": 0, "short_count": 0,
+        "leverage": 1, "last_reset": now_str,
+        "hedge": {
+            "long": {"qty": 0.0, "entry_price": 0.0, "unrealized_pnl": 0.0, "update_time": ""},
+            "short": {"qty": 0.0, "entry_price": 0.0, "unrealized_pnl": 0.0, "update_time": ""},
+        },
+        "hedge_symbol_leverage": 1, "hedge_long_add_count": 0, "hedge_short_add_count": 0,
+    }
+
+
+def _per_state_bytes(build, n: int) -> float:
+    tracemalloc.start()
+    base = tracemalloc.take_snapshot()
+    held = build(n)
+    used = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(base, "filename"))
+    tracemalloc.stop()
+    del held
+    return used / n
+
+
+def _timeit(fn, n: int = N) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--profiles", type=int, default=6)
+    args = parser.parse_args()
+
+    profiles = [f"webhook{i + 1}" for i in range(args.profiles)]
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    total = len(profiles) * len(symbols)
+
+    def build_legacy(_):
+        return {f"{p}:{s}": _legacy_state(s, p) for p in profiles for s in symbols}
+
+    def build_new(_):
+        state_mod.monitor_states.clear()
+        state_mod._index.clear()
+        for p in profiles:
+            for s in symbols:
+                state_mod.get_state(s, p)
+        return state_mod.monitor_states
+
+    legacy_bytes = _per_state_bytes(build_legacy, total)
+    new_bytes = _per_state_bytes(build_new, total)
+
+    legacy = build_legacy(total)
+    build_new(total)
+    sym, prof = symbols[len(symbols) // 2], profiles[-1]
+    key = f"{prof}:{sym}"
+
+    def legacy_get():
+        k = f"{prof}:{sym}"
+        return legacy[k] if k in legacy else None
+
+    legacy_st = legacy[key]
+    new_st = state_mod.get_state(sym, prof)
+
+    def legacy_read():
+        return legacy_st.get("capital", 0.0) * legacy_st.get("leverage", 1)
+
+    def new_read():
+        return new_st.capital * new_st.leverage
+
+    def legacy_write():
+        legacy_st["trade_count"] = legacy_st.get("trade_count", 0) + 1
+
+    def new_write():
+        new_st.trade_count += 1
+
+    def legacy_list():
+        prefix = f"{prof}:"
+        return [k.split(":", 1)[1] for k in legacy.keys() if k.startswith(prefix)]
+
+    state_mod.drain_dirty()
+    rows = [
+        ("memory / state (B)", legacy_bytes, new_bytes, 1),
+        ("get_state (µs)", _timeit(legacy_get), _timeit(lambda: state_mod.get_state(sym, prof)), 1),
+        ("read 2 fields (µs)", _timeit(legacy_read), _timeit(new_read), 1),
+        ("write counter (µs)", _timeit(legacy_write), _timeit(new_write), 1),
+        ("list_symbols (µs)", _timeit(legacy_list, 2000), _timeit(lambda: state_mod.list_symbols(prof), 2000), 1),
+    ]
+
+    print(f"{total} states ({len(profiles)} profiles × {len(symbols)} symbols)")
+    print(f"{'':22s}{'legacy':>12s}{'slots':>12s}")
+    for name, a, b, _ in rows:
+        print(f"{name:22s}{a:12.3f}{b:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench/bench_symbol_rules.py
+"""
+주문 1건당 LOT_SIZE 조회 비용 비교
+
+  기존: futures_exchange_info() 전체 응답 파싱 + next(...) 선형 탐색
+  신규: app.services.symbol_rules.lookup_symbol_rules() (dict O(1) 조회)
+
+실행:
+  python -m bench.bench_symbol_rules            # 합성 응답(네트워크 없음)
+  python -m bench.bench_symbol_rules --live     # 실제 exchange info 다운로드 시간 포함
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from app.services import symbol_rules
+
+
+def _synthetic_exchange_info(n_symbols: int) -> dict:
+    """실제 fapi exchangeInfo와 비슷한 구조/크기의 응답을 만듭니다."""
+    symbols = []
+    for i in range(n_symbols):
+        symbols.append({
+            "symbol": f"SYM{i}USDT",
+            "pair": f"SYM{i}USDT",
+            "contractType": "PERPETUAL",
+            "status": "TRADING",
+            "baseAsset": f"SYM{i}",
+            "quoteAsset": "USDT",
+            "pricePrecision": 4,
+            "quantityPrecision": 1,
+            "orderTypes": ["LIMIT", "MARKET", "STOP", "STOP_MARKET", "TAKE_PROFIT",
+                           "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET"],
+            "timeInForce": ["GTC", "IOC", "FOK", "GTX", "GTD"],
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": "0.0001", "maxPrice": "200000", "tickSize": "0.0001"},
+                {"filterType": "LOT_SIZE", "minQty": "0.1", "maxQty": "10000000", "stepSize": "0.1"},
+                {"filterType": "MARKET_LOT_SIZE", "minQty": "0.1", "maxQty": "1000000", "stepSize": "0.1"},
+                {"filterType": "MAX_NUM_ORDERS", "limit": 200},
+                {"filterType": "MAX_NUM_ALGO_ORDERS", "limit": 10},
+                {"filterType": "MIN_NOTIONAL", "notional": "5"},
+                {"filterType": "PERCENT_PRICE", "multiplierUp": "1.05", "multiplierDown": "0.95",
+                 "multiplierDecimal": "4"},
+            ],
+        })
+    return {"timezone": "UTC", "serverTime": 0, "rateLimits": [], "assets": [], "symbols": symbols}
+
+
+def _legacy_lookup(payload: str, symbol: str) -> tuple[float, float]:
+    info = json.loads(payload)
+    sym_info = next(s for s in info["symbols"] if s["symbol"] == symbol)
+    lot_f = next(f for f in sym_info["filters"] if f["filterType"] == "LOT_SIZE")
+    return float(lot_f["stepSize"]), float(lot_f["minQty"])
+
+
+def _cached_lookup(symbol: str) -> tuple[float, float]:
+    rules = symbol_rules.lookup_symbol_rules(symbol)
+    return rules.step_size, rules.min_qty
+
+
+def _timeit(fn, *args, rounds: int) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t0) * 1_000_000)  # µs
+    return samples
+
+
+def _summary(name: str, samples: list[float]) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"{name:<28} p50={statistics.median(samples):>12.2f}µs  p99={p99:>12.2f}µs"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=700)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="실제 futures_exchange_info() 다운로드 시간 측정")
+    args = parser.parse_args()
+
+    info = _synthetic_exchange_info(args.symbols)
+    payload = json.dumps(info)
+    # 최악의 경우(목록 끝) 심볼 기준
+    target = info["symbols"][-1]["symbol"]
+
+    symbol_rules._rules = symbol_rules._parse_exchange_info(info)
+
+    legacy = _timeit(_legacy_lookup, payload, target, rounds=args.rounds)
+    cached = _timeit(_cached_lookup, target, rounds=args.rounds * 100)
+
+    print(f"exchange info: {args.symbols} symbols, {len(payload) / 1024:.0f} KiB")
+    print(_summary("legacy parse+scan", legacy))
+    print(_summary("cached lookup_symbol_rules", cached))
+
+    if args.live:
+        from binance.client import Client
+
+        client = Client(ping=False)
+        live = _timeit(client.futures_exchange_info, rounds=5)
+        print(_summary("live futures_exchange_info", live))
+        saved = statistics.median(live) + statistics.median(legacy) - statistics.median(cached)
+    else:
+        saved = statistics.median(legacy) - statistics.median(cached)
+
+    print(f"saved per order (p50): {saved / 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
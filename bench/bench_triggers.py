@@ -0,0 +1,111 @@
+# bench/bench_triggers.py
+"""
+청산 트리거 평가 비교 (마크가격 틱 1회당 CPU)
+
+  기존: 틱마다 모든 트리거를 돌며 가격 비교 (트레일링은 고점 갱신까지 전부)
+  신규: app.services.trigger_engine.TriggerEngine (심볼별 heap, 넘어선 트리거만 꺼냄)
+
+실행:
+  python -m bench.bench_triggers
+  python -m bench.bench_triggers --symbols 500 --triggers 20000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.services.trigger_engine import (
+    TriggerEngine, Trigger, KIND_STOP, KIND_TAKE_PROFIT, KIND_TRAILING,
+)
+
+ROUNDS = 200
+
+
+def _legacy_tick(triggers: list[Trigger], prices: dict[str, float]) -> list[Trigger]:
+    fired = []
+    for t in triggers:
+        price = prices[t.symbol]
+        if t.kind == KIND_TRAILING:
+            if t.is_long and price > t.extreme:
+                t.extreme, t.level = price, price * (1 - t.callback)
+            elif not t.is_long and price < t.extreme:
+                t.extreme, t.level = price, price * (1 + t.callback)
+        if (price <= t.level) if t.fires_below else (price >= t.level):
+            fired.append(t)
+    return fired
+
+
+def _make(rng: random.Random, symbol: str, price: float) -> Trigger:
+    is_long = rng.random() < 0.5
+    kind = rng.choice((KIND_STOP, KIND_TAKE_PROFIT, KIND_TRAILING))
+    dist = rng.uniform(0.01, 0.05)
+    t = Trigger(symbol=symbol, profile="webhook1", is_long=is_long, kind=kind)
+    if kind == KIND_TRAILING:
+        t.callback, t.extreme = dist, price
+    else:
+        away = (kind == KIND_STOP) == is_long   # 롱 손절 / 숏 익절은 아래
+        t.level = price * (1 - dist if away else 1 + dist)
+    return t
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--triggers", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    symbols = [f"SYM{i}USDT" for i in range(args.symbols)]
+    prices = {s: 100.0 for s in symbols}
+
+    engine = TriggerEngine()
+    fired_new = 0
+
+    async def exit_handler(trigger: Trigger) -> dict:
+        return {}
+
+    engine.register_exit(False, exit_handler)
+
+    legacy = []
+    for _ in range(args.triggers):
+        sym = rng.choice(symbols)
+        legacy.append(_make(rng, sym, prices[sym]))
+        engine.add(_make(rng, sym, prices[sym]))
+
+    legacy_s = new_s = 0.0
+    fired_legacy = 0
+    for _ in range(ROUNDS):
+        for s in symbols:
+            prices[s] *= 1 + rng.gauss(0, 0.002)
+        items = [{"s": s, "p": p} for s, p in prices.items()]
+
+        before = engine.stats["fired"]
+        t0 = time.perf_counter()
+        engine.on_prices(items)
+        new_s += time.perf_counter() - t0
+        n = int(engine.stats["fired"] - before)
+        fired_new += n
+        for _ in range(n):
+            sym = rng.choice(symbols)
+            engine.add(_make(rng, sym, prices[sym]))
+
+        t0 = time.perf_counter()
+        fired = _legacy_tick(legacy, prices)
+        legacy_s += time.perf_counter() - t0
+        # 발동분은 새 트리거로 교체 (살아있는 수 유지)
+        for t in fired:
+            legacy[legacy.index(t)] = _make(rng, t.symbol, prices[t.symbol])
+        fired_legacy += len(fired)
+        await asyncio.sleep(0)
+
+    print(f"{args.triggers} live triggers, {len(symbols)} symbols, {ROUNDS} ticks "
+          f"(fired legacy={fired_legacy}, heap={fired_new})")
+    print(f"{'':30s}{'scan':>12s}{'heap':>12s}")
+    print(f"{'per tick (us)':30s}{legacy_s / ROUNDS * 1e6:12.1f}{new_s / ROUNDS * 1e6:12.1f}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.getLogger("app.services.trigger_engine").setLevel(logging.WARNING)
+    asyncio.run(main())
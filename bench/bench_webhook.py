@@ -0,0 +1,393 @@
+# bench/bench_webhook.py
+"""
+웹훅 → 주문 → 체결 end-to-end 지연 벤치마크 (오프라인 시뮬레이터 사용)
+
+  alert→order : 웹훅 요청 시작 ~ 첫 futures_create_order 응답
+  alert→fill  : 웹훅 요청 시작 ~ 그 알림이 낸 마지막 주문의 FILLED 이벤트 수신
+  alert→resp  : 웹훅 요청 시작 ~ HTTP 응답
+  loop lag    : 10ms 주기 sleep 의 초과 지연 (이벤트 루프 블로킹 지표)
+
+계정 모드별로 따로 돌립니다 (실제로도 계정/배포가 분리됨).
+  oneway : /webhook ~ /webhook4 (reduceOnly, positionSide 없음)
+  hedge  : /webhook5, /webhook6
+
+시나리오 (프로파일마다 서로 다른 심볼 사용)
+  entries   : 전체 대상에 BUY 를 하나씩 순차 전송
+  reversals : SELL 순차 전송 (oneway 는 롱 청산 + 숏 진입, hedge 는 숏 추가)
+  stops     : SELL_STOP (hedge 는 이어서 BUY_STOP) 순차 전송
+  burst     : 전체 대상 BUY 동시 전송 후 BUY_STOP 동시 전송 (처리량)
+
+실행:
+  python -m bench.bench_webhook
+  python -m bench.bench_webhook --symbols 8 --latency-ms 20 --jitter-ms 10 --ws-latency-ms 5
+  python -m bench.bench_webhook --compare bench/results/webhook-<old>.json
+
+결과 JSON 은 기본으로 bench/results/webhook-<git sha>.json 에 저장됩니다.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+MODES = {
+    "oneway": ["/webhook", "/webhook2", "/webhook3", "/webhook4"],
+    "hedge": ["/webhook5", "/webhook6"],
+}
+SCENARIOS = ["entries", "reversals", "stops", "burst"]
+LAG_INTERVAL = 0.01
+SETTLE_TIMEOUT = 3.0
+
+# 현재 처리 중인 알림 기록 (ASGITransport 는 같은 컨텍스트에서 앱을 호출하므로 전파됨)
+_current: ContextVar["AlertRecord | None"] = ContextVar("bench_alert", default=None)
+
+
+class AlertRecord:
+    __slots__ = ("path", "symbol", "action", "t0", "t_order", "t_resp", "order_ids", "status")
+
+    def __init__(self, path: str, symbol: str, action: str):
+        self.path = path
+        self.symbol = symbol
+        self.action = action
+        self.t0 = 0.0
+        self.t_order: float | None = None
+        self.t_resp = 0.0
+        self.order_ids: list[int] = []
+        self.status = ""
+
+
+def _pct(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    data = sorted(values)
+    idx = min(int(round(q / 100 * (len(data) - 1))), len(data) - 1)
+    return round(data[idx], 3)
+
+
+def _summary(values: list[float]) -> dict:
+    return {
+        "n": len(values),
+        "p50": _pct(values, 50),
+        "p95": _pct(values, 95),
+        "p99": _pct(values, 99),
+        "max": round(max(values), 3) if values else None,
+        "mean": round(statistics.fmean(values), 3) if values else None,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_sha() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        sha = out.stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "app"]).returncode != 0
+        return f"{sha}-dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ── 워커: 시뮬레이터를 바라보는 앱을 같은 프로세스에서 구동 ──────────
+async def _run_worker(mode: str, sim_url: str, n_symbols: int) -> dict:
+    import httpx
+
+    from app.main import app
+    from app.clients.binance_async_client import get_binance_async_client
+    from app.services import user_stream
+
+    fills: dict[int, float] = {}
+
+    def on_order_update(msg: dict) -> None:
+        o = msg.get("o", {})
+        if o.get("X") == "FILLED":
+            fills[int(o["i"])] = time.perf_counter()
+
+    lag_samples: list[float] = []
+
+    async def lag_sampler() -> None:
+        while True:
+            t = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag_samples.append((time.perf_counter() - t - LAG_INTERVAL) * 1000)
+
+    async with app.router.lifespan_context(app):
+        client = await get_binance_async_client()
+        create_order = client.futures_create_order
+
+        async def timed_create_order(**params):
+            res = await create_order(**params)
+            rec = _current.get()
+            if rec is not None:
+                if rec.t_order is None:
+                    rec.t_order = time.perf_counter()
+                rec.order_ids.append(int(res["orderId"]))
+            return res
+
+        client.futures_create_order = timed_create_order
+        user_stream.register_handler("ORDER_TRADE_UPDATE", on_order_update)
+
+        deadline = time.time() + 10
+        while not user_stream.is_connected() and time.time() < deadline:
+            await asyncio.sleep(0.05)
+        if not user_stream.is_connected():
+            raise RuntimeError("user-data stream did not connect to the simulator")
+
+        paths = MODES[mode]
+        async with httpx.AsyncClient(base_url=sim_url) as sim:
+            info = (await sim.get("/fapi/v1/exchangeInfo")).json()
+        symbols = [s["symbol"] for s in info["symbols"]]
+        if len(symbols) < len(paths) * n_symbols:
+            raise RuntimeError(f"simulator has {len(symbols)} symbols, need {len(paths) * n_symbols}")
+        targets = [(p, symbols[i * n_symbols + j]) for i, p in enumerate(paths) for j in range(n_symbols)]
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+
+            async def send(path: str, symbol: str, action: str) -> AlertRecord:
+                rec = AlertRecord(path, symbol, action)
+                # 시나리오 간 같은 (profile, symbol, action) 이 중복 제거되지 않도록 알림마다 고유 id
+                body = {"symbol": symbol, "action": action, "alert_id": uuid.uuid4().hex}
+                if mode == "hedge":
+                    body["leverage"] = 5
+                token = _current.set(rec)
+                rec.t0 = time.perf_counter()
+                try:
+                    r = await http.post(path, json=body)
+                    rec.status = r.json().get("status", str(r.status_code)) if r.status_code == 200 else f"http_{r.status_code}"
+                except Exception as e:
+                    rec.status = type(e).__name__
+                finally:
+                    rec.t_resp = time.perf_counter()
+                    _current.reset(token)
+                return rec
+
+            async def sequential(action: str) -> list[AlertRecord]:
+                return [await send(p, s, action) for p, s in targets]
+
+            async def concurrent(action: str) -> list[AlertRecord]:
+                return list(await asyncio.gather(*(send(p, s, action) for p, s in targets)))
+
+            plans = {
+                "entries": [(sequential, "BUY")],
+                "reversals": [(sequential, "SELL")],
+                # oneway 는 reversals 뒤 숏만 남아있으므로 SELL_STOP 만 의미 있음
+                "stops": [(sequential, "SELL_STOP")] if mode == "oneway"
+                else [(sequential, "SELL_STOP"), (sequential, "BUY_STOP")],
+                "burst": [(concurrent, "BUY"), (concurrent, "BUY_STOP")],
+            }
+
+            sampler = asyncio.get_running_loop().create_task(lag_sampler())
+            results = {}
+            try:
+                for name in SCENARIOS:
+                    lag_samples.clear()
+                    started = time.perf_counter()
+                    records: list[AlertRecord] = []
+                    for runner, action in plans[name]:
+                        records += await runner(action)
+                    elapsed = time.perf_counter() - started
+
+                    # 마지막 주문들의 FILLED 이벤트 도착 대기
+                    settle = time.perf_counter() + SETTLE_TIMEOUT
+                    while time.perf_counter() < settle and any(
+                        oid not in fills for r in records for oid in r.order_ids
+                    ):
+                        await asyncio.sleep(0.01)
+
+                    results[name] = _scenario_result(records, fills, elapsed, list(lag_samples))
+            finally:
+                sampler.cancel()
+
+    return {"targets": len(targets), "profiles": paths, "scenarios": results}
+
+
+def _scenario_result(records: list[AlertRecord], fills: dict[int, float], elapsed: float,
+                     lag: list[float]) -> dict:
+    to_order, to_fill, to_resp = [], [], []
+    statuses: dict[str, int] = {}
+    missing_fills = 0
+    for r in records:
+        statuses[r.status] = statuses.get(r.status, 0) + 1
+        to_resp.append((r.t_resp - r.t0) * 1000)
+        if r.t_order is not None:
+            to_order.append((r.t_order - r.t0) * 1000)
+        if r.order_ids:
+            if all(oid in fills for oid in r.order_ids):
+                to_fill.append((max(fills[oid] for oid in r.order_ids) - r.t0) * 1000)
+            else:
+                missing_fills += 1
+    return {
+        "alerts": len(records),
+        "orders": sum(len(r.order_ids) for r in records),
+        "statuses": statuses,
+        "missing_fills": missing_fills,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_alerts_per_s": round(len(records) / elapsed, 2) if elapsed else None,
+        "alert_to_order_ms": _summary(to_order),
+        "alert_to_fill_ms": _summary(to_fill),
+        "alert_to_response_ms": _summary(to_resp),
+        "loop_lag_ms": _summary(lag),
+    }
+
+
+def _worker_main(args) -> None:
+    # app.config 는 import 시점에 환경변수를 읽으므로 앱 import 전에 설정
+    # 실제 심볼 규칙 스냅샷 / 상태 DB / 거래 원장을 시뮬레이터 값으로 덮어쓰지 않도록 임시 디렉터리 사용
+    tmp = tempfile.mkdtemp(prefix="bench_")
+    os.environ.update({
+        "EXCHANGE_BASE_URL": args.sim_url,
+        "EXCHANGE_API_KEY": "bench",
+        "EXCHANGE_API_SECRET": "bench",
+        "DRY_RUN": "false",
+        "SYMBOL_RULES_SNAPSHOT": os.path.join(tmp, "symbol_rules.json"),
+        "STATE_DB_PATH": os.path.join(tmp, "state.db"),
+        "TRADE_LEDGER_DIR": os.path.join(tmp, "ledger"),
+    })
+    result = asyncio.run(_run_worker(args.worker, args.sim_url, args.symbols))
+    Path(args.worker_out).write_text(json.dumps(result))
+
+
+# ── 드라이버: 모드별로 시뮬레이터 + 워커 프로세스 실행 ──────────────
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 15.0) -> None:
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("simulator exited during startup")
+        try:
+            httpx.get(f"{url}/api/v3/ping", timeout=0.5)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("simulator did not start")
+
+
+def _run_mode(mode: str, args) -> dict:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    sim_cmd = [
+        sys.executable, "-m", "sim", "--port", str(port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--ws-latency-ms", str(args.ws_latency_ms), "--fill-delay-ms", str(args.fill_delay_ms),
+        "--extra-symbols", str(len(MODES[mode]) * args.symbols), "--seed", str(args.seed),
+    ]
+    # oneway 계정: 앱의 Hedge Mode 전환 시도를 거부(-4068)해 One-way 로 유지
+    sim_cmd.append("--hedge-mode" if mode == "hedge" else "--lock-position-mode")
+
+    sim = subprocess.Popen(sim_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        _wait_ready(url, sim)
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            out = f.name
+        worker = subprocess.run(
+            [sys.executable, "-m", "bench.bench_webhook", "--worker", mode, "--sim-url", url,
+             "--worker-out", out, "--symbols", str(args.symbols)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if worker.returncode != 0:
+            raise RuntimeError(f"{mode} worker failed:\n{worker.stderr[-4000:]}")
+        result = json.loads(Path(out).read_text())
+        os.unlink(out)
+        return result
+    finally:
+        sim.terminate()
+        sim.wait(timeout=10)
+
+
+def _print_report(report: dict) -> None:
+    print(f"commit {report['meta']['commit']}  sim {report['meta']['sim']}")
+    header = f"{'mode':<7} {'scenario':<10} {'alerts':>6} {'thr/s':>8} " \
+             f"{'order p50/p95/p99':>22} {'fill p50/p95/p99':>22} {'lag p99':>8}"
+    print(header)
+    print("-" * len(header))
+    for mode, res in report["modes"].items():
+        for name, sc in res["scenarios"].items():
+            o, f = sc["alert_to_order_ms"], sc["alert_to_fill_ms"]
+            fmt = lambda s: "/".join("-" if s[k] is None else f"{s[k]:.1f}" for k in ("p50", "p95", "p99"))
+            print(f"{mode:<7} {name:<10} {sc['alerts']:>6} {sc['throughput_alerts_per_s']:>8} "
+                  f"{fmt(o):>22} {fmt(f):>22} {sc['loop_lag_ms']['p99'] or 0:>8.2f}")
+
+
+def _print_compare(old: dict, new: dict) -> None:
+    print(f"\ncompare {old['meta']['commit']} -> {new['meta']['commit']} (p50 / p99 ms, thr/s)")
+    for mode, res in new["modes"].items():
+        for name, sc in res["scenarios"].items():
+            prev = old.get("modes", {}).get(mode, {}).get("scenarios", {}).get(name)
+            if prev is None:
+                continue
+            cells = []
+            for key in ("alert_to_order_ms", "alert_to_fill_ms"):
+                for q in ("p50", "p99"):
+                    a, b = prev[key][q], sc[key][q]
+                    if a and b:
+                        cells.append(f"{key.split('_')[2]} {q} {a:.1f}->{b:.1f} ({(b - a) / a * 100:+.0f}%)")
+            cells.append(f"thr {prev['throughput_alerts_per_s']}->{sc['throughput_alerts_per_s']}")
+            print(f"  {mode:<7} {name:<10} " + "  ".join(cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end webhook latency benchmark")
+    parser.add_argument("--modes", default="oneway,hedge")
+    parser.add_argument("--symbols", type=int, default=4, help="프로파일당 심볼 수")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--ws-latency-ms", type=float, default=2.0)
+    parser.add_argument("--fill-delay-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: bench/results/webhook-<sha>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    # 내부용: 모드별 워커 프로세스
+    parser.add_argument("--worker", choices=sorted(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--sim-url", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker_main(args)
+        return
+
+    commit = _git_sha()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "symbols_per_profile": args.symbols,
+            "sim": {
+                "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                "ws_latency_ms": args.ws_latency_ms, "fill_delay_ms": args.fill_delay_ms,
+                "seed": args.seed,
+            },
+        },
+        "modes": {mode: _run_mode(mode, args) for mode in args.modes.split(",") if mode},
+    }
+
+    out = Path(args.out or f"bench/results/webhook-{commit}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+
+    _print_report(report)
+    print(f"\nsaved {out}")
+    if args.compare:
+        _print_compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+오프라인 Binance USD-M 선물 시뮬레이터.
+
+실거래소/키 없이 웹훅 → 주문 → 체결 경로를 재현 가능하게 돌려보기 위한 로컬 대체 서버입니다.
+    python -m sim --port 9000 --latency-ms 20 --jitter-ms 10
+    EXCHANGE_BASE_URL=http://127.0.0.1:9000 EXCHANGE_API_KEY=x EXCHANGE_API_SECRET=x uvicorn app.main:app
+"""
+
+from sim.exchange import SimAPIError, SimConfig, SimExchange
+from sim.server import create_app
+
+__all__ = ["SimAPIError", "SimConfig", "SimExchange", "create_app"]
@@ -0,0 +1,52 @@
+# sim/__main__.py
+"""python -m sim --port 9000 [--latency-ms 20 --jitter-ms 10 --error-rate 0.01 ...]"""
+
+import argparse
+
+import uvicorn
+
+from sim.exchange import SimConfig
+from sim.server import create_app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline Binance USD-M futures simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="REST 응답 고정 지연")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="REST 응답 추가 지연 상한 (균등분포)")
+    parser.add_argument("--ws-latency-ms", type=float, default=0.0, help="스트림 이벤트 전달 지연")
+    parser.add_argument("--fill-delay-ms", type=float, default=0.0, help="MARKET 주문 접수 후 체결까지 지연")
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--fills-per-order", type=int, default=1, help="주문당 부분 체결 횟수")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="error-paths 요청 실패 확률")
+    parser.add_argument("--error-paths", default="order", help="쉼표 구분, 예: order,leverage")
+    parser.add_argument("--volatility-bps", type=float, default=0.0, help="가격 틱당 랜덤워크 변동폭")
+    parser.add_argument("--price-interval", type=float, default=1.0)
+    parser.add_argument("--hedge-mode", action="store_true", help="Hedge Mode 로 시작")
+    parser.add_argument("--lock-position-mode", action="store_true", help="포지션 모드 변경 거부(-4068)")
+    parser.add_argument("--extra-symbols", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = SimConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        ws_latency_ms=args.ws_latency_ms,
+        fill_delay_ms=args.fill_delay_ms,
+        slippage_bps=args.slippage_bps,
+        fills_per_order=args.fills_per_order,
+        error_rate=args.error_rate,
+        error_paths=[p.strip() for p in args.error_paths.split(",") if p.strip()],
+        volatility_bps=args.volatility_bps,
+        price_interval=args.price_interval,
+        hedge_mode=args.hedge_mode,
+        lock_position_mode=args.lock_position_mode,
+        extra_symbols=args.extra_symbols,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+# sim/exchange.py
+"""
+Binance USD-M 선물 계정 1개를 흉내 내는 인메모리 거래소.
+
+이 프로젝트가 쓰는 범위만 구현합니다.
+  - exchange info / mark price / ticker
+  - leverage, position mode(One-way / Hedge)
+  - MARKET 주문, STOP_MARKET / TAKE_PROFIT_MARKET 조건부 주문, batch 주문
+  - 주문 조회 / 미체결 조회 / 취소, 포지션 조회
+  - user-data stream 이벤트(ORDER_TRADE_UPDATE, ACCOUNT_UPDATE, ACCOUNT_CONFIG_UPDATE)
+
+네트워크/지연/에러 주입은 sim/server.py 가 담당합니다.
+"""
+
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Callable
+
+
+class SimAPIError(Exception):
+    """Binance 에러 응답 {"code": ..., "msg": ...} 에 대응"""
+
+    def __init__(self, status: int, code: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+        self.code = code
+        self.msg = msg
+
+
+@dataclass
+class SymbolSpec:
+    symbol: str
+    price: float
+    step_size: float = 0.001
+    min_qty: float = 0.001
+    tick_size: float = 0.01
+    min_notional: float = 5.0
+
+
+DEFAULT_SYMBOLS = [
+    SymbolSpec("BTCUSDT", 60000.0, 0.001, 0.001, 0.1, 100.0),
+    SymbolSpec("ETHUSDT", 3000.0, 0.001, 0.001, 0.01, 20.0),
+    SymbolSpec("SOLUSDT", 150.0, 1.0, 1.0, 0.01, 5.0),
+    SymbolSpec("XRPUSDT", 0.6, 0.1, 0.1, 0.0001, 5.0),
+    SymbolSpec("DOGEUSDT", 0.15, 1.0, 1.0, 0.00001, 5.0),
+]
+
+
+@dataclass
+class SimConfig:
+    # REST 응답 지연 (ms) = latency_ms + U(0, jitter_ms)
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # user-data / market stream 이벤트 전달 지연 (ms)
+    ws_latency_ms: float = 0.0
+    # MARKET 주문 접수 → 체결까지 지연 (ms). 0이면 REST 응답 전에 체결
+    fill_delay_ms: float = 0.0
+    # 체결가 슬리피지 (bp, 불리한 방향)
+    slippage_bps: float = 0.0
+    # 한 주문을 몇 번의 체결로 나눌지 (PARTIALLY_FILLED 이벤트 발생)
+    fills_per_order: int = 1
+    # 무작위 에러 주입: error_paths 에 해당하는 요청이 error_rate 확률로 실패
+    error_rate: float = 0.0
+    error_paths: list[str] = field(default_factory=lambda: ["order"])
+    error_status: int = 400
+    error_code: int = -1001
+    error_msg: str = "Internal error; unable to process your request. Please try your request again."
+    # 마크가격 갱신 주기 (초)와 틱당 랜덤워크 변동폭 (bp, 0이면 고정)
+    price_interval: float = 1.0
+    volatility_bps: float = 0.0
+    # 계정 초기 상태
+    hedge_mode: bool = False
+    lock_position_mode: bool = False
+    balance: float = 10000.0
+    taker_fee: float = 0.0004
+    # DEFAULT_SYMBOLS 외에 SIM{i}USDT 심볼을 추가로 생성 (다심볼 부하 테스트용)
+    extra_symbols: int = 0
+    # 지연/에러/가격 난수 시드 (재현 가능한 테스트용)
+    seed: int = 0
+
+
+@dataclass
+class SimPosition:
+    amt: float = 0.0
+    entry_price: float = 0.0
+
+
+@dataclass
+class SimOrder:
+    orderId: int
+    clientOrderId: str
+    symbol: str
+    side: str
+    positionSide: str
+    type: str
+    origType: str
+    origQty: float
+    reduceOnly: bool
+    closePosition: bool
+    stopPrice: float
+    status: str = "NEW"
+    executedQty: float = 0.0
+    cumQuote: float = 0.0
+    realizedPnl: float = 0.0
+    commission: float = 0.0
+    updateTime: int = 0
+
+    @property
+    def avg_price(self) -> float:
+        return self.cumQuote / self.executedQty if self.executedQty else 0.0
+
+    def to_api(self) -> dict:
+        return {
+            "orderId": self.orderId,
+            "symbol": self.symbol,
+            "status": self.status,
+            "clientOrderId": self.clientOrderId,
+            "price": "0",
+            "avgPrice": f"{self.avg_price:.8f}",
+            "origQty": _fmt(self.origQty),
+            "executedQty": _fmt(self.executedQty),
+            "cumQuote": _fmt(self.cumQuote),
+            "timeInForce": "GTC",
+            "type": self.type,
+            "reduceOnly": self.reduceOnly,
+            "closePosition": self.closePosition,
+            "side": self.side,
+            "positionSide": self.positionSide,
+            "stopPrice": _fmt(self.stopPrice),
+            "workingType": "CONTRACT_PRICE",
+            "priceProtect": False,
+            "origType": self.origType,
+            "updateTime": self.updateTime,
+        }
+
+
+FINAL_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED"}
+
+
+def _fmt(x: float) -> str:
+    return f"{x:.8f}".rstrip("0").rstrip(".") or "0"
+
+
+def _ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() == "true"
+
+
+class SimExchange:
+    def __init__(
+        self,
+        config: SimConfig | None = None,
+        publish_user: Callable[[dict], None] | None = None,
+        publish_mark: Callable[[list[dict]], None] | None = None,
+    ):
+        self.config = config or SimConfig()
+        self.publish_user = publish_user or (lambda msg: None)
+        self.publish_mark = publish_mark or (lambda items: None)
+        self.reset()
+
+    # ── 상태 ─────────────────────────────────────────
+    def reset(self) -> None:
+        cfg = self.config
+        self.rng = random.Random(cfg.seed)
+        self.specs: dict[str, SymbolSpec] = {s.symbol: SymbolSpec(**asdict(s)) for s in DEFAULT_SYMBOLS}
+        for i in range(cfg.extra_symbols):
+            sym = f"SIM{i}USDT"
+            self.specs[sym] = SymbolSpec(sym, 10.0 + i % 90, 0.1, 0.1, 0.001, 5.0)
+        self.mark: dict[str, float] = {s: spec.price for s, spec in self.specs.items()}
+        self.leverage: dict[str, int] = {s: 20 for s in self.specs}
+        self.hedge_mode = cfg.hedge_mode
+        self.balance = cfg.balance
+        # (symbol, positionSide) -> SimPosition
+        self.positions: dict[tuple[str, str], SimPosition] = {}
+        self.orders: dict[int, SimOrder] = {}
+        self.client_ids: dict[str, int] = {}
+        self._order_ids = itertools.count(1_000_000)
+        self.listen_keys: set[str] = set()
+
+    def _spec(self, symbol: str | None) -> SymbolSpec:
+        spec = self.specs.get(symbol or "")
+        if spec is None:
+            raise SimAPIError(400, -1121, "Invalid symbol.")
+        return spec
+
+    def _position(self, symbol: str, side: str) -> SimPosition:
+        return self.positions.setdefault((symbol, side), SimPosition())
+
+    def _sides(self) -> tuple[str, ...]:
+        return ("LONG", "SHORT") if self.hedge_mode else ("BOTH",)
+
+    # ── 시세 ─────────────────────────────────────────
+    def set_mark_price(self, symbol: str, price: float) -> None:
+        self._spec(symbol)
+        self.mark[symbol] = price
+        self.publish_mark([self._mark_item(symbol)])
+        self._check_triggers(symbol)
+
+    def tick(self) -> None:
+        """price_interval 마다 호출: 랜덤워크 + 전체 마크가격 발행 + 조건부 주문 트리거"""
+        vol = self.config.volatility_bps / 10_000
+        if vol > 0:
+            for sym, price in self.mark.items():
+                self.mark[sym] = max(price * (1.0 + self.rng.gauss(0.0, vol)), self.specs[sym].tick_size)
+        self.publish_mark([self._mark_item(s) for s in self.mark])
+        for sym in list(self.mark):
+            self._check_triggers(sym)
+
+    def _mark_item(self, symbol: str) -> dict:
+        now = _ms()
+        return {
+            "e": "markPriceUpdate", "E": now, "s": symbol,
+            "p": _fmt(self.mark[symbol]), "i": _fmt(self.mark[symbol]),
+            "P": _fmt(self.mark[symbol]), "r": "0.00010000", "T": now + 3_600_000,
+        }
+
+    def premium_index(self, symbol: str | None = None) -> dict | list[dict]:
+        def row(s: str) -> dict:
+            return {
+                "symbol": s, "markPrice": _fmt(self.mark[s]), "indexPrice": _fmt(self.mark[s]),
+                "estimatedSettlePrice": _fmt(self.mark[s]), "lastFundingRate": "0.00010000",
+                "interestRate": "0.00010000", "nextFundingTime": _ms() + 3_600_000, "time": _ms(),
+            }
+        if symbol:
+            self._spec(symbol)
+            return row(symbol)
+        return [row(s) for s in self.mark]
+
+    def ticker_price(self, symbol: str | None = None) -> dict | list[dict]:
+        if symbol:
+            self._spec(symbol)
+            return {"symbol": symbol, "price": _fmt(self.mark[symbol]), "time": _ms()}
+        return [{"symbol": s, "price": _fmt(p), "time": _ms()} for s, p in self.mark.items()]
+
+    def exchange_info(self) -> dict:
+        symbols = []
+        for spec in self.specs.values():
+            symbols.append({
+                "symbol": spec.symbol, "pair": spec.symbol, "contractType": "PERPETUAL",
+                "status": "TRADING", "baseAsset": spec.symbol[:-4], "quoteAsset": "USDT",
+                "marginAsset": "USDT",
+                "pricePrecision": max(int(round(-math.log10(spec.tick_size))), 0),
+                "quantityPrecision": max(int(round(-math.log10(spec.step_size))), 0),
+                "orderTypes": ["LIMIT", "MARKET", "STOP", "STOP_MARKET", "TAKE_PROFIT",
+                               "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET"],
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": _fmt(spec.tick_size),
+                     "maxPrice": "1000000", "tickSize": _fmt(spec.tick_size)},
+                    {"filterType": "LOT_SIZE", "minQty": _fmt(spec.min_qty),
+                     "maxQty": "1000000", "stepSize": _fmt(spec.step_size)},
+                    {"filterType": "MARKET_LOT_SIZE", "minQty": _fmt(spec.min_qty),
+                     "maxQty": "1000000", "stepSize": _fmt(spec.step_size)},
+                    {"filterType": "MIN_NOTIONAL", "notional": _fmt(spec.min_notional)},
+                ],
+            })
+        return {"timezone": "UTC", "serverTime": _ms(), "rateLimits": [], "assets": [], "symbols": symbols}
+
+    # ── 계정 설정 ────────────────────────────────────
+    def change_leverage(self, symbol: str, leverage) -> dict:
+        self._spec(symbol)
+        lev = int(leverage)
+        if not 1 <= lev <= 125:
+            raise SimAPIError(400, -4028, f"Leverage {lev} is not valid")
+        self.leverage[symbol] = lev
+        self.publish_user({"e": "ACCOUNT_CONFIG_UPDATE", "E": _ms(), "T": _ms(),
+                           "ac": {"s": symbol, "l": lev}})
+        return {"leverage": lev, "maxNotionalValue": "1000000", "symbol": symbol}
+
+    def symbol_config(self, symbol: str | None = None) -> list[dict]:
+        symbols = [symbol] if symbol else list(self.specs)
+        return [{"symbol": s, "marginType": "CROSSED", "isAutoAddMargin": "false",
+                 "leverage": self.leverage[s], "maxNotionalValue": "1000000"} for s in symbols]
+
+    def get_position_mode(self) -> dict:
+        return {"dualSidePosition": self.hedge_mode}
+
+    def change_position_mode(self, dual_side) -> dict:
+        dual = _parse_bool(dual_side)
+        if dual == self.hedge_mode:
+            raise SimAPIError(400, -4059, "No need to change position side.")
+        has_open = any(p.amt for p in self.positions.values()) or any(
+            o.status == "NEW" for o in self.orders.values())
+        if self.config.lock_position_mode or has_open:
+            raise SimAPIError(400, -4068, "Position side cannot be changed if there exists position.")
+        self.hedge_mode = dual
+        self.positions.clear()
+        return {"code": 200, "msg": "success"}
+
+    # ── 포지션 ───────────────────────────────────────
+    def position_risk(self, symbol: str | None = None) -> list[dict]:
+        rows = []
+        symbols = [symbol] if symbol else sorted({s for (s, _), p in self.positions.items() if p.amt})
+        for sym in symbols:
+            self._spec(sym)
+            for side in self._sides():
+                pos = self.positions.get((sym, side), SimPosition())
+                mark = self.mark[sym]
+                upnl = (mark - pos.entry_price) * pos.amt if pos.amt else 0.0
+                rows.append({
+                    "symbol": sym, "positionSide": side, "positionAmt": _fmt(pos.amt),
+                    "entryPrice": _fmt(pos.entry_price), "breakEvenPrice": _fmt(pos.entry_price),
+                    "markPrice": _fmt(mark), "unRealizedProfit": f"{upnl:.8f}",
+                    "notional": f"{pos.amt * mark:.8f}", "marginAsset": "USDT",
+                    "updateTime": _ms(),
+                })
+        return rows
+
+    # ── 주문 ─────────────────────────────────────────
+    def new_order(self, params: dict) -> SimOrder:
+        spec = self._spec(params.get("symbol"))
+        side = str(params.get("side", "")).upper()
+        if side not in ("BUY", "SELL"):
+            raise SimAPIError(400, -1102, "Mandatory parameter 'side' was not sent, was empty/null, or malformed.")
+        otype = str(params.get("type", "")).upper()
+        if otype not in ("MARKET", "STOP_MARKET", "TAKE_PROFIT_MARKET"):
+            raise SimAPIError(400, -1116, "Invalid orderType.")
+
+        position_side = str(params.get("positionSide", "BOTH")).upper()
+        reduce_only = _parse_bool(params.get("reduceOnly", False))
+        close_position = _parse_bool(params.get("closePosition", False))
+        if self.hedge_mode:
+            if position_side not in ("LONG", "SHORT"):
+                raise SimAPIError(400, -4061, "Order's position side does not match user's setting.")
+            if reduce_only:
+                raise SimAPIError(400, -1106, "Parameter 'reduceonly' sent when not required.")
+        elif position_side != "BOTH":
+            raise SimAPIError(400, -4061, "Order's position side does not match user's setting.")
+
+        stop_price = float(params.get("stopPrice", 0.0) or 0.0)
+        if otype != "MARKET" and stop_price <= 0:
+            raise SimAPIError(400, -1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+
+        if close_position:
+            qty = 0.0
+        else:
+            qty = float(params.get("quantity", 0.0) or 0.0)
+            steps = qty / spec.step_size
+            if abs(steps - round(steps)) > 1e-6:
+                raise SimAPIError(400, -1111, "Precision is over the maximum defined for this asset.")
+            if qty < spec.min_qty:
+                raise SimAPIError(400, -4003, "Quantity less than or equal to zero.")
+
+        if otype == "MARKET" and (reduce_only or self._is_reducing(spec.symbol, side, position_side)):
+            if self._reducible_qty(spec.symbol, side, position_side) <= 0:
+                raise SimAPIError(400, -2022, "ReduceOnly Order is rejected.")
+
+        client_id = params.get("newClientOrderId") or f"sim_{next(self._order_ids)}"
+        order = SimOrder(
+            orderId=next(self._order_ids), clientOrderId=client_id, symbol=spec.symbol,
+            side=side, positionSide=position_side, type=otype, origType=otype,
+            origQty=qty, reduceOnly=reduce_only or close_position, closePosition=close_position,
+            stopPrice=stop_price, updateTime=_ms(),
+        )
+        self.orders[order.orderId] = order
+        self.client_ids[client_id] = order.orderId
+        self._emit_order(order, "NEW")
+        return order
+
+    def _is_reducing(self, symbol: str, side: str, position_side: str) -> bool:
+        """Hedge 모드: LONG에 SELL / SHORT에 BUY 는 항상 청산 방향"""
+        return (position_side == "LONG" and side == "SELL") or (position_side == "SHORT" and side == "BUY")
+
+    def _reducible_qty(self, symbol: str, side: str, position_side: str) -> float:
+        amt = self.positions.get((symbol, position_side), SimPosition()).amt
+        if side == "SELL":
+            return max(amt, 0.0)
+        return max(-amt, 0.0)
+
+    def fill_market(self, order: SimOrder) -> None:
+        """MARKET 주문(또는 트리거된 조건부 주문)을 현재 마크가격 기준으로 체결"""
+        if order.status in FINAL_STATUSES:
+            return
+
+        qty = order.origQty
+        if order.reduceOnly or self._is_reducing(order.symbol, order.side, order.positionSide):
+            available = self._reducible_qty(order.symbol, order.side, order.positionSide)
+            qty = available if order.closePosition else min(qty, available)
+            if qty <= 0:
+                order.status = "EXPIRED"
+                order.updateTime = _ms()
+                self._emit_order(order, "EXPIRED")
+                return
+            # 남은 포지션보다 큰 reduce-only 수량은 잘라서 체결
+            order.origQty = qty
+
+        # 트리거된 조건부 주문은 MARKET 으로 실행 (origType 은 유지)
+        order.type = "MARKET"
+
+        spec = self.specs[order.symbol]
+        slip = self.config.slippage_bps / 10_000
+        price = self.mark[order.symbol] * (1.0 + slip if order.side == "BUY" else 1.0 - slip)
+        price = round(price / spec.tick_size) * spec.tick_size
+
+        n = max(int(self.config.fills_per_order), 1)
+        steps = round(qty / spec.step_size)
+        base, extra = divmod(steps, n)
+        chunks = [(base + (1 if i < extra else 0)) * spec.step_size for i in range(n)]
+        for chunk in (c for c in chunks if c > 0):
+            self._apply_trade(order, chunk, price)
+
+    def _apply_trade(self, order: SimOrder, qty: float, price: float) -> None:
+        pos = self._position(order.symbol, order.positionSide)
+        signed = qty if order.side == "BUY" else -qty
+
+        realized = 0.0
+        if pos.amt and (pos.amt > 0) != (signed > 0):
+            closed = min(abs(signed), abs(pos.amt))
+            direction = 1.0 if pos.amt > 0 else -1.0
+            realized = (price - pos.entry_price) * closed * direction
+            remaining = pos.amt + signed
+            if abs(remaining) < 1e-12:
+                pos.amt, pos.entry_price = 0.0, 0.0
+            elif (remaining > 0) == (pos.amt > 0):
+                pos.amt = remaining
+            else:
+                # One-way 반전: 남은 수량은 체결가로 새로 진입
+                pos.amt, pos.entry_price = remaining, price
+        else:
+            new_amt = pos.amt + signed
+            pos.entry_price = (pos.entry_price * abs(pos.amt) + price * qty) / abs(new_amt)
+            pos.amt = new_amt
+
+        fee = price * qty * self.config.taker_fee
+        self.balance += realized - fee
+
+        order.executedQty += qty
+        order.cumQuote += price * qty
+        order.realizedPnl += realized
+        order.commission += fee
+        order.updateTime = _ms()
+        order.status = "FILLED" if order.executedQty >= order.origQty - 1e-12 else "PARTIALLY_FILLED"
+
+        # Binance 순서대로 ACCOUNT_UPDATE → ORDER_TRADE_UPDATE
+        self.publish_user({
+            "e": "ACCOUNT_UPDATE", "E": _ms(), "T": _ms(),
+            "a": {
+                "m": "ORDER",
+                "B": [{"a": "USDT", "wb": f"{self.balance:.8f}", "cw": f"{self.balance:.8f}", "bc": "0"}],
+                "P": [{
+                    "s": order.symbol, "pa": _fmt(pos.amt), "ep": _fmt(pos.entry_price),
+                    "bep": _fmt(pos.entry_price), "cr": "0",
+                    "up": f"{(self.mark[order.symbol] - pos.entry_price) * pos.amt:.8f}",
+                    "mt": "cross", "iw": "0", "ps": order.positionSide,
+                }],
+            },
+        })
+        self._emit_order(order, "TRADE", last_qty=qty, last_price=price, realized=realized, fee=fee)
+
+    def _emit_order(self, order: SimOrder, exec_type: str, last_qty: float = 0.0,
+                    last_price: float = 0.0, realized: float = 0.0, fee: float = 0.0) -> None:
+        self.publish_user({
+            "e": "ORDER_TRADE_UPDATE", "E": _ms(), "T": _ms(),
+            "o": {
+                "s": order.symbol, "c": order.clientOrderId, "S": order.side, "o": order.type,
+                "f": "GTC", "q": _fmt(order.origQty), "p": "0", "ap": f"{order.avg_price:.8f}",
+                "sp": _fmt(order.stopPrice), "x": exec_type, "X": order.status, "i": order.orderId,
+                "l": _fmt(last_qty), "z": _fmt(order.executedQty), "L": _fmt(last_price),
+                "N": "USDT", "n": f"{fee:.8f}", "T": order.updateTime, "t": 0,
+                "R": order.reduceOnly, "wt": "CONTRACT_PRICE", "ot": order.origType,
+                "ps": order.positionSide, "cp": order.closePosition, "rp": f"{realized:.8f}",
+            },
+        })
+
+    def _check_triggers(self, symbol: str) -> None:
+        mark = self.mark[symbol]
+        for order in list(self.orders.values()):
+            if order.symbol != symbol or order.status != "NEW" or order.type == "MARKET":
+                continue
+            if order.type == "STOP_MARKET":
+                hit = mark <= order.stopPrice if order.side == "SELL" else mark >= order.stopPrice
+            else:  # TAKE_PROFIT_MARKET
+                hit = mark >= order.stopPrice if order.side == "SELL" else mark <= order.stopPrice
+            if hit:
+                self.fill_market(order)
+
+    def get_order(self, symbol: str, order_id=None, client_order_id=None) -> SimOrder:
+        if order_id is None and client_order_id:
+            order_id = self.client_ids.get(client_order_id)
+        order = self.orders.get(int(order_id)) if order_id is not None else None
+        if order is None or order.symbol != symbol:
+            raise SimAPIError(400, -2013, "Order does not exist.")
+        return order
+
+    def open_orders(self, symbol: str | None = None) -> list[dict]:
+        return [o.to_api() for o in self.orders.values()
+                if o.status in ("NEW", "PARTIALLY_FILLED") and (symbol is None or o.symbol == symbol)]
+
+    def cancel_order(self, symbol: str, order_id=None, client_order_id=None) -> SimOrder:
+        try:
+            order = self.get_order(symbol, order_id, client_order_id)
+        except SimAPIError:
+            raise SimAPIError(400, -2011, "Unknown order sent.")
+        if order.status != "NEW":
+            raise SimAPIError(400, -2011, "Unknown order sent.")
+        order.status = "CANCELED"
+        order.updateTime = _ms()
+        self._emit_order(order, "CANCELED")
+        return order
+
+    # ── 에러/지연 난수 ────────────────────────────────
+    def rest_delay(self) -> float:
+        cfg = self.config
+        return (cfg.latency_ms + self.rng.uniform(0.0, cfg.jitter_ms)) / 1000.0
+
+    def should_fail(self, path: str) -> bool:
+        cfg = self.config
+        return cfg.error_rate > 0 and path in cfg.error_paths and self.rng.random() < cfg.error_rate
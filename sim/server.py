@@ -0,0 +1,357 @@
+# sim/server.py
+"""
+SimExchange 를 Binance 선물 REST/WebSocket 과 같은 경로로 노출하는 FastAPI 앱.
+
+  REST  : /fapi/v1/*, /fapi/v3/positionRisk, /api/v3/ping|time
+  WS    : /ws/{listenKey}               (user-data stream)
+          /stream?streams=!markPrice@arr@1s  (combined mark price stream)
+  제어  : /sim/config, /sim/price, /sim/inject, /sim/reset, /sim/state
+
+앱 쪽에서는 EXCHANGE_BASE_URL=http://127.0.0.1:<port> 만 지정하면 됩니다.
+서명은 검증하지 않으므로 API 키/시크릿은 아무 값이나 넣으면 됩니다.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import asdict, fields
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from sim.exchange import SimAPIError, SimConfig, SimExchange
+
+# 엔드포인트별 요청 가중치 (X-MBX-USED-WEIGHT-1M 헤더용, 나머지는 1)
+_WEIGHTS = {
+    "positionRisk": 5,
+    "positionSide/dual": 30,
+    "symbolConfig": 5,
+    "batchOrders": 5,
+    "exchangeInfo": 1,
+}
+
+
+class _RateCounter:
+    """고정 윈도우 카운터 (실거래소처럼 응답 헤더에 누적 사용량을 실어 보냄)"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self.start = 0.0
+        self.used = 0
+
+    def add(self, n: int) -> int:
+        now = time.time()
+        start = now - (now % self.window)
+        if start != self.start:
+            self.start, self.used = start, 0
+        self.used += n
+        return self.used
+
+
+def _fapi_path(path: str) -> str | None:
+    """/fapi/v1/positionSide/dual -> positionSide/dual"""
+    for marker in ("/fapi/v1/", "/fapi/v2/", "/fapi/v3/"):
+        if path.startswith(marker):
+            return path[len(marker):]
+    return None
+
+
+def create_app(config: SimConfig | None = None) -> FastAPI:
+    app = FastAPI(title="Binance Futures Simulator")
+
+    user_queues: set[asyncio.Queue] = set()
+    mark_queues: set[asyncio.Queue] = set()
+    injected: list[dict] = []
+    weight_1m = _RateCounter(60.0)
+    orders_10s = _RateCounter(10.0)
+    orders_1m = _RateCounter(60.0)
+
+    def _deliver(queues: set[asyncio.Queue], msg) -> None:
+        delay = ex.config.ws_latency_ms / 1000.0
+        loop = asyncio.get_running_loop()
+        for q in list(queues):
+            if delay > 0:
+                loop.call_later(delay, q.put_nowait, msg)
+            else:
+                q.put_nowait(msg)
+
+    def publish_user(msg: dict) -> None:
+        _deliver(user_queues, msg)
+
+    def publish_mark(items: list[dict]) -> None:
+        _deliver(mark_queues, items)
+
+    ex = SimExchange(config, publish_user, publish_mark)
+    app.state.exchange = ex
+
+    # ── 가격 틱 ─────────────────────────────────────
+    async def _ticker() -> None:
+        while True:
+            await asyncio.sleep(max(ex.config.price_interval, 0.05))
+            ex.tick()
+
+    @app.on_event("startup")
+    async def _start_ticker():
+        app.state.ticker = asyncio.get_running_loop().create_task(_ticker())
+
+    @app.on_event("shutdown")
+    async def _stop_ticker():
+        app.state.ticker.cancel()
+
+    # ── 지연 / 에러 주입 / 한도 헤더 ──────────────────
+    @app.middleware("http")
+    async def _exchange_behaviour(request: Request, call_next):
+        path = _fapi_path(request.url.path)
+        if path is None and not request.url.path.startswith("/api/"):
+            return await call_next(request)
+
+        delay = ex.rest_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        method = request.method.upper()
+        name = path or request.url.path.rsplit("/", 1)[-1]
+        is_order = name in ("order", "batchOrders") and method == "POST"
+        headers = {}
+        if path is not None:
+            headers["X-MBX-USED-WEIGHT-1M"] = str(weight_1m.add(_WEIGHTS.get(name, 1)))
+            if is_order:
+                headers["X-MBX-ORDER-COUNT-10S"] = str(orders_10s.add(1))
+                headers["X-MBX-ORDER-COUNT-1M"] = str(orders_1m.add(1))
+
+        for i, rule in enumerate(injected):
+            if rule["path"] == name and rule.get("method", method).upper() == method:
+                injected.pop(i)
+                err = {"code": rule.get("code", -1001), "msg": rule.get("msg", "Injected error")}
+                if rule.get("retry_after") is not None:
+                    headers["Retry-After"] = str(rule["retry_after"])
+                return JSONResponse(err, status_code=rule.get("status", 400), headers=headers)
+
+        if ex.should_fail(name):
+            cfg = ex.config
+            return JSONResponse({"code": cfg.error_code, "msg": cfg.error_msg},
+                                status_code=cfg.error_status, headers=headers)
+
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
+    @app.exception_handler(SimAPIError)
+    async def _api_error(request: Request, exc: SimAPIError):
+        return JSONResponse({"code": exc.code, "msg": exc.msg}, status_code=exc.status)
+
+    async def _params(request: Request) -> dict:
+        """python-binance 는 GET 은 쿼리스트링, POST/PUT/DELETE 는 form body 로 보냄"""
+        params = dict(request.query_params)
+        body = (await request.body()).decode()
+        if body:
+            params.update(parse_qsl(body, keep_blank_values=True))
+        return params
+
+    # ── 공개 엔드포인트 ───────────────────────────────
+    @app.get("/api/v3/ping")
+    @app.get("/fapi/v1/ping")
+    async def ping():
+        return {}
+
+    @app.get("/api/v3/time")
+    @app.get("/fapi/v1/time")
+    async def server_time():
+        return {"serverTime": int(time.time() * 1000)}
+
+    @app.get("/fapi/v1/exchangeInfo")
+    async def exchange_info():
+        return ex.exchange_info()
+
+    @app.get("/fapi/v1/premiumIndex")
+    async def premium_index(request: Request):
+        return ex.premium_index((await _params(request)).get("symbol"))
+
+    @app.get("/fapi/v1/ticker/price")
+    @app.get("/fapi/v2/ticker/price")
+    async def ticker_price(request: Request):
+        return ex.ticker_price((await _params(request)).get("symbol"))
+
+    # ── 계정 설정 ────────────────────────────────────
+    @app.post("/fapi/v1/leverage")
+    async def change_leverage(request: Request):
+        p = await _params(request)
+        return ex.change_leverage(p.get("symbol"), p.get("leverage", 0))
+
+    @app.get("/fapi/v1/positionSide/dual")
+    async def get_position_mode():
+        return ex.get_position_mode()
+
+    @app.post("/fapi/v1/positionSide/dual")
+    async def change_position_mode(request: Request):
+        return ex.change_position_mode((await _params(request)).get("dualSidePosition", "false"))
+
+    @app.get("/fapi/v1/symbolConfig")
+    async def symbol_config(request: Request):
+        return ex.symbol_config((await _params(request)).get("symbol"))
+
+    @app.get("/fapi/v2/positionRisk")
+    @app.get("/fapi/v3/positionRisk")
+    async def position_risk(request: Request):
+        return ex.position_risk((await _params(request)).get("symbol"))
+
+    # ── 주문 ─────────────────────────────────────────
+    def _place(p: dict) -> dict:
+        order = ex.new_order(p)
+        ack = order.to_api()
+        if order.type != "MARKET":
+            return ack
+
+        delay = ex.config.fill_delay_ms / 1000.0
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, ex.fill_market, order)
+            return ack
+
+        ex.fill_market(order)
+        # 기본(ACK)은 접수 시점 상태, RESULT 는 체결 결과까지 반환
+        if str(p.get("newOrderRespType", "ACK")).upper() == "RESULT":
+            return order.to_api()
+        return ack
+
+    @app.post("/fapi/v1/order")
+    async def new_order(request: Request):
+        return _place(await _params(request))
+
+    @app.get("/fapi/v1/order")
+    async def get_order(request: Request):
+        p = await _params(request)
+        return ex.get_order(p.get("symbol"), p.get("orderId"), p.get("origClientOrderId")).to_api()
+
+    @app.delete("/fapi/v1/order")
+    async def cancel_order(request: Request):
+        p = await _params(request)
+        return ex.cancel_order(p.get("symbol"), p.get("orderId"), p.get("origClientOrderId")).to_api()
+
+    @app.get("/fapi/v1/openOrders")
+    async def open_orders(request: Request):
+        return ex.open_orders((await _params(request)).get("symbol"))
+
+    @app.post("/fapi/v1/batchOrders")
+    async def batch_orders(request: Request):
+        p = await _params(request)
+        results = []
+        for item in json.loads(p.get("batchOrders", "[]")):
+            try:
+                results.append(_place(item))
+            except SimAPIError as e:
+                results.append({"code": e.code, "msg": e.msg})
+        return results
+
+    # ── user-data stream ─────────────────────────────
+    @app.post("/fapi/v1/listenKey")
+    async def new_listen_key():
+        # 실거래소처럼 유효한 키가 있으면 같은 키를 돌려줌
+        if not ex.listen_keys:
+            ex.listen_keys.add(uuid.uuid4().hex)
+        return {"listenKey": next(iter(ex.listen_keys))}
+
+    @app.put("/fapi/v1/listenKey")
+    async def keepalive_listen_key():
+        return {}
+
+    @app.delete("/fapi/v1/listenKey")
+    async def close_listen_key():
+        ex.listen_keys.clear()
+        return {}
+
+    async def _pump(ws: WebSocket, queues: set[asyncio.Queue], wrap=None) -> None:
+        await ws.accept()
+        q: asyncio.Queue = asyncio.Queue()
+
+        async def send_loop() -> None:
+            while True:
+                msg = await q.get()
+                if wrap is not None:
+                    msg = wrap(msg)
+                    if msg is None:
+                        continue
+                await ws.send_text(json.dumps(msg))
+
+        queues.add(q)
+        sender = asyncio.get_running_loop().create_task(send_loop())
+        try:
+            # 클라이언트가 끊으면 바로 정리 (안 그러면 종료 시 핸들러가 남아 shutdown 이 멈춤)
+            while (await ws.receive())["type"] != "websocket.disconnect":
+                pass
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            queues.discard(q)
+            sender.cancel()
+
+    @app.websocket("/ws/{listen_key}")
+    async def user_stream(ws: WebSocket, listen_key: str):
+        if listen_key not in ex.listen_keys:
+            await ws.close(code=1008)
+            return
+        await _pump(ws, user_queues)
+
+    @app.websocket("/stream")
+    async def market_stream(ws: WebSocket):
+        streams = ws.query_params.get("streams", "")
+        wanted = {s.split("@", 1)[0].upper() for s in streams.split("/") if not s.startswith("!")}
+
+        def wrap(items: list[dict]):
+            if "!markPrice@arr" in streams:
+                return {"stream": streams, "data": items}
+            hits = [i for i in items if i["s"] in wanted]
+            return {"stream": streams, "data": hits[0]} if hits else None
+
+        await _pump(ws, mark_queues, wrap)
+
+    # ── 제어 엔드포인트 ───────────────────────────────
+    @app.get("/sim/config")
+    async def get_config():
+        return asdict(ex.config)
+
+    @app.post("/sim/config")
+    async def update_config(request: Request):
+        """지연/에러율 등을 실행 중에 변경 (JSON 본문의 키만 반영)"""
+        body = await request.json()
+        names = {f.name for f in fields(SimConfig)}
+        for key, value in body.items():
+            if key in names:
+                setattr(ex.config, key, value)
+        return asdict(ex.config)
+
+    @app.post("/sim/price")
+    async def set_price(request: Request):
+        """{"symbol": "BTCUSDT", "price": 61000} — 조건부 주문 트리거까지 즉시 반영"""
+        body = await request.json()
+        ex.set_mark_price(body["symbol"], float(body["price"]))
+        return {"symbol": body["symbol"], "price": ex.mark[body["symbol"]]}
+
+    @app.post("/sim/inject")
+    async def inject(request: Request):
+        """
+        다음 요청 1건을 실패시킴 (결정적 에러 주입)
+        {"path": "order", "method": "POST", "status": 429, "code": -1003, "retry_after": 1}
+        """
+        injected.append(await request.json())
+        return {"pending": len(injected)}
+
+    @app.post("/sim/reset")
+    async def reset():
+        ex.reset()
+        injected.clear()
+        return {"status": "reset"}
+
+    @app.get("/sim/state")
+    async def state():
+        return {
+            "hedge_mode": ex.hedge_mode,
+            "balance": ex.balance,
+            "positions": ex.position_risk(),
+            "open_orders": ex.open_orders(),
+            "orders": len(ex.orders),
+            "leverage": {s: lev for s, lev in ex.leverage.items() if lev != 20},
+        }
+
+    return app
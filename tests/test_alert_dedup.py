@@ -0,0 +1,89 @@
+# tests/test_alert_dedup.py
+"""
+알림 중복 판별
+- fan-out 알림은 대상 프로필 묶음까지 같아야 중복
+- WEBHOOK_FAST_ACK 백그라운드 작업이 실패하면 재전송이 다시 실행됨
+- alert_id(긴 TTL) 항목이 앞에 있어도 짧은 TTL 만료 항목이 정리됨
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+
+from app.services import alert_dedup, execution
+from app.services.alert_dedup import AlertDedupCache
+
+
+def _fanout(profiles: list[str]) -> SimpleNamespace:
+    return SimpleNamespace(symbol="ETH/USDT", action="buy", alert_id=None, profiles=profiles)
+
+
+def test_fanout_key_includes_target_profiles():
+    cache = AlertDedupCache(window=5.0, id_ttl=600.0, max_entries=100)
+    calls: list[list[str]] = []
+
+    async def handler(payload):
+        calls.append(payload.profiles)
+        return {"status": "ok"}
+
+    async def main():
+        for profiles in (["webhook1", "webhook3"], ["webhook3", "webhook1"], ["webhook2"]):
+            payload = _fanout(profiles)
+            await cache.run("fanout", payload, handler, payload)
+
+    asyncio.run(main())
+    # 순서만 다른 같은 묶음은 중복, 다른 묶음은 따로 실행
+    assert calls == [["webhook1", "webhook3"], ["webhook2"]]
+
+
+def test_failed_fast_ack_job_evicts_entry(monkeypatch):
+    monkeypatch.setattr(execution, "WEBHOOK_FAST_ACK", True)
+    monkeypatch.setattr(alert_dedup.dedup_cache, "_stores", {})
+    attempts: list[int] = []
+
+    @alert_dedup.dedupe_alert("webhook1")
+    @execution.serialize_by_symbol
+    async def route(payload):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise HTTPException(status_code=500, detail="order rejected")
+        return {"status": "ok"}
+
+    async def main():
+        payload = SimpleNamespace(symbol="ETHUSDT", action="BUY", alert_id="alert-1")
+        first = await route(payload=payload)
+        await asyncio.sleep(0.05)  # 백그라운드 작업 실패
+        second = await route(payload=payload)
+        await asyncio.sleep(0.05)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert attempts == [1, 1]
+    assert json.loads(first.body)["job_id"] != json.loads(second.body)["job_id"]
+
+
+def test_expired_short_entries_purged_behind_long_id_entry(monkeypatch):
+    cache = AlertDedupCache(window=2.0, id_ttl=600.0, max_entries=1000)
+    clock = [1000.0]
+    monkeypatch.setattr(alert_dedup.time, "monotonic", lambda: clock[0])
+
+    async def handler(payload):
+        return {"status": "ok"}
+
+    async def main():
+        first = SimpleNamespace(symbol="ETHUSDT", action="BUY", alert_id="tv-1")
+        await cache.run("webhook1", first, handler, first)
+        for i in range(50):
+            payload = SimpleNamespace(symbol=f"SYM{i}USDT", action="BUY", alert_id=None)
+            await cache.run("webhook1", payload, handler, payload)
+        assert len(cache) == 51
+
+        clock[0] += 10.0  # 짧은 TTL 항목만 만료
+        late = SimpleNamespace(symbol="ETHUSDT", action="SELL", alert_id=None)
+        await cache.run("webhook1", late, handler, late)
+
+    asyncio.run(main())
+    # alert_id 항목 + 마지막 알림만 남음
+    assert len(cache) == 2
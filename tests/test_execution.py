@@ -0,0 +1,49 @@
+# tests/test_execution.py
+"""
+종료 시 실행 중인 알림은 끝까지 마치고, 아직 시작 안 한 알림만 취소되는지
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.execution import ExecutionScheduler
+
+KEY = ("main", "ETHUSDT")
+
+
+def test_shutdown_waits_for_running_job_and_drops_queued():
+    settled: list[str] = []
+
+    async def alert(name: str, delay: float) -> str:
+        await asyncio.sleep(delay)  # 주문 → 체결 대기
+        settled.append(name)       # 정산
+        return name
+
+    async def main():
+        scheduler = ExecutionScheduler(max_concurrency=4)
+        running = scheduler.submit(KEY, alert, "running", 0.05)
+        queued = scheduler.submit(KEY, alert, "queued", 0.0)
+        await asyncio.sleep(0)  # 워커 시작
+        await scheduler.shutdown(timeout=1.0)
+
+        assert running.result() == "running"
+        assert queued.cancelled()
+        with pytest.raises(HTTPException) as e:
+            scheduler.submit(KEY, alert, "late", 0.0)
+        assert e.value.status_code == 503
+
+    asyncio.run(main())
+    assert settled == ["running"]
+
+
+def test_shutdown_cancels_after_timeout():
+    async def main():
+        scheduler = ExecutionScheduler(max_concurrency=4)
+        stuck = scheduler.submit(KEY, asyncio.sleep, 10)
+        await asyncio.sleep(0)
+        await scheduler.shutdown(timeout=0.05)
+        assert stuck.cancelled()
+
+    asyncio.run(main())
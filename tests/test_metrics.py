@@ -0,0 +1,32 @@
+# tests/test_metrics.py
+"""
+웹훅 본문의 심볼/action 이 그대로 라벨이 되어 시계열이 무한히 늘지 않는지
+"""
+
+import asyncio
+
+from app import metrics
+from app.services import symbol_rules
+from app.services.symbol_rules import SymbolRules
+
+ETH = SymbolRules("ETHUSDT", "TRADING", 0.001, 0.001, 3, 0.01, 2, 5.0)
+
+
+def test_track_alert_maps_unknown_symbols_to_other(monkeypatch):
+    monkeypatch.setattr(symbol_rules, "_rules", {"ETHUSDT": ETH})
+    monkeypatch.setattr(metrics.alert_stage_seconds, "_series", {})
+
+    @metrics.track_alert
+    async def switch(symbol: str, action: str, profile: str = "webhook1") -> None:
+        return None
+
+    async def main():
+        await switch("ETHUSDT", "BUY")
+        for i in range(5):
+            await switch(f"BOGUS{i}USDT", "HODL")
+
+    asyncio.run(main())
+    assert set(metrics.alert_stage_seconds._series) == {
+        ("webhook1", "ETHUSDT", "BUY", "total"),
+        ("webhook1", "OTHER", "OTHER", "total"),
+    }
@@ -0,0 +1,46 @@
+# tests/test_order_events.py
+"""
+여러 체결로 나뉜 주문의 실현손익/수수료가 마지막 체결 값이 아니라 주문 전체 합계로 잡히는지
+"""
+
+import pytest
+
+from app.services import order_events
+
+ORDER_ID = 42
+
+
+def _trade(status: str, last_qty: float, executed: float, rp: float, fee: float) -> dict:
+    return {"e": "ORDER_TRADE_UPDATE", "o": {
+        "s": "ETHUSDT", "c": "flip-1", "S": "BUY", "x": "TRADE", "X": status, "i": ORDER_ID,
+        "l": str(last_qty), "z": str(executed), "ap": "3000", "ps": "BOTH",
+        "rp": str(rp), "n": str(fee), "N": "USDT", "T": 0,
+    }}
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.setattr(order_events, "_recent", order_events.OrderedDict())
+    monkeypatch.setattr(order_events, "_trade_totals", order_events.OrderedDict())
+    monkeypatch.setattr(order_events, "_waiters", {})
+
+
+def test_final_fill_sums_rp_and_commission_across_trades():
+    order_events.handle_order_trade_update(_trade("PARTIALLY_FILLED", 0.05, 0.05, 1.5, 0.06))
+    order_events.handle_order_trade_update(_trade("PARTIALLY_FILLED", 0.05, 0.10, 1.0, 0.06))
+    assert order_events.get_final_order(ORDER_ID) is None
+
+    order_events.handle_order_trade_update(_trade("FILLED", 0.10, 0.20, 0.0, 0.12))
+    fill = order_events.get_final_order(ORDER_ID)
+    assert fill["executedQty"] == pytest.approx(0.20)
+    assert fill["realizedPnl"] == pytest.approx(2.5)
+    assert fill["commission"] == pytest.approx(0.24)
+    assert order_events.get_final_order("flip-1") is fill
+    assert ORDER_ID not in order_events._trade_totals
+
+
+def test_single_trade_fill_unchanged():
+    order_events.handle_order_trade_update(_trade("FILLED", 0.2, 0.2, 3.0, 0.24))
+    fill = order_events.get_final_order(ORDER_ID)
+    assert fill["realizedPnl"] == pytest.approx(3.0)
+    assert fill["commission"] == pytest.approx(0.24)
@@ -0,0 +1,100 @@
+# tests/test_position_book.py
+"""
+스냅샷(REST) 요청 도중에 ACCOUNT_UPDATE 가 도착하는 경우 북이 체결 이전 상태로 돌아가지 않는지
+(거래소 시계가 어긋나도 로컬 수신 시각 기준), 주문 전송 실패 시 대기 표시가 남지 않는지
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services import position_book, user_stream
+
+SYMBOL = "ETHUSDT"
+
+
+def _row(amt: float, side: str = "BOTH") -> dict:
+    return {"symbol": SYMBOL, "positionSide": side, "positionAmt": str(amt),
+            "entryPrice": "3000", "unRealizedProfit": "0"}
+
+
+def _account_update(amt: float, side: str = "BOTH", skew: float = 0.0) -> dict:
+    return {"e": "ACCOUNT_UPDATE", "E": (time.time() + skew) * 1000,
+            "a": {"P": [{"s": SYMBOL, "pa": str(amt), "ep": "3000", "up": "0", "ps": side}]}}
+
+
+class _SlowSnapshotClient:
+    """futures_position_information 응답 전에 during() 을 실행 (요청이 오가는 사이 스트림 이벤트 수신)"""
+
+    def __init__(self, rows: list[dict], during=None):
+        self.rows = rows
+        self.during = during
+
+    async def futures_position_information(self, **kwargs):
+        await asyncio.sleep(0.01)
+        if self.during is not None:
+            self.during()
+        return self.rows
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.setattr(user_stream, "_connected", True)
+    monkeypatch.setattr(position_book, "_book", {})
+    monkeypatch.setattr(position_book, "_pending", {})
+    monkeypatch.setattr(position_book, "_seed_epoch", None)
+    monkeypatch.setattr(position_book, "_seed_lock", None)
+    yield
+
+
+def _amt() -> float:
+    return position_book._book[SYMBOL]["BOTH"].amt
+
+
+def test_seed_keeps_update_received_during_snapshot():
+    client = _SlowSnapshotClient([_row(0.0)], during=lambda: position_book.apply_account_update(_account_update(0.1)))
+    asyncio.run(position_book.seed_positions(client))
+    assert _amt() == pytest.approx(0.1)
+
+
+def test_drift_check_keeps_update_received_during_snapshot():
+    position_book.apply_account_update(_account_update(0.0))
+    client = _SlowSnapshotClient([_row(0.0)], during=lambda: position_book.apply_account_update(_account_update(0.1)))
+    mismatched = asyncio.run(position_book.check_drift(client))
+    assert mismatched == 0
+    assert _amt() == pytest.approx(0.1)
+
+
+def test_drift_check_skips_pending_symbol():
+    position_book.apply_account_update(_account_update(0.1))
+    with position_book.expect_update(SYMBOL):
+        mismatched = asyncio.run(position_book.check_drift(_SlowSnapshotClient([_row(-0.2)])))
+    assert mismatched == 0
+    assert _amt() == pytest.approx(0.1)
+
+
+def test_drift_check_corrects_stale_entry():
+    position_book.apply_account_update(_account_update(0.1))
+    mismatched = asyncio.run(position_book.check_drift(_SlowSnapshotClient([_row(-0.2)])))
+    assert mismatched == 1
+    assert _amt() == pytest.approx(-0.2)
+
+
+def test_update_during_snapshot_kept_with_exchange_clock_behind():
+    # 거래소 시각 E 가 로컬보다 5초 느려도 요청 도중 수신한 갱신은 유지
+    update = _account_update(0.1, skew=-5.0)
+    client = _SlowSnapshotClient([_row(0.0)], during=lambda: position_book.apply_account_update(update))
+    asyncio.run(position_book.check_drift(client))
+    assert _amt() == pytest.approx(0.1)
+
+
+def test_failed_order_clears_pending():
+    with pytest.raises(RuntimeError):
+        with position_book.expect_update(SYMBOL):
+            raise RuntimeError("order rejected")
+    assert SYMBOL not in position_book._pending
+
+    with position_book.expect_update(SYMBOL):
+        pass
+    assert SYMBOL in position_book._pending  # 전송 성공 → ACCOUNT_UPDATE 까지 유지
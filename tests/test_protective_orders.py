@@ -0,0 +1,59 @@
+# tests/test_protective_orders.py
+"""
+batchOrders 에서 보호 주문(reduceOnly) 다리가 진입 체결 전에 거부된 경우 체결가 기준으로 다시 내는지
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import protective_orders
+from app.services.symbol_rules import SymbolRules
+
+RULES = SymbolRules("ETHUSDT", "TRADING", 0.001, 0.001, 3, 0.01, 2, 5.0)
+
+
+class _FakeClient:
+    def __init__(self, retry_error: Exception | None = None):
+        self.created: list[dict] = []
+        self.retry_error = retry_error
+
+    async def futures_place_batch_order(self, batchOrders):
+        entry, tp, sl = batchOrders
+        return [
+            {"orderId": 1, "status": "FILLED", "avgPrice": "3100", "executedQty": entry["quantity"]},
+            {"code": -2022, "msg": "ReduceOnly Order is rejected."},
+            {"orderId": 3, "clientOrderId": sl["newClientOrderId"]},
+        ]
+
+    async def futures_create_order(self, **params):
+        if self.retry_error is not None:
+            raise self.retry_error
+        self.created.append(params)
+        return {"orderId": 10 + len(self.created)}
+
+
+def _place(client):
+    return asyncio.run(protective_orders.place_entry_with_protection(
+        client, "ETHUSDT", True, 0.1, RULES, 3000.0, "webhook1", False,
+    ))
+
+
+def test_rejected_leg_is_replaced_at_fill_price():
+    client = _FakeClient()
+    _, protection = _place(client)
+
+    tp = protection[0]
+    assert "error" not in tp and tp["retried"]
+    assert len(client.created) == 1
+    params = client.created[0]
+    assert params["type"] == "TAKE_PROFIT_MARKET"
+    assert params["newClientOrderId"] == tp["clientOrderId"]
+    # 사이징에 쓴 마크가격(3000)이 아니라 실제 체결가(3100) 기준
+    assert float(params["stopPrice"]) == pytest.approx(3100 * protective_orders.TP_RATIO, abs=0.01)
+
+
+def test_leg_rejected_twice_stays_as_error():
+    _, protection = _place(_FakeClient(retry_error=RuntimeError("-2022")))
+    assert "error" in protection[0]
+    assert "error" not in protection[1]
@@ -0,0 +1,79 @@
+# tests/test_switching_hedge.py
+"""
+hedge 부분 청산(reduce_side)이 요청 수량이 아니라 실제 체결 수량으로 정산하는지
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import switching_hedge
+from app.services.symbol_rules import SymbolRules
+from app.state import get_state
+
+SYMBOL = "ETHUSDT"
+PROFILE = "webhook5"
+RULES = SymbolRules(SYMBOL, "TRADING", 0.001, 0.001, 3, 0.01, 2, 5.0)
+
+
+class _PartialFillClient:
+    """시장가 주문이 요청 수량 일부만 체결되고 만료 (RESULT 응답은 종료 상태 아님)"""
+
+    def __init__(self, executed: str):
+        self.executed = executed
+
+    async def futures_get_order(self, **kwargs):
+        return {"orderId": kwargs["orderId"], "status": "EXPIRED", "executedQty": self.executed}
+
+
+def _patch(monkeypatch, client, order: dict) -> None:
+    async def _client():
+        return client
+
+    async def _positions(_client, _symbol):
+        return [{"symbol": SYMBOL, "positionSide": "LONG", "positionAmt": "0.1"}]
+
+    async def _rules(_symbol):
+        return RULES
+
+    async def _create_order(_client, **params):
+        return order
+
+    async def _exit_price(_client, _symbol, _order):
+        return 3100.0
+
+    async def _sync(_symbol, _profile):
+        return None
+
+    monkeypatch.setattr(switching_hedge, "get_binance_async_client", _client)
+    monkeypatch.setattr(switching_hedge, "_get_positions", _positions)
+    monkeypatch.setattr(switching_hedge, "get_symbol_rules", _rules)
+    monkeypatch.setattr(switching_hedge, "create_order", _create_order)
+    monkeypatch.setattr(switching_hedge, "_get_exit_price", _exit_price)
+    monkeypatch.setattr(switching_hedge, "_sync_state_from_exchange", _sync)
+    monkeypatch.setattr(switching_hedge, "is_connected", lambda: False)
+
+
+@pytest.fixture
+def state():
+    st = get_state(SYMBOL, PROFILE)
+    st.hedge_long.qty = 0.1
+    st.hedge_long.entry_price = 3000.0
+    st.hedge_symbol_leverage = 1
+    yield st
+    st.hedge_long.qty = 0.0
+    st.hedge_long.entry_price = 0.0
+
+
+def test_reduce_side_settles_executed_qty(monkeypatch, state):
+    _patch(monkeypatch, _PartialFillClient("0.02"), {"orderId": 7, "status": "EXPIRED", "executedQty": "0.02"})
+    res = asyncio.run(switching_hedge.reduce_side(SYMBOL, PROFILE, "LONG", 0.5, True))
+    assert res["qty"] == pytest.approx(0.02)
+    assert state.hedge_long.qty == pytest.approx(0.08)
+
+
+def test_reduce_side_skips_when_nothing_filled(monkeypatch, state):
+    _patch(monkeypatch, _PartialFillClient("0"), {"orderId": 8, "status": "EXPIRED", "executedQty": "0"})
+    res = asyncio.run(switching_hedge.reduce_side(SYMBOL, PROFILE, "LONG", 0.5, True))
+    assert res == {"skipped": "not_filled"}
+    assert state.hedge_long.qty == pytest.approx(0.1)
@@ -0,0 +1,89 @@
+# tests/test_symbol_rules.py
+"""
+캐시 미스 시 exchange info 다운로드가 요청마다 반복되지 않는지 (single-flight / 신선한 캐시 거절 / negative cache)
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import symbol_rules
+
+
+def _symbol(name: str, status: str = "TRADING") -> dict:
+    return {
+        "symbol": name,
+        "status": status,
+        "filters": [
+            {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
+            {"filterType": "PRICE_FILTER", "tickSize": "0.01"},
+            {"filterType": "MIN_NOTIONAL", "notional": "5"},
+        ],
+    }
+
+
+class _CountingClient:
+    """futures_exchange_info 호출 횟수를 셈 (느린 다운로드 흉내)"""
+
+    def __init__(self, symbols: list[dict]):
+        self.symbols = symbols
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def futures_exchange_info(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.05)
+        return {"symbols": self.symbols}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    c = _CountingClient([_symbol("ETHUSDT"), _symbol("OLDUSDT", status="SETTLING")])
+    monkeypatch.setattr(symbol_rules, "get_binance_client", lambda: c)
+    monkeypatch.setattr(symbol_rules, "SYMBOL_RULES_SNAPSHOT", str(tmp_path / "rules.json"))
+    monkeypatch.setattr(symbol_rules, "_rules", {})
+    monkeypatch.setattr(symbol_rules, "_loaded_at", 0.0)
+    monkeypatch.setattr(symbol_rules, "_refreshing", None)
+    monkeypatch.setattr(symbol_rules, "_misses", {})
+    return c
+
+
+def test_concurrent_misses_download_once(client):
+    async def main():
+        return await asyncio.gather(*(symbol_rules.get_symbol_rules("ETHUSDT") for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert client.calls == 1
+    assert all(r.symbol == "ETHUSDT" for r in results)
+
+
+def test_unknown_symbol_rejected_without_refresh_while_fresh(client):
+    asyncio.run(symbol_rules.get_symbol_rules("ETHUSDT"))
+    for _ in range(5):
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(symbol_rules.get_symbol_rules("ETHUSDTT"))
+        assert e.value.status_code == 400
+    assert client.calls == 1
+
+
+def test_unknown_symbol_negative_cached_while_stale(client, monkeypatch):
+    monkeypatch.setattr(symbol_rules, "SYMBOL_RULES_TTL", 0.0)  # 항상 만료 상태
+    for _ in range(3):
+        with pytest.raises(HTTPException):
+            asyncio.run(symbol_rules.get_symbol_rules("BOGUSUSDT"))
+    assert client.calls == 1
+
+
+def test_check_symbol(client):
+    symbol_rules.check_symbol("BOGUSUSDT")  # 캐시가 비어 있으면(콜드 스타트) 판단하지 않음
+
+    asyncio.run(symbol_rules.get_symbol_rules("ETHUSDT"))
+    symbol_rules.check_symbol("ETHUSDT")
+    for bad in ("BOGUSUSDT", "OLDUSDT"):
+        with pytest.raises(HTTPException) as e:
+            symbol_rules.check_symbol(bad)
+        assert e.value.status_code == 400
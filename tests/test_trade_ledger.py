@@ -0,0 +1,55 @@
+# tests/test_trade_ledger.py
+"""
+거래 원장 파일 기록
+- 쓰기 실패 시 대기 행이 사라지지 않는지
+- TRADE_LEDGER_CHUNK_ROWS 가 바뀌어도 기존 청크를 만든 당시 크기로 여는지
+"""
+
+import numpy as np
+import pytest
+
+from app.services.trade_ledger import KIND_ENTRY, TradeLedger
+
+
+def _row(i: int) -> tuple:
+    return (float(i), "webhook1", "ETHUSDT", KIND_ENTRY, 1, 0.01, 3000.0 + i, 0.0, 5.0, 0.012, 0.0, 0.0)
+
+
+def test_failed_write_keeps_pending_rows(tmp_path, monkeypatch):
+    ledger = TradeLedger(str(tmp_path), chunk_rows=4)
+    ledger.open()
+    ledger.append(_row(0))
+    ledger.append(_row(1))
+
+    def fail():
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ledger, "_new_chunk", fail)
+    with pytest.raises(OSError):
+        ledger.write_pending()
+    assert ledger.pending == 2
+
+    monkeypatch.undo()
+    ledger.append(_row(2))
+    assert ledger.write_pending() == 3
+    assert ledger.columns(("ts",))["ts"].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_reopen_with_changed_chunk_rows(tmp_path):
+    ledger = TradeLedger(str(tmp_path), chunk_rows=4)
+    ledger.open()
+    for i in range(3):
+        ledger.append(_row(i))
+    ledger.write_pending()
+    ledger.close()
+
+    reopened = TradeLedger(str(tmp_path), chunk_rows=2)
+    assert reopened.open() == 3
+    for i in range(3, 6):
+        reopened.append(_row(i))
+    reopened.write_pending()
+
+    # 첫 청크(용량 4)를 마저 채운 뒤 새 청크(용량 2)로
+    assert [len(v["ts"]) for v in reopened.chunks()] == [4, 2]
+    np.testing.assert_array_equal(reopened.columns(("entry_price",))["entry_price"],
+                                  3000.0 + np.arange(6))